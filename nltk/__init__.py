@@ -88,84 +88,173 @@ __classifiers__ = [
     'Topic :: Text Processing :: Linguistic',
     ]
 
-from internals import config_java
-
-###########################################################
-# TOP-LEVEL MODULES
-###########################################################
-
-# Import top-level functionality into top-level namespace
-
-from collocations import *
-from decorators import decorator, memoize
-from featstruct import *
-from grammar import *
-from probability import *
-from text import *
-from tree import *
-from util import *
-from yamltags import *
-
-# Modules that require Python 2.6
-from sys import version_info as vi
-if vi[0] == 2 and vi[1] >= 6:
-    from align import *
-
-# don't import contents into top-level namespace:
-
-import ccg
-import data
-import help
-
 ###########################################################
-# PACKAGES
+# TOP-LEVEL NAMESPACE
 ###########################################################
 
-# Processing packages -- these define __all__ carefully.
-
-import chunk;     from chunk import *
-import classify;  from classify import *
-import inference; from inference import *
-import metrics;   from metrics import *
-import model;     from model import *
-import parse;     from parse import *
-import tag;       from tag import *
-import tokenize;  from tokenize import *
-import sem;       from sem import *
-import stem;      from stem import *
-
-# Packages which can be lazily imported
-# (a) we don't import *
-# (b) they're slow to import or have run-time dependencies
-#     that can safely fail at run time
-
-import lazyimport
-app = lazyimport.LazyModule('app', locals(), globals())
-chat = lazyimport.LazyModule('chat', locals(), globals())
-corpus = lazyimport.LazyModule('corpus', locals(), globals())
-draw = lazyimport.LazyModule('draw', locals(), globals())
-toolbox = lazyimport.LazyModule('toolbox', locals(), globals())
+# Top-level functionality is imported lazily: ``import nltk`` only
+# loads this file, and each module below is imported the first time
+# one of the names that it provides (or the module itself) is used.
+# This is done by replacing this module in sys.modules with a
+# LazyPackage, once this file has been executed.
 
-try:
-    import numpy
-except ImportError:
-    pass
-else:
-    import cluster; from cluster import *
+# The names that are imported into the top-level namespace, and the
+# modules that they are imported from.  (This list is checked against
+# the modules' contents by test/lazyimport.doctest.)
+_EXPORTS = [
+    ('internals', ['config_java']),
+    ('collocations', ['BigramCollocationFinder', 'TrigramCollocationFinder']),
+    ('decorators', ['decorator', 'memoize']),
+    ('featstruct', ['FeatDict', 'FeatList', 'FeatStruct', 'FeatStructParser',
+         'Feature', 'RangeFeature', 'SLASH', 'SlashFeature', 'TYPE',
+         'conflicts', 'subsumes', 'unify']),
+    ('grammar', ['ContextFreeGrammar', 'DependencyGrammar',
+         'DependencyProduction', 'Nonterminal', 'Production',
+         'StatisticalDependencyGrammar', 'WeightedGrammar',
+         'WeightedProduction', 'cfg_demo', 'dg_demo', 'induce_pcfg',
+         'nonterminals', 'parse_cfg', 'parse_cfg_production',
+         'parse_dependency_grammar', 'parse_dependency_production',
+         'parse_fcfg', 'parse_fcfg_production', 'parse_grammar', 'parse_pcfg',
+         'parse_pcfg_production', 'parse_production', 'pcfg_demo', 'sdg_demo',
+         'toy_pcfg1', 'toy_pcfg2']),
+    ('probability', ['CompactFreqDist', 'ConditionalFreqDist',
+         'ConditionalProbDist', 'ConditionalProbDistI',
+         'CrossValidationProbDist', 'DictionaryConditionalProbDist',
+         'DictionaryProbDist', 'ELEProbDist', 'FreqDist',
+         'GoodTuringProbDist', 'HeldoutProbDist',
+         'ImmutableProbabilisticMixIn', 'LaplaceProbDist',
+         'LazyConditionalProbDist', 'LidstoneProbDist', 'MLEProbDist',
+         'MutableProbDist', 'ProbDistI', 'SampleIndex',
+         'SimpleGoodTuringProbDist', 'UniformProbDist', 'WittenBellProbDist',
+         'add_logs', 'entropy', 'sum_logs']),
+    ('text', ['ConcordanceIndex', 'ContextIndex', 'Text', 'TextCollection',
+         'TokenSearcher']),
+    ('tree', ['ImmutableMultiParentedTree', 'ImmutableParentedTree',
+         'ImmutableProbabilisticTree', 'ImmutableTree', 'MultiParentedTree',
+         'ParentedTree', 'ProbabilisticMixIn', 'ProbabilisticTree', 'Tree',
+         'bracket_parse', 'sinica_parse']),
+    ('util', ['AbstractLazySequence', 'Index', 'LRUCache',
+         'LazyConcatenation', 'LazyEnumerate', 'LazyMap', 'LazySubsequence',
+         'LazyZip', 'OrderedDict', 'bigrams', 'binary_search_file',
+         'breadth_first', 'chain', 'clean_html', 'clean_url', 'filestring',
+         'flatten', 'guess_encoding', 'ibigrams', 'in_idle', 'ingrams',
+         'invert_dict', 'invert_graph', 'islice', 'itrigrams', 'ngrams',
+         'pprint', 'pr', 'print_string', 're_show', 'set_proxy',
+         'slice_bounds', 'tokenwrap', 'transitive_closure', 'trigrams',
+         'usage']),
+    ('yamltags', ['custom_import', 'metaloader', 'register_tag']),
+    ('align', ['AlignedSent', 'Alignment', 'IBMModel1', 'defaultdict']),
+    ('chunk', ['ChunkParserI', 'ChunkScore', 'RegexpChunkParser',
+         'RegexpParser', 'batch_ne_chunk', 'conllstr2tree', 'ieerstr2tree',
+         'ne_chunk', 'tagstr2tree', 'tree2conllstr', 'tree2conlltags']),
+    ('classify', ['BinaryMaxentFeatureEncoding', 'ClassifierI',
+         'ConditionalExponentialClassifier', 'DecisionTreeClassifier',
+         'MaxentClassifier', 'MultiClassifierI', 'NaiveBayesClassifier',
+         'PositiveNaiveBayesClassifier', 'RTEFeatureExtractor',
+         'TypedMaxentFeatureEncoding', 'WekaClassifier', 'call_mallet',
+         'call_megam', 'config_mallet', 'config_megam', 'config_weka',
+         'decisiontree', 'mallet', 'maxent', 'megam', 'naivebayes',
+         'positivenaivebayes', 'rte_classifier', 'rte_classify',
+         'rte_features', 'tadm', 'weka']),
+    ('inference', ['CfgReadingCommand', 'DiscourseTester',
+         'DrtGlueReadingCommand', 'Mace', 'MaceCommand',
+         'ParallelProverBuilder', 'ParallelProverBuilderCommand', 'Prover9',
+         'Prover9Command', 'ReadingCommand', 'ResolutionProver',
+         'ResolutionProverCommand', 'TableauProver', 'TableauProverCommand',
+         'discourse', 'mace', 'prover9', 'resolution', 'tableau']),
+    ('metrics', ['AnnotationTask', 'BigramAssocMeasures', 'ConfusionMatrix',
+         'ContingencyMeasures', 'NgramAssocMeasures', 'TrigramAssocMeasures',
+         'accuracy', 'agreement', 'approxrand', 'association',
+         'binary_distance', 'confusionmatrix', 'custom_distance', 'distance',
+         'edit_distance', 'f_measure', 'fractional_presence',
+         'interval_distance', 'jaccard_distance', 'log_likelihood',
+         'masi_distance', 'precision', 'presence', 'ranks_from_scores',
+         'ranks_from_sequence', 'recall', 'scores', 'spearman',
+         'spearman_correlation', 'windowdiff']),
+    ('model', ['NgramModel', 'ngram']),
+    ('parse', ['BottomUpChartParser', 'BottomUpLeftCornerChartParser',
+         'BottomUpProbabilisticChartParser', 'ChartParser', 'DependencyGraph',
+         'EarleyChartParser', 'FeatureBottomUpChartParser',
+         'FeatureBottomUpLeftCornerChartParser', 'FeatureChartParser',
+         'FeatureEarleyChartParser', 'FeatureIncrementalBottomUpChartParser',
+         'FeatureIncrementalBottomUpLeftCornerChartParser',
+         'FeatureIncrementalChartParser',
+         'FeatureIncrementalTopDownChartParser', 'FeatureTopDownChartParser',
+         'IncrementalBottomUpChartParser',
+         'IncrementalBottomUpLeftCornerChartParser', 'IncrementalChartParser',
+         'IncrementalLeftCornerChartParser', 'IncrementalTopDownChartParser',
+         'InsideChartParser', 'LeftCornerChartParser', 'LongestChartParser',
+         'MaltParser', 'NaiveBayesDependencyScorer',
+         'NonprojectiveDependencyParser', 'ParserI',
+         'ProbabilisticNonprojectiveParser',
+         'ProbabilisticProjectiveDependencyParser',
+         'ProjectiveDependencyParser', 'RandomChartParser',
+         'RecursiveDescentParser', 'ShiftReduceParser', 'SteppingChartParser',
+         'SteppingRecursiveDescentParser', 'SteppingShiftReduceParser',
+         'TestGrammar', 'TopDownChartParser', 'UnsortedChartParser',
+         'ViterbiParser', 'chart', 'dependencygraph', 'earleychart',
+         'extract_test_sentences', 'featurechart', 'load_parser', 'malt',
+         'nonprojectivedependencyparser', 'nx_graph', 'pchart',
+         'projectivedependencyparser', 'rd', 'sr', 'viterbi']),
+    ('tag', ['AffixTagger', 'BigramTagger', 'BrillTagger',
+         'BrillTaggerTrainer', 'ClassifierBasedPOSTagger',
+         'ClassifierBasedTagger', 'ContextTagger', 'DefaultTagger',
+         'FastBrillTaggerTrainer', 'HiddenMarkovModelTagger',
+         'HiddenMarkovModelTrainer', 'HunposTagger', 'MalletCRF',
+         'NgramTagger', 'RegexpTagger', 'SequentialBackoffTagger',
+         'StanfordTagger', 'TaggerI', 'TnT', 'TrigramTagger', 'UnigramTagger',
+         'batch_pos_tag', 'brill', 'crf', 'hmm', 'hunpos', 'pos_tag',
+         'sequential', 'simplify', 'simplify_alpino_tag',
+         'simplify_brown_tag', 'simplify_indian_tag', 'simplify_tag',
+         'simplify_wsj_tag', 'stanford', 'str2tuple', 'tnt', 'tuple2str',
+         'untag']),
+    ('tokenize', ['BlanklineTokenizer', 'LineTokenizer',
+         'PunktSentenceTokenizer', 'PunktWordTokenizer', 'RegexpTokenizer',
+         'SExprTokenizer', 'SpaceTokenizer', 'TabTokenizer',
+         'TextTilingTokenizer', 'TreebankWordTokenizer',
+         'WhitespaceTokenizer', 'WordPunctTokenizer', 'blankline_tokenize',
+         'line_tokenize', 'load', 'punkt', 'regexp_tokenize', 'sent_tokenize',
+         'sexpr', 'sexpr_tokenize', 'simple', 'texttiling', 'treebank',
+         'word_tokenize', 'wordpunct_tokenize']),
+    ('sem', ['Assignment', 'Boxer', 'DRS', 'DrtParser', 'FStructure',
+         'LinearLogicParser', 'LogicParser', 'Model', 'Undefined',
+         'Valuation', 'arity', 'batch_evaluate', 'batch_interpret',
+         'batch_parse', 'binding_ops', 'boolean_ops', 'boxer', 'drt',
+         'equality_preds', 'evaluate', 'extract_rels', 'glue', 'is_rel',
+         'lfg', 'linearlogic', 'logic', 'parse_logic', 'parse_valuation',
+         'relextract', 'root_semrep', 'set2rel', 'skolemize']),
+    ('stem', ['ISRIStemmer', 'LancasterStemmer', 'PorterStemmer',
+         'RSLPStemmer', 'RegexpStemmer', 'SnowballStemmer', 'StemmerI',
+         'WordNetLemmatizer', 'isri', 'lancaster', 'porter', 'regexp', 'rslp',
+         'snowball', 'wordnet']),
+    ('cluster', ['Dendrogram', 'EMClusterer', 'GAAClusterer',
+         'KMeansClusterer', 'VectorSpaceClusterer', 'api', 'cosine_distance',
+         'em', 'euclidean_distance', 'gaac', 'kmeans']),
+    ('downloader', ['download', 'download_gui', 'download_shell']),
+    ]
 
-from downloader import download, download_shell
-try:
-    import Tkinter
-except ImportError:
-    pass
-else:
-    try:
-        from downloader import download_gui
-    except RuntimeError, e:
-        import warnings
-        warnings.warn("Corpus downloader GUI not loaded "
-                      "(RuntimeError during import: %s)" % str(e))
+# Packages and modules that are part of the top-level namespace, but
+# whose contents are not.
+_SUBMODULES = ['align', 'app', 'ccg', 'chat', 'chunk', 'classify', 'cluster',
+               'collocations', 'corpus', 'data', 'decorators', 'downloader',
+               'draw', 'featstruct', 'grammar', 'help', 'inference',
+               'internals', 'metrics', 'model', 'parse', 'probability', 'sem',
+               'stem', 'tag', 'text', 'tokenize', 'toolbox', 'tree', 'util',
+               'yamltags']
 
 # override any accidentally imported demo
 def demo():
     print "To run the demo code for a module, type nltk.module.demo()"
+
+from lazyimport import LazyModule as _LazyModule, LazyPackage as _LazyPackage
+_package = _LazyPackage.install(__name__, dict((name, module)
+                                               for (module, names) in _EXPORTS
+                                               for name in names),
+                                _SUBMODULES)
+
+# Packages that are slow to import, or have run-time dependencies that
+# can safely fail at run time, are only imported when one of their
+# attributes is used (even by "from nltk import *").
+for _name in ['app', 'chat', 'corpus', 'draw', 'toolbox']:
+    setattr(_package, _name,
+            _LazyModule(_name, _package.__dict__, _package.__dict__))
@@ -0,0 +1,177 @@
+# Natural Language Toolkit: Benchmarks
+#
+# Copyright (C) 2001-2012 NLTK Project
+# URL: <http://www.nltk.org/>
+# For license information, see LICENSE.TXT
+
+"""
+NLTK Benchmarks
+
+Benchmarks that measure the performance of NLTK's common entry points,
+so that releases can be compared, and performance regressions found:
+
+  - ``nltk.bench.startup`` measures the latency of starting to use
+    NLTK: the time taken by ``import nltk``, by the first call to an
+    entry point (such as ``nltk.sent_tokenize()``, which loads a
+    model), and by later calls; and the peak memory used.
+  - ``nltk.bench.throughput`` measures the throughput and memory use
+    of tokenizers, taggers, parsers and classifiers, on synthetic
+    data.
+
+Each benchmark module can be run as a script, which prints a table of
+results; saves them (with ``--save``); and compares them with results
+that were saved earlier (with ``--baseline``), exiting with status 1 if
+any of them got worse.
+
+Results are dictionaries that map each benchmark's name to a
+dictionary of measurements.  This module defines the functions that
+are used to save, load and compare them.
+
+    >>> from nltk.bench import compare
+    >>> baseline = {'import nltk': {'import_time': 10.0, 'peak_rss': 8000}}
+    >>> results = {'import nltk': {'import_time': 200.0, 'peak_rss': 8100}}
+    >>> for regression in compare(results, baseline):
+    ...     print '%s %s: %s -> %s' % regression
+    import nltk import_time: 10.0 -> 200.0
+"""
+
+import os
+import sys
+
+try: import json
+except ImportError: import simplejson as json # Python 2.5
+
+try: import resource
+except ImportError: resource = None
+
+TOLERANCE = 0.25
+"""The default relative tolerance for ``compare()``: a measurement is
+   only a regression if it is more than this fraction worse than the
+   baseline."""
+
+SLACK = {'import_time': 5, 'first_call': 5, 'warm_call': 0.5, 'time': 1,
+         'memory': 1024, 'peak_rss': 1024}
+"""The smallest absolute changes that ``compare()`` reports as
+   regressions, for each kind of measurement.  (Times are in
+   milliseconds, and sizes in kilobytes.)  Changes smaller than these
+   are treated as noise.  Measurements that are not listed are reported whenever they
+   exceed the tolerance."""
+
+def peak_rss():
+    """
+    :return: The peak resident set size of this process, in kilobytes;
+        or None, if it can't be determined on this platform.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        rss //= 1024 # Reported in bytes.
+    return rss
+
+def current_rss():
+    """
+    :return: The current resident set size of this process, in
+        kilobytes; or None, if it can't be determined on this platform.
+    """
+    try:
+        statm = open('/proc/self/statm')
+    except IOError:
+        return None
+    try:
+        pages = int(statm.read().split()[1])
+    finally:
+        statm.close()
+    return pages * (os.sysconf('SC_PAGE_SIZE') // 1024)
+
+def compare(results, baseline, tolerance=TOLERANCE, higher_is_better=()):
+    """
+    Compare benchmark results with a baseline.
+
+    :return: A list of ``(benchmark, measurement, old, new)`` tuples,
+        for each measurement that is more than ``tolerance`` (and
+        ``SLACK``) worse than the baseline.  Benchmarks and
+        measurements that are missing from either ``results`` or
+        ``baseline`` are ignored.
+    :param higher_is_better: The names of the measurements (such as
+        throughputs) that are better when they are higher.  All others
+        (such as times) are better when they are lower.
+    """
+    regressions = []
+    for name in sorted(results):
+        for measurement in sorted(results[name]):
+            new = results[name][measurement]
+            old = baseline.get(name, {}).get(measurement)
+            if (not isinstance(new, (int, long, float)) or
+                not isinstance(old, (int, long, float))):
+                continue
+            slack = SLACK.get(measurement, 0)
+            if measurement in higher_is_better:
+                worse = (new < old * (1 - tolerance) and old - new > slack)
+            else:
+                worse = (new > old * (1 + tolerance) and new - old > slack)
+            if worse:
+                regressions.append((name, measurement, old, new))
+    return regressions
+
+def save_results(results, filename):
+    """
+    Save benchmark results (as JSON) to the given file.
+    """
+    outfile = open(filename, 'w')
+    try:
+        json.dump(results, outfile, indent=1, sort_keys=True)
+    finally:
+        outfile.close()
+
+def load_results(filename):
+    """
+    :return: The benchmark results saved in the given file.
+    """
+    infile = open(filename)
+    try:
+        return json.load(infile)
+    finally:
+        infile.close()
+
+def format_results(results, columns):
+    """
+    :return: A table of benchmark results, as a string.
+    :param columns: A list of ``(measurement, heading, format)``
+        tuples, one for each column after the benchmark's name.
+    """
+    rows = [['benchmark'] + [heading for (m, heading, f) in columns]]
+    for name in sorted(results):
+        row = [name]
+        for (measurement, heading, format) in columns:
+            value = results[name].get(measurement)
+            row.append(value is None and '-' or format % value)
+        rows.append(row)
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    lines = []
+    for row in rows:
+        lines.append('  '.join([row[0].ljust(widths[0])] +
+                               [cell.rjust(width) for (cell, width)
+                                in zip(row[1:], widths[1:])]))
+    return '\n'.join(lines)
+
+def report(results, columns, save=None, baseline=None,
+           tolerance=TOLERANCE, higher_is_better=()):
+    """
+    Print a table of benchmark results; save them to the file ``save``
+    (if given); and compare them with the results saved in the file
+    ``baseline`` (if given), printing any regressions.
+
+    :return: True if there were no regressions.
+    """
+    print format_results(results, columns)
+    if save:
+        save_results(results, save)
+    if baseline:
+        regressions = compare(results, load_results(baseline), tolerance,
+                              higher_is_better)
+        for (name, measurement, old, new) in regressions:
+            print 'REGRESSION: %s %s: %s -> %s' % (name, measurement, old, new)
+        if regressions:
+            return False
+    return True
@@ -0,0 +1,202 @@
+# Natural Language Toolkit: Startup Latency Benchmarks
+#
+# Copyright (C) 2001-2012 NLTK Project
+# URL: <http://www.nltk.org/>
+# For license information, see LICENSE.TXT
+
+"""
+Benchmarks for the latency of NLTK's common entry points.
+
+Short-lived programs spend much of their time starting to use NLTK:
+importing it, and loading the models and corpora that an entry point
+needs the first time it is called.  Each benchmark runs in a fresh
+Python interpreter, and measures:
+
+  - ``import_time``: the time taken by ``import nltk``;
+  - ``first_call``: the time taken by the first call to the entry
+    point (including any modules, models and corpora that it loads);
+  - ``warm_call``: the time taken by a later call (the fastest of
+    several calls);
+  - ``nltk_modules``: the number of NLTK modules that were loaded;
+    and
+  - ``peak_rss``: the peak resident set size of the interpreter, in
+    kilobytes.
+
+Each benchmark is run in several interpreters, and the smallest value
+of each measurement is reported.  Benchmarks whose data (such as the
+punkt models, or the WordNet corpus) is not installed are skipped.
+
+To run the benchmarks, and compare them with results saved earlier::
+
+    python -m nltk.bench.startup --save new.json --baseline old.json
+
+A single benchmark can also be run from Python:
+
+    >>> from nltk.bench.startup import run_benchmark
+    >>> result = run_benchmark('word_tokenize', processes=1)
+    >>> sorted(result)
+    ['first_call', 'import_time', 'nltk_modules', 'peak_rss', 'warm_call']
+    >>> [type(result[key]).__name__ for key in sorted(result)]
+    ['float', 'float', 'int', 'int', 'float']
+"""
+
+import os
+import sys
+import subprocess
+from optparse import OptionParser
+try: import json
+except ImportError: import simplejson as json # Python 2.5
+
+from nltk.bench import report
+
+TEXT = ("Mr. Smith bought cheapsite.com for 1.5 million dollars, i.e. he "
+        "paid a lot for it. Did he mind? Adam Jones Jr. thinks he didn't. "
+        "In any case, this isn't true... Well, with a probability of .9 "
+        "it isn't. ") * 5
+"""The text that the tokenizing and tagging benchmarks are called on."""
+
+BENCHMARKS = [
+    ('import nltk', '', None),
+    ('word_tokenize', '', 'nltk.word_tokenize(TEXT)'),
+    ('sent_tokenize', '', 'nltk.sent_tokenize(TEXT)'),
+    ('pos_tag', 'tokens = TEXT.split()', 'nltk.pos_tag(tokens)'),
+    ('wordnet.synsets', '', "nltk.corpus.wordnet.synsets('dog')"),
+    ]
+"""The benchmarks, as a list of ``(name, setup, call)`` tuples: after
+   ``import nltk``, the ``setup`` statement is run (untimed), followed
+   by the ``call`` statement (if any), which is timed.  Both can use
+   ``TEXT``."""
+
+COLUMNS = [('import_time', 'import (ms)', '%.1f'),
+           ('first_call', 'first call (ms)', '%.1f'),
+           ('warm_call', 'warm call (ms)', '%.2f'),
+           ('nltk_modules', 'nltk modules', '%d'),
+           ('peak_rss', 'peak RSS (KB)', '%d'),
+           ('skipped', 'skipped', '%s')]
+
+# The script run by each interpreter: it prints a JSON dictionary of
+# measurements (in seconds, and kilobytes).
+_SCRIPT = """
+import re, sys, time
+start = time.time()
+import nltk
+import_time = time.time() - start
+from nltk.bench import peak_rss
+try: import json
+except ImportError: import simplejson as json
+TEXT = %(text)r
+%(setup)s
+result = dict(import_time=import_time)
+try:
+    for i in range(%(calls)d):
+        start = time.time()
+        %(call)s
+        elapsed = time.time() - start
+        if i == 0:
+            result['first_call'] = elapsed
+        else:
+            result['warm_call'] = min(result.get('warm_call', elapsed),
+                                      elapsed)
+except LookupError, e:
+    # Report which resource is missing.
+    message = ' '.join(str(e).split())
+    missing = re.search(r"Resource '[^']*' not found", message)
+    result = dict(skipped=missing and missing.group() or message)
+result['peak_rss'] = peak_rss()
+# (Not counting this benchmark's own modules.)
+result['nltk_modules'] = len([m for m in sys.modules if sys.modules[m] and
+                              m.split('.')[0] == 'nltk' and
+                              m.split('.')[:2] != ['nltk', 'bench']])
+print json.dumps(result)
+"""
+
+def run_benchmark(name, processes=3, calls=10):
+    """
+    Run a benchmark in fresh interpreters.
+
+    :return: A dictionary of the smallest value of each measurement
+        (in milliseconds, and kilobytes); or a dictionary whose
+        ``skipped`` value describes the data that is missing.
+    :param name: The name of a benchmark in ``BENCHMARKS``.
+    :param processes: The number of interpreters to run it in.
+    :param calls: The number of times to call the entry point in each
+        interpreter.
+    """
+    for (bench_name, setup, call) in BENCHMARKS:
+        if bench_name == name:
+            break
+    else:
+        raise ValueError('Unknown benchmark %r' % name)
+    return measure_startup(setup, call, processes, calls)
+
+def measure_startup(setup, call, processes=3, calls=10):
+    """
+    Measure the startup latency of a statement, like a benchmark in
+    ``BENCHMARKS``: ``import nltk`` is timed, then ``setup`` is run,
+    and then ``call`` (if it is not None) is timed.
+
+    :return: A dictionary of the smallest value of each measurement;
+        see ``run_benchmark()``.
+    """
+    script = _SCRIPT % dict(text=TEXT, setup=setup, call=call or 'pass',
+                            calls=call and calls or 0)
+
+    # Make sure that the interpreters import this copy of nltk.
+    nltk_dir = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    python_path = [nltk_dir] + [d for d in os.environ.get('PYTHONPATH', '')
+                                .split(os.pathsep) if d]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(python_path))
+
+    result = {}
+    for i in range(processes):
+        process = subprocess.Popen([sys.executable, '-c', script],
+                                   stdout=subprocess.PIPE, env=env)
+        out = process.communicate()[0]
+        if process.returncode != 0:
+            raise RuntimeError('Benchmark of %r failed' % (call or setup))
+        measurements = json.loads(out.splitlines()[-1])
+        if 'skipped' in measurements:
+            return dict(skipped=str(measurements['skipped']))
+        for (measurement, value) in measurements.items():
+            measurement = str(measurement)
+            if measurement not in ('peak_rss', 'nltk_modules'):
+                value *= 1000
+            if value is not None:
+                result[measurement] = min(result.get(measurement, value),
+                                          value)
+    return result
+
+def run_benchmarks(names=None, processes=3, calls=10):
+    """
+    Run the given benchmarks (or all of them).
+
+    :return: A dictionary mapping benchmark names to their results
+        (see ``run_benchmark()``).
+    """
+    if names is None:
+        names = [name for (name, setup, call) in BENCHMARKS]
+    return dict((name, run_benchmark(name, processes, calls))
+                for name in names)
+
+def main():
+    parser = OptionParser(usage='%prog [options] [benchmark...]')
+    parser.add_option('--processes', type='int', default=3,
+                      help='number of interpreters to run each benchmark in')
+    parser.add_option('--calls', type='int', default=10,
+                      help='number of calls to make in each interpreter')
+    parser.add_option('--save', metavar='FILE',
+                      help='save the results to FILE')
+    parser.add_option('--baseline', metavar='FILE',
+                      help='compare the results with those saved in FILE')
+    parser.add_option('--tolerance', type='float', default=0.25,
+                      help='relative change that counts as a regression')
+    options, names = parser.parse_args()
+
+    results = run_benchmarks(names or None, options.processes, options.calls)
+    if not report(results, COLUMNS, options.save, options.baseline,
+                  options.tolerance):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
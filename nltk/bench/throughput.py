@@ -0,0 +1,400 @@
+# Natural Language Toolkit: Throughput Benchmarks
+#
+# Copyright (C) 2001-2012 NLTK Project
+# URL: <http://www.nltk.org/>
+# For license information, see LICENSE.TXT
+
+"""
+Benchmarks for the throughput of NLTK's tokenizers, taggers, parsers
+and classifiers.
+
+Each benchmark runs a representative workload on synthetic data, which
+is generated from a fixed random seed, so that the benchmarks can be
+run offline, and their results are reproducible.  (Models, such as the
+punkt parameters and the taggers, are trained on synthetic data too.)
+Each benchmark runs in a fresh Python interpreter, and measures:
+
+  - ``time``: the time taken by the workload, in milliseconds (the
+    fastest of several runs);
+  - ``tokens_per_sec``: the number of tokens (or, for classifiers,
+    training instances) processed per second, in that time;
+  - ``memory``: the largest increase in the interpreter's resident
+    set size while running the workload, in kilobytes (this is sampled
+    during a first, untimed run, and is only measured on platforms
+    that provide ``/proc/self/statm``); and
+  - ``peak_rss``: the peak resident set size of the interpreter, in
+    kilobytes.
+
+Benchmarks whose dependencies (such as numpy) are not installed are
+skipped.
+
+To run the benchmarks, and compare them with results saved earlier::
+
+    python -m nltk.bench.throughput --save new.json --baseline old.json
+
+The synthetic data can also be used directly:
+
+    >>> from nltk.bench.throughput import synthetic_tagged_sents
+    >>> synthetic_tagged_sents(1, seed=1) # doctest: +ELLIPSIS
+    [[('...', '...'), ...]]
+"""
+
+import os
+import sys
+import gc
+import time
+import random
+import threading
+import subprocess
+from optparse import OptionParser
+try: import json
+except ImportError: import simplejson as json # Python 2.5
+
+from nltk.bench import current_rss, peak_rss, report
+
+######################################################################
+#{ Synthetic Data
+######################################################################
+
+_SYLLABLES = ['ba', 'ko', 'ri', 'tel', 'mun', 'sa', 'pe', 'dor', 'li',
+              'gan', 'vu', 'fi', 'nes', 'tra', 'mo']
+
+_TAGS = ['NN', 'NNS', 'VB', 'VBD', 'JJ', 'RB', 'IN', 'DT', 'PRP', 'CC']
+
+_ABBREVIATIONS = ['Dr.', 'Mr.', 'Mrs.', 'Inc.', 'etc.', 'Jan.', 'e.g.',
+                  'St.', 'Co.', 'vs.']
+
+def _vocabulary(rng, size=2000):
+    """
+    :return: A list of ``(word, tag)`` pairs.  Words are made of random
+        syllables; words earlier in the list are used more often.
+    """
+    vocabulary = []
+    seen = set()
+    while len(vocabulary) < size:
+        word = ''.join(rng.choice(_SYLLABLES)
+                       for i in range(rng.randint(1, 3)))
+        if word not in seen:
+            seen.add(word)
+            vocabulary.append((word, rng.choice(_TAGS)))
+    return vocabulary
+
+def _zipf_choice(rng, items):
+    """
+    :return: An item of ``items``, chosen with (roughly) a Zipfian
+        distribution.
+    """
+    return items[min(int(rng.paretovariate(1.0)) - 1, len(items) - 1)]
+
+def synthetic_tagged_sents(num_sents, seed=0):
+    """
+    :return: A list of ``num_sents`` randomly generated tagged
+        sentences.  Each word has a usual tag, but is sometimes given
+        another one.
+    """
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(rng)
+    sents = []
+    for i in range(num_sents):
+        sent = []
+        for j in range(rng.randint(5, 25)):
+            word, tag = _zipf_choice(rng, vocabulary)
+            if rng.random() < 0.1:
+                tag = rng.choice(_TAGS)
+            sent.append((word, tag))
+        sent.append(('.', '.'))
+        sents.append(sent)
+    return sents
+
+def synthetic_sents(num_sents, seed=0):
+    """
+    :return: A list of ``num_sents`` randomly generated sentences (as
+        strings), containing capitalized words, abbreviations, numbers
+        and quotations.
+    """
+    rng = random.Random(seed)
+    sents = []
+    for sent in synthetic_tagged_sents(num_sents, seed):
+        words = [word for (word, tag) in sent[:-1]]
+        for k in range(len(words)):
+            r = rng.random()
+            if r < 0.05:
+                words[k] = rng.choice(_ABBREVIATIONS)
+            elif r < 0.08:
+                words[k] = '%d.%d' % (rng.randint(0, 99), rng.randint(0, 9))
+            elif r < 0.15:
+                words[k] = words[k].capitalize()
+        words[0] = words[0].capitalize()
+        if rng.random() < 0.1:
+            words[0] = '"' + words[0]
+            words[-1] += rng.choice(['."', '?"'])
+        else:
+            words[-1] += rng.choice(['.', '.', '.', '?', '!'])
+        sents.append(' '.join(words))
+    return sents
+
+def synthetic_text(num_sents, seed=0):
+    """
+    :return: A randomly generated text of ``num_sents`` sentences.
+        See ``synthetic_sents()``.
+    """
+    return ' '.join(synthetic_sents(num_sents, seed))
+
+######################################################################
+#{ Workloads
+######################################################################
+# Each workload function generates its data and trains its model (this
+# is not timed), and returns the workload to be timed, as a function
+# with no arguments, and the number of tokens that it processes.
+
+def _punkt_tokenize(scale):
+    from nltk.tokenize.punkt import PunktTrainer, PunktSentenceTokenizer
+    trainer = PunktTrainer()
+    trainer.train(synthetic_text(2000, seed=1))
+    tokenizer = PunktSentenceTokenizer(trainer.get_params())
+    text = synthetic_text(2000 * scale)
+    return (lambda: tokenizer.tokenize(text)), len(text.split())
+
+def _treebank_tokenize(scale):
+    from nltk.tokenize.treebank import TreebankWordTokenizer
+    tokenizer = TreebankWordTokenizer()
+    sents = synthetic_sents(1000 * scale)
+    def run():
+        for sent in sents:
+            tokenizer.tokenize(sent)
+    return run, sum(len(sent.split()) for sent in sents)
+
+def _treebank_span_tokenize(scale):
+    from nltk.tokenize.treebank import TreebankWordTokenizer
+    tokenizer = TreebankWordTokenizer()
+    # A long text, with one sentence per line.
+    text = '\n'.join(synthetic_sents(1000 * scale))
+    return (lambda: tokenizer.span_tokenize(text)), len(text.split())
+
+def _tag_workload(tagger, scale, num_sents):
+    sents = [[word for (word, tag) in sent] for sent in
+             synthetic_tagged_sents(num_sents * scale, seed=2)]
+    def run():
+        for sent in sents:
+            tagger.tag(sent)
+    return run, sum(len(sent) for sent in sents)
+
+def _unigram_tag(scale):
+    from nltk.tag import UnigramTagger
+    tagger = UnigramTagger(train=synthetic_tagged_sents(2000, seed=1))
+    return _tag_workload(tagger, scale, 2000)
+
+def _hmm_tag(scale):
+    from nltk.tag.hmm import HiddenMarkovModelTagger
+    tagger = HiddenMarkovModelTagger.train(synthetic_tagged_sents(500, seed=1))
+    return _tag_workload(tagger, scale, 100)
+
+_AMBIGUOUS_GRAMMAR = """
+    S -> NP VP
+    NP -> Det N | NP PP | 'I'
+    VP -> V NP | VP PP
+    PP -> P NP
+    Det -> 'the' | 'a'
+    N -> 'man' | 'park' | 'dog' | 'telescope' | 'hill'
+    V -> 'saw'
+    P -> 'in' | 'with' | 'on'
+    """
+
+def _chart_parse(scale):
+    from nltk.grammar import parse_cfg
+    from nltk.parse.chart import ChartParser
+    parser = ChartParser(parse_cfg(_AMBIGUOUS_GRAMMAR))
+    # Each prepositional phrase multiplies the number of parses.
+    sent = ('I saw the man in the park with a telescope on the hill '
+            'with a dog').split()
+    def run():
+        for i in range(10 * scale):
+            parser.nbest_parse(sent)
+    return run, len(sent) * 10 * scale
+
+def _featuresets(scale):
+    """
+    :return: Labeled featuresets, whose labels are the tags of the
+        synthetic tagged sentences, and whose features describe each
+        word and its neighbors.
+    """
+    featuresets = []
+    for sent in synthetic_tagged_sents(200 * scale, seed=3):
+        for i, (word, tag) in enumerate(sent):
+            features = dict(word=word, suffix=word[-2:],
+                            prev=i and sent[i-1][0] or '<s>')
+            featuresets.append((features, tag))
+    return featuresets
+
+def _naivebayes_train(scale):
+    from nltk.classify import NaiveBayesClassifier
+    featuresets = _featuresets(scale)
+    return (lambda: NaiveBayesClassifier.train(featuresets)), len(featuresets)
+
+def _maxent_train(scale):
+    import numpy
+    from nltk.classify import MaxentClassifier
+    featuresets = _featuresets(scale)[:1000]
+    return (lambda: MaxentClassifier.train(featuresets, 'GIS', trace=0,
+                                           max_iter=5)), len(featuresets)
+
+BENCHMARKS = [
+    ('punkt.tokenize', _punkt_tokenize),
+    ('treebank.tokenize', _treebank_tokenize),
+    ('treebank.span_tokenize', _treebank_span_tokenize),
+    ('unigram.tag', _unigram_tag),
+    ('hmm.tag', _hmm_tag),
+    ('chart.parse', _chart_parse),
+    ('naivebayes.train', _naivebayes_train),
+    ('maxent.train', _maxent_train),
+    ]
+"""The benchmarks, as a list of ``(name, workload)`` pairs."""
+
+COLUMNS = [('time', 'time (ms)', '%.1f'),
+           ('tokens_per_sec', 'tokens/sec', '%.0f'),
+           ('memory', 'memory (KB)', '%d'),
+           ('peak_rss', 'peak RSS (KB)', '%d'),
+           ('skipped', 'skipped', '%s')]
+
+######################################################################
+#{ Running Benchmarks
+######################################################################
+
+def measure(name, repeat=3, scale=1):
+    """
+    Run a benchmark in this interpreter.
+
+    :return: A dictionary of measurements; or a dictionary whose
+        ``skipped`` value says which dependency is missing.
+    :param repeat: The number of times to time the workload.
+    :param scale: A multiplier for the size of the workload.
+    """
+    workloads = dict(BENCHMARKS)
+    if name not in workloads:
+        raise ValueError('Unknown benchmark %r' % name)
+    try:
+        run, num_tokens = workloads[name](scale)
+    except ImportError, e:
+        return dict(skipped=str(e))
+
+    # Measure memory use first (before the timed runs have left memory
+    # for the workload's objects free for reuse), in a separate run,
+    # since sampling it slows the workload down.
+    result = {}
+    gc.collect()
+    sampler = _RSSSampler()
+    if sampler.start():
+        run()
+        result['memory'] = sampler.stop()
+
+    times = []
+    for i in range(repeat):
+        gc.collect()
+        start = time.time()
+        run()
+        times.append(time.time() - start)
+    elapsed = min(times)
+    result['time'] = elapsed * 1000
+    result['tokens_per_sec'] = num_tokens / max(elapsed, 1e-9)
+    result['peak_rss'] = peak_rss()
+    return result
+
+class _RSSSampler(threading.Thread):
+    """
+    A thread that samples the resident set size of this process, to
+    find the largest increase in it while a workload runs.
+    """
+    INTERVAL = 0.001
+
+    def __init__(self):
+        threading.Thread.__init__(self)
+        self.setDaemon(True)
+        self._done = threading.Event()
+        self._base = self._max = None
+
+    def start(self):
+        """
+        Start sampling.  :return: False if the resident set size can't
+            be determined on this platform.
+        """
+        if current_rss() is None:
+            return False
+        threading.Thread.start(self)
+        # Don't count the memory used by starting the thread.
+        self._base = self._max = current_rss()
+        return True
+
+    def run(self):
+        while not self._done.isSet():
+            self._max = max(self._max, current_rss())
+            time.sleep(self.INTERVAL)
+
+    def stop(self):
+        """
+        Stop sampling.  :return: The largest increase in the resident
+            set size, in kilobytes.
+        """
+        self._max = max(self._max, current_rss())
+        self._done.set()
+        self.join()
+        return self._max - self._base
+
+# The script run by each interpreter.
+_SCRIPT = """
+try: import json
+except ImportError: import simplejson as json
+from nltk.bench.throughput import measure
+print json.dumps(measure(%r, %d, %d))
+"""
+
+def run_benchmark(name, repeat=3, scale=1):
+    """
+    Run a benchmark in a fresh interpreter.  See ``measure()``.
+    """
+    nltk_dir = os.path.dirname(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))))
+    python_path = [nltk_dir] + [d for d in os.environ.get('PYTHONPATH', '')
+                                .split(os.pathsep) if d]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(python_path))
+    process = subprocess.Popen([sys.executable, '-c',
+                                _SCRIPT % (name, repeat, scale)],
+                               stdout=subprocess.PIPE, env=env)
+    out = process.communicate()[0]
+    if process.returncode != 0:
+        raise RuntimeError('Benchmark %r failed' % name)
+    return dict((str(measurement), value) for (measurement, value)
+                in json.loads(out.splitlines()[-1]).items())
+
+def run_benchmarks(names=None, repeat=3, scale=1):
+    """
+    Run the given benchmarks (or all of them), each in a fresh
+    interpreter.
+
+    :return: A dictionary mapping benchmark names to their results.
+    """
+    if names is None:
+        names = [name for (name, workload) in BENCHMARKS]
+    return dict((name, run_benchmark(name, repeat, scale))
+                for name in names)
+
+def main():
+    parser = OptionParser(usage='%prog [options] [benchmark...]')
+    parser.add_option('--repeat', type='int', default=3,
+                      help='number of times to run each workload')
+    parser.add_option('--scale', type='int', default=1,
+                      help='multiplier for the size of each workload')
+    parser.add_option('--save', metavar='FILE',
+                      help='save the results to FILE')
+    parser.add_option('--baseline', metavar='FILE',
+                      help='compare the results with those saved in FILE')
+    parser.add_option('--tolerance', type='float', default=0.25,
+                      help='relative change that counts as a regression')
+    options, names = parser.parse_args()
+
+    results = run_benchmarks(names or None, options.repeat, options.scale)
+    if not report(results, COLUMNS, options.save, options.baseline,
+                  options.tolerance, higher_is_better=['tokens_per_sec']):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
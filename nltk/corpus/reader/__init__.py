@@ -87,6 +87,7 @@ from nltk.corpus.reader.knbc import *
 from nltk.corpus.reader.chasen import *
 from nltk.corpus.reader.childes import *
 from nltk.corpus.reader.aligned import *
+from nltk.corpus.reader.columnar import *
 
 # Make sure that nltk.corpus.reader.bracket_parse gives the module, not
 # the function bracket_parse() defined in nltk.tree:
@@ -118,5 +119,5 @@ __all__ = [
     'IPIPANCorpusReader', 'Pl196xCorpusReader',
     'TEICorpusView', 'KNBCorpusReader', 'ChasenCorpusReader',
     'CHILDESCorpusReader', 'AlignedCorpusReader',
-    'TimitTaggedCorpusReader'
+    'TimitTaggedCorpusReader', 'CachedCorpusReader'
 ]
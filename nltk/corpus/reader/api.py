@@ -36,7 +36,18 @@ class CorpusReader(object):
     corpus.  For most corpora, these methods define one or more
     selection arguments, such as ``fileids`` or ``categories``, which can
     be used to select which portion of the corpus should be returned.
+
+    If ``manifest_dir`` is set (on this class, or on a subclass), then
+    the file identifiers of corpora whose ``fileids`` are given as a
+    regular expression are kept in a ``CorpusManifest`` in that
+    directory, which is shared between processes; so constructing a
+    reader for a corpus with many files does not need to walk its
+    directory tree.
     """
+    manifest_dir = None
+    """The directory where ``CorpusManifest`` files are saved, or
+    None to find file identifiers by walking the corpus directory."""
+
     def __init__(self, root, fileids, encoding=None, tag_mapping_function=None):
         """
         :type root: PathPointer or str
@@ -80,8 +91,15 @@ class CorpusReader(object):
             raise TypeError('CorpusReader: expected a string or a PathPointer')
 
         # If `fileids` is a regexp, then expand it.
+        self._manifest = None
         if isinstance(fileids, basestring):
-            fileids = find_corpus_fileids(root, fileids)
+            if (self.manifest_dir is not None and
+                isinstance(root, FileSystemPathPointer)):
+                self._manifest = CorpusManifest(self.manifest_dir,
+                                                root, fileids)
+                fileids = self._manifest.fileids()
+            else:
+                fileids = find_corpus_fileids(root, fileids)
 
         self._fileids = fileids
         """A list of the relative paths for the fileids that make up
@@ -284,25 +302,43 @@ class CategorizedCorpusReader(object):
         self._f2c = defaultdict(set)
         self._c2f = defaultdict(set)
 
-        if self._pattern is not None:
-            for file_id in self._fileids:
-                category = re.match(self._pattern, file_id).group(1)
-                self._add(file_id, category)
-
+        # If the corpus has a manifest, then use (and update) the
+        # categories that are saved in it.
+        manifest = getattr(self, '_manifest', None)
+        if manifest is not None and self._pattern is not None:
+            f2c = manifest.categories(('cat_pattern', self._pattern),
+                                      None, self._pattern_categories)
+        elif manifest is not None and self._file is not None:
+            stat = os.stat(self.abspath(self._file).path)
+            f2c = manifest.categories(
+                ('cat_file', self._file, self._delimiter),
+                (stat.st_size, stat.st_mtime), self._file_categories)
+        elif self._pattern is not None:
+            f2c = self._pattern_categories(self._fileids)
         elif self._map is not None:
-            for (file_id, categories) in self._map.items():
-                for category in categories:
-                    self._add(file_id, category)
-
+            f2c = self._map
         elif self._file is not None:
-            for line in self.open(self._file).readlines():
-                line = line.strip()
-                file_id, categories = line.split(self._delimiter, 1)
-                if file_id not in self.fileids():
-                    raise ValueError('In category mapping file %s: %s '
-                                     'not found' % (self._file, file_id))
-                for category in categories.split(self._delimiter):
-                    self._add(file_id, category)
+            f2c = self._file_categories(self._fileids)
+
+        for (file_id, categories) in f2c.items():
+            for category in categories:
+                self._add(file_id, category)
+
+    def _pattern_categories(self, fileids):
+        return dict((file_id, [re.match(self._pattern, file_id).group(1)])
+                    for file_id in fileids)
+
+    def _file_categories(self, fileids):
+        fileids = set(fileids)
+        f2c = defaultdict(list)
+        for line in self.open(self._file).readlines():
+            line = line.strip()
+            file_id, categories = line.split(self._delimiter, 1)
+            if file_id not in fileids:
+                raise ValueError('In category mapping file %s: %s '
+                                 'not found' % (self._file, file_id))
+            f2c[file_id] += categories.split(self._delimiter)
+        return dict(f2c)
 
     def _add(self, file_id, category):
         self._f2c[file_id].add(category)
@@ -123,24 +123,29 @@ class BNCCorpusReader(XMLCorpusReader):
         """
         result = []
 
-        xmldoc = ElementTree.parse(fileid).getroot()
-        for xmlsent in xmldoc.findall('.//s'):
-            sent = []
-            for xmlword in _all_xmlwords_in(xmlsent):
-                word = xmlword.text
-                if not word:
-                    word = "" # fixes issue 337?
-                if strip_space or stem: word = word.strip()
-                if stem: word = xmlword.get('hw', word)
-                if tag == 'c5':
-                    word = (word, xmlword.get('c5'))
-                elif tag == 'pos':
-                    word = (word, xmlword.get('pos', xmlword.get('c5')))
-                sent.append(word)
-            if bracket_sent:
-                result.append(BNCSentence(xmlsent.attrib['n'], sent))
-            else:
-                result.extend(sent)
+        # Parse the file incrementally, so that only one sentence is
+        # held in memory at a time.
+        stream = fileid.open()
+        try:
+            for xmlsent, context in iterparse_elements(stream, '.*/s'):
+                sent = []
+                for xmlword in _all_xmlwords_in(xmlsent):
+                    word = xmlword.text
+                    if not word:
+                        word = "" # fixes issue 337?
+                    if strip_space or stem: word = word.strip()
+                    if stem: word = xmlword.get('hw', word)
+                    if tag == 'c5':
+                        word = (word, xmlword.get('c5'))
+                    elif tag == 'pos':
+                        word = (word, xmlword.get('pos', xmlword.get('c5')))
+                    sent.append(word)
+                if bracket_sent:
+                    result.append(BNCSentence(xmlsent.attrib['n'], sent))
+                else:
+                    result.extend(sent)
+        finally:
+            stream.close()
 
         assert None not in result
         return result
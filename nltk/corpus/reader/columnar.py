@@ -0,0 +1,461 @@
+# Natural Language Toolkit: Columnar Corpus Cache
+#
+# Copyright (C) 2001-2012 NLTK Project
+# URL: <http://www.nltk.org/>
+# For license information, see LICENSE.TXT
+
+"""
+A persistent, binary cache for the contents of corpora.
+
+Parsing a corpus file (e.g., reading bracketed trees, CoNLL columns or
+tagged text) can take much longer than the rest of a program's
+startup.  ``CachedCorpusReader`` wraps a corpus reader, and serves the
+reader's ``words()``, ``sents()``, ``tagged_words()``,
+``tagged_sents()`` and ``parsed_sents()`` from cache files, which are
+written the first time each file's contents are requested.
+
+Each cache file holds the contents of a single corpus file, stored as
+columns of integers, together with a table of the distinct strings
+that those integers refer to:
+
+  - Words and tags are stored as string table indices, in the
+    ``ids`` and ``tags`` columns.
+  - Sentence boundaries are stored as offsets into those columns, in
+    the ``bounds`` column.
+  - Trees are stored in preorder: for each node, the ``labels`` column
+    holds its label (or leaf), and the ``arity`` column holds its
+    number of children (or -1, for a leaf).  The ``bounds`` column
+    holds the offset of each tree.
+
+Columns are read with ``array.fromfile()``, and values are only
+constructed as they are accessed, so serving a corpus from its cache
+involves almost no parsing.  Cache files record the format version,
+and the size and modification time of the corpus file; they are
+rebuilt if either has changed.
+"""
+
+import os
+import sys
+import struct
+import tempfile
+from array import array
+try: from hashlib import sha1
+except ImportError: from sha import new as sha1
+try: import cPickle as pickle
+except ImportError: import pickle
+
+from nltk.tree import Tree
+from nltk.util import LazyMap
+from nltk.data import FileSystemPathPointer, ZipFilePathPointer
+
+from util import concat, _stable_repr
+
+FORMAT_VERSION = 1
+"""The version of the cache file format.  Cache files written with a
+   different version are ignored (and rebuilt)."""
+
+KINDS = ('words', 'sents', 'tagged_words', 'tagged_sents', 'parsed_sents')
+"""The kinds of corpus contents that can be cached."""
+
+_MAGIC = 'NLTKCOLS'
+
+######################################################################
+#{ Writing
+######################################################################
+
+class _StringTable(object):
+    """
+    A table of distinct strings, which assigns each string an integer
+    id.  Byte strings and unicode strings are kept distinct.
+    """
+    def __init__(self):
+        self.strings = []
+        self._ids = {}
+
+    def intern(self, s):
+        key = (isinstance(s, unicode), s)
+        id = self._ids.get(key)
+        if id is None:
+            if not isinstance(s, basestring):
+                raise ValueError('Only strings can be cached, not %r' % (s,))
+            id = self._ids[key] = len(self.strings)
+            self.strings.append(s)
+        return id
+
+    def columns(self):
+        """
+        :return: The string table as three columns: ``strings``, the
+            utf-8 encoded strings, concatenated; ``string_offsets``,
+            the offset of each string in ``strings``; and
+            ``string_unicode``, which is 1 for unicode strings.
+        """
+        pieces = []
+        offsets = array('i', [0])
+        is_unicode = array('b')
+        pos = 0
+        for s in self.strings:
+            if isinstance(s, unicode):
+                s = s.encode('utf-8')
+                is_unicode.append(1)
+            else:
+                is_unicode.append(0)
+            pieces.append(s)
+            pos += len(s)
+            offsets.append(pos)
+        return dict(strings=''.join(pieces), string_offsets=offsets,
+                    string_unicode=is_unicode)
+
+def _encode(kind, items):
+    """
+    :return: A dictionary mapping column names to the columns that
+        encode ``items``, which are the corpus contents of the given
+        kind.
+    :raise ValueError: If ``items`` can not be encoded.
+    """
+    table = _StringTable()
+    intern = table.intern
+    columns = {}
+    if kind == 'words':
+        columns['ids'] = array('i', [intern(w) for w in items])
+    elif kind == 'tagged_words':
+        columns['ids'] = ids = array('i')
+        columns['tags'] = tags = array('i')
+        for (word, tag) in items:
+            ids.append(intern(word))
+            tags.append(intern(tag))
+    elif kind == 'sents':
+        columns['ids'] = ids = array('i')
+        columns['bounds'] = bounds = array('i', [0])
+        for sent in items:
+            ids.extend([intern(w) for w in sent])
+            bounds.append(len(ids))
+    elif kind == 'tagged_sents':
+        columns['ids'] = ids = array('i')
+        columns['tags'] = tags = array('i')
+        columns['bounds'] = bounds = array('i', [0])
+        for sent in items:
+            for (word, tag) in sent:
+                ids.append(intern(word))
+                tags.append(intern(tag))
+            bounds.append(len(ids))
+    elif kind == 'parsed_sents':
+        columns['labels'] = labels = array('i')
+        columns['arity'] = arity = array('i')
+        columns['bounds'] = bounds = array('i', [0])
+        for tree in items:
+            stack = [tree]
+            while stack:
+                node = stack.pop()
+                if isinstance(node, Tree):
+                    if type(node) is not Tree:
+                        raise ValueError('Only Trees can be cached, not %s'
+                                         % type(node).__name__)
+                    labels.append(intern(node.node))
+                    arity.append(len(node))
+                    stack.extend(reversed(node))
+                else:
+                    labels.append(intern(node))
+                    arity.append(-1)
+            bounds.append(len(labels))
+    else:
+        raise ValueError('Unknown kind %r; expected one of %s' %
+                         (kind, ', '.join(KINDS)))
+    columns.update(table.columns())
+    return columns
+
+def write_columns(path, kind, items, source=None):
+    """
+    Write ``items``, the corpus contents of the given kind, to a cache
+    file.  The file is written atomically.
+
+    :param path: The path of the cache file.
+    :param kind: One of ``KINDS``.
+    :param items: The corpus contents (e.g., a list of tagged
+        sentences, for the ``'tagged_sents'`` kind).
+    :param source: A value identifying the version of the corpus file
+        that ``items`` were read from.  ``read_columns()`` can check it.
+    :raise ValueError: If ``items`` can not be encoded (e.g., because
+        they contain values other than strings).
+    """
+    columns = _encode(kind, items)
+    names = sorted(columns)
+    header = dict(kind=kind, source=source, byteorder=sys.byteorder,
+                  columns=[(name,) + _column_type(columns[name]) +
+                           (len(columns[name]),) for name in names])
+    header = pickle.dumps(header, 2)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    outfile = os.fdopen(fd, 'wb')
+    try:
+        try:
+            outfile.write(_MAGIC)
+            outfile.write(struct.pack('<II', FORMAT_VERSION, len(header)))
+            outfile.write(header)
+            for name in names:
+                column = columns[name]
+                if isinstance(column, str):
+                    outfile.write(column)
+                else:
+                    column.tofile(outfile)
+        finally:
+            outfile.close()
+        if os.path.exists(path) and sys.platform == 'win32':
+            os.remove(path)
+        os.rename(tmp_path, path)
+    except:
+        os.remove(tmp_path)
+        raise
+
+def _column_type(column):
+    """
+    :return: The typecode and item size of a column.
+    """
+    if isinstance(column, str):
+        return ('c', 1)
+    return (column.typecode, column.itemsize)
+
+######################################################################
+#{ Reading
+######################################################################
+
+def read_columns(path, source=None):
+    """
+    Read a cache file written by ``write_columns()``.
+
+    :return: A lazy sequence of the cached corpus contents.
+    :param source: If specified, then the file is only read if it was
+        written with the same ``source`` value.
+    :raise ValueError: If the file is not a cache file, was written
+        with a different format version, or is out of date.
+    """
+    infile = open(path, 'rb')
+    try:
+        if infile.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError('%s is not a corpus cache file' % path)
+        version, header_len = struct.unpack('<II', infile.read(8))
+        if version != FORMAT_VERSION:
+            raise ValueError('%s has format version %d (expected %d)' %
+                             (path, version, FORMAT_VERSION))
+        header = pickle.loads(infile.read(header_len))
+        if source is not None and header['source'] != source:
+            raise ValueError('%s is out of date' % path)
+
+        columns = {}
+        for (name, typecode, itemsize, size) in header['columns']:
+            if typecode == 'c':
+                column = infile.read(size)
+            else:
+                column = array(typecode)
+                if column.itemsize != itemsize:
+                    raise ValueError('%s was written on an incompatible '
+                                     'platform' % path)
+                column.fromfile(infile, size)
+                if header['byteorder'] != sys.byteorder:
+                    column.byteswap()
+            columns[name] = column
+    finally:
+        infile.close()
+    return _view(header['kind'], columns)
+
+def _strings(columns):
+    """
+    :return: The list of strings in a cache file's string table.
+    """
+    blob = columns['strings']
+    offsets = columns['string_offsets']
+    strings = [blob[offsets[i]:offsets[i+1]]
+               for i in xrange(len(offsets)-1)]
+    for i, is_unicode in enumerate(columns['string_unicode']):
+        if is_unicode:
+            strings[i] = strings[i].decode('utf-8')
+    return strings
+
+def _view(kind, columns):
+    """
+    :return: A lazy sequence of the corpus contents encoded by the
+        given columns.
+    """
+    strings = _strings(columns)
+    if kind == 'words':
+        return LazyMap(strings.__getitem__, columns['ids'])
+    elif kind == 'tagged_words':
+        return LazyMap(lambda w, t: (strings[w], strings[t]),
+                       columns['ids'], columns['tags'])
+
+    bounds = columns['bounds']
+    starts, ends = bounds[:-1], bounds[1:]
+    if kind == 'sents':
+        ids = columns['ids']
+        return LazyMap(lambda s, e: [strings[w] for w in ids[s:e]],
+                       starts, ends)
+    elif kind == 'tagged_sents':
+        ids, tags = columns['ids'], columns['tags']
+        return LazyMap(lambda s, e: [(strings[w], strings[t]) for (w, t)
+                                     in zip(ids[s:e], tags[s:e])],
+                       starts, ends)
+    elif kind == 'parsed_sents':
+        labels, arity = columns['labels'], columns['arity']
+        return LazyMap(lambda s, e: _decode_tree(strings, labels, arity, s),
+                       starts, ends)
+    raise ValueError('Unknown kind %r' % kind)
+
+def _decode_tree(strings, labels, arity, pos):
+    """
+    :return: The tree whose preorder encoding starts at ``pos``.
+    """
+    # Each stack entry holds a node whose children are being decoded.
+    stack = []
+    while True:
+        num_children = arity[pos]
+        value = strings[labels[pos]]
+        pos += 1
+        if num_children > 0:
+            stack.append((value, num_children, []))
+            continue
+        if num_children < 0:
+            node = value
+        else:
+            node = Tree(value, [])
+        # Add the node to its parent; and complete any parents that
+        # now have all of their children.
+        while stack:
+            label, num_children, children = stack[-1]
+            children.append(node)
+            if len(children) < num_children:
+                break
+            stack.pop()
+            node = Tree(label, children)
+        else:
+            return node
+
+######################################################################
+#{ Cached Corpus Reader
+######################################################################
+
+class CachedCorpusReader(object):
+    """
+    A wrapper around a corpus reader, which serves the reader's
+    ``words()``, ``sents()``, ``tagged_words()``, ``tagged_sents()``
+    and ``parsed_sents()`` from a binary cache.  For each corpus file,
+    the cache is written the first time its contents are requested;
+    after that, they are read from the cache (in this or any later
+    process) until the corpus file changes.  All other attributes
+    are those of the wrapped reader.
+
+        >>> from nltk.corpus import treebank
+        >>> cached = CachedCorpusReader(treebank, '/tmp/treebank-cache')
+        >>> cached.parsed_sents('wsj_0001.mrg')[0] # doctest: +SKIP
+        Tree('S', [Tree('NP-SBJ', ...), ...])
+
+    Keyword arguments (such as ``simplify_tags``) are passed on to the
+    wrapped reader, and are part of the cache key, as is the wrapped
+    reader's configuration (such as its separator, tokenizers and
+    encoding).
+    """
+    _READER_STATE_ATTRIBUTES = frozenset(['_root', '_fileids', '_manifest',
+                                          '_f2c', '_c2f'])
+    """The attributes of a corpus reader that hold its state, rather
+       than its configuration; they are not part of the cache key."""
+
+    def __init__(self, reader, cache_dir):
+        """
+        :param reader: The corpus reader to wrap.
+        :param cache_dir: The directory where cache files are stored.
+            It is created if necessary.
+        """
+        self._reader = reader
+        self._cache_dir = cache_dir
+
+    def words(self, fileids=None, **kwargs):
+        return self._cached('words', fileids, kwargs)
+
+    def sents(self, fileids=None, **kwargs):
+        return self._cached('sents', fileids, kwargs)
+
+    def tagged_words(self, fileids=None, **kwargs):
+        return self._cached('tagged_words', fileids, kwargs)
+
+    def tagged_sents(self, fileids=None, **kwargs):
+        return self._cached('tagged_sents', fileids, kwargs)
+
+    def parsed_sents(self, fileids=None, **kwargs):
+        return self._cached('parsed_sents', fileids, kwargs)
+
+    def __getattr__(self, attr):
+        return getattr(self._reader, attr)
+
+    def __repr__(self):
+        return '<CachedCorpusReader for %r>' % self._reader
+
+    def cache_file(self, kind, fileid, **kwargs):
+        """
+        :return: The path of the cache file for the contents of the
+            given kind in the corpus file ``fileid``; or None if the
+            wrapped reader's configuration can't be identified across
+            processes (e.g., if it uses a lambda function), in which
+            case its contents are not cached.
+        """
+        # Accessing the root loads a LazyCorpusLoader, which replaces
+        # its class and vars with those of the reader it loads.
+        root = str(self._reader.root)
+        config = dict((name, value)
+                      for (name, value) in vars(self._reader).items()
+                      if name not in self._READER_STATE_ATTRIBUTES)
+        config = _stable_repr(config)
+        if config is None:
+            return None
+        key = repr((_stable_repr(type(self._reader)), config, root,
+                    fileid, kind, sorted(kwargs.items())))
+        return os.path.join(self._cache_dir, sha1(key).hexdigest() + '.col')
+
+    def _cached(self, kind, fileids, kwargs):
+        if fileids is None:
+            fileids = self._reader.fileids()
+        elif isinstance(fileids, basestring):
+            fileids = [fileids]
+        return concat([self._load(kind, fileid, kwargs)
+                       for fileid in fileids])
+
+    def _load(self, kind, fileid, kwargs):
+        """
+        :return: The contents of the given kind in ``fileid``, from its
+            cache file if it is up to date; otherwise, from the wrapped
+            reader (writing a new cache file if possible).
+        """
+        path = self.cache_file(kind, fileid, **kwargs)
+        if path is None:
+            return getattr(self._reader, kind)(fileid, **kwargs)
+        source = self._source(fileid)
+        try:
+            return read_columns(path, source)
+        except (EnvironmentError, ValueError, EOFError,
+                struct.error, pickle.UnpicklingError):
+            pass
+
+        items = getattr(self._reader, kind)(fileid, **kwargs)
+        try:
+            if not os.path.isdir(self._cache_dir):
+                os.makedirs(self._cache_dir)
+            write_columns(path, kind, items, source)
+            return read_columns(path, source)
+        except (EnvironmentError, ValueError):
+            # Contents that can't be cached (or written) are served
+            # directly by the reader.
+            return items
+
+    def _source(self, fileid):
+        """
+        :return: A value that changes whenever the corpus file
+            ``fileid`` does: its path, size and modification time.
+        """
+        pointer = self._reader.abspath(fileid)
+        if isinstance(pointer, FileSystemPathPointer):
+            name = path = pointer.path
+        elif isinstance(pointer, ZipFilePathPointer):
+            path = pointer.zipfile.filename
+            name = '%s/%s' % (path, pointer.entry)
+        else:
+            name = path = str(pointer)
+        stat = os.stat(path)
+        return (name, stat.st_size, stat.st_mtime)
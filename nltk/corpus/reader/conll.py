@@ -179,7 +179,7 @@ class ConllCorpusReader(CorpusReader):
         # fileids), which would let us reuse the same corpus view for
         # different things (eg srl and parse trees).
         return concat([StreamBackedCorpusView(fileid, self._read_grid_block,
-                                              encoding=enc)
+                                              encoding=enc, use_mmap=True)
                        for (fileid, enc) in self.abspaths(fileids, True)])
 
     def _read_grid_block(self, stream):
@@ -81,12 +81,14 @@ class PlaintextCorpusReader(CorpusReader):
         # Once we require Python 2.5, use source=(fileid if sourced else None)
         if sourced:
             return concat([self.CorpusView(path, self._read_word_block,
-                                           encoding=enc, source=fileid)
+                                           encoding=enc, source=fileid,
+                                           **self._view_options())
                            for (path, enc, fileid)
                            in self.abspaths(fileids, True, True)])
         else:
             return concat([self.CorpusView(path, self._read_word_block,
-                                           encoding=enc)
+                                           encoding=enc,
+                                           **self._view_options())
                            for (path, enc, fileid)
                            in self.abspaths(fileids, True, True)])
 
@@ -102,12 +104,14 @@ class PlaintextCorpusReader(CorpusReader):
             raise ValueError('No sentence tokenizer for this corpus')
         if sourced:
             return concat([self.CorpusView(path, self._read_sent_block,
-                                           encoding=enc, source=fileid)
+                                           encoding=enc, source=fileid,
+                                           **self._view_options())
                            for (path, enc, fileid)
                            in self.abspaths(fileids, True, True)])
         else:
             return concat([self.CorpusView(path, self._read_sent_block,
-                                           encoding=enc)
+                                           encoding=enc,
+                                           **self._view_options())
                            for (path, enc, fileid)
                            in self.abspaths(fileids, True, True)])
 
@@ -123,15 +127,29 @@ class PlaintextCorpusReader(CorpusReader):
             raise ValueError('No sentence tokenizer for this corpus')
         if sourced:
             return concat([self.CorpusView(path, self._read_para_block,
-                                           encoding=enc, source=fileid)
+                                           encoding=enc, source=fileid,
+                                           **self._view_options())
                            for (path, enc, fileid)
                            in self.abspaths(fileids, True, True)])
         else:
             return concat([self.CorpusView(path, self._read_para_block,
-                                           encoding=enc)
+                                           encoding=enc,
+                                           **self._view_options())
                            for (path, enc, fileid)
                            in self.abspaths(fileids, True, True)])
 
+    def _view_options(self):
+        """
+        :return: The keyword arguments for ``CorpusView``, which read
+            files through a memory map if it is a
+            ``StreamBackedCorpusView`` (other corpus view classes may
+            not take a ``use_mmap`` argument).
+        """
+        if (isinstance(self.CorpusView, type) and
+            issubclass(self.CorpusView, StreamBackedCorpusView)):
+            return {'use_mmap': True}
+        return {}
+
     def _read_word_block(self, stream):
         words = []
         for i in range(20): # Read 20 lines at a time.
@@ -241,7 +259,8 @@ class EuroparlCorpusReader(PlaintextCorpusReader):
         :rtype: list(list(list(str)))
         """
         return concat([self.CorpusView(fileid, self._read_para_block,
-                                       encoding=enc)
+                                       encoding=enc,
+                                       **self._view_options())
                        for (fileid, enc) in self.abspaths(fileids, True)])
 
     def paras(self, fileids=None):
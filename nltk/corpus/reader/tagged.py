@@ -221,6 +221,8 @@ class TaggedCorpusView(StreamBackedCorpusView):
     ``TaggedCorpusView`` objects are typically created by
     ``TaggedCorpusReader`` (not directly by nltk users).
     """
+    use_mmap = True
+
     def __init__(self, corpus_file, encoding, tagged, group_by_sent,
                  group_by_para, sep, word_tokenizer, sent_tokenizer,
                  para_block_reader, tag_mapping_function=None):
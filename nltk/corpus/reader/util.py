@@ -8,12 +8,20 @@
 
 import os
 import sys
+import copy
 import bisect
 import re
 import tempfile
+import time
+import types
+import threading
+import Queue
+from collections import deque
+try: from hashlib import sha1
+except ImportError: from sha import new as sha1
 try: import cPickle as pickle
 except ImportError: import pickle
-from itertools import islice
+from itertools import islice, izip
 
 # Use the c version of ElementTree, which is faster, if possible:
 try: from xml.etree import cElementTree as ElementTree
@@ -22,9 +30,11 @@ except ImportError: from xml.etree import ElementTree
 from nltk.tokenize import wordpunct_tokenize
 from nltk.internals import slice_bounds
 from nltk.data import PathPointer, FileSystemPathPointer, ZipFilePathPointer
-from nltk.data import SeekableUnicodeStreamReader
+from nltk.data import GzipFileSystemPathPointer
+from nltk.data import SeekableUnicodeStreamReader, MmapStreamReader
 from nltk.sourcedstring import SourcedStringStream
 from nltk.util import AbstractLazySequence, LazySubsequence, LazyConcatenation
+from nltk.util import LRUCache
 
 ######################################################################
 #{ Corpus View
@@ -77,8 +87,11 @@ class StreamBackedCorpusView(AbstractLazySequence):
     map has one entry per block.)
 
     In order to increase efficiency for random access patterns that
-    have high degrees of locality, the corpus view may cache one or
-    more blocks.
+    have high degrees of locality, the corpus view caches the most
+    recently read block.  If ``block_cache_size`` is set (or a cache
+    is given to ``set_block_cache()``), then it also keeps a
+    ``BlockCache`` of recently read blocks, which may be shared with
+    other corpus views.
 
     :note: Each ``CorpusView`` object internally maintains an open file
         object for its underlying corpus file.  This file should be
@@ -117,13 +130,53 @@ class StreamBackedCorpusView(AbstractLazySequence):
         file.  This is calculated when the corpus view is initialized,
         and is used to decide when the end of file has been reached.
     :ivar _cache: A cache of the most recently read block.  It
-       is encoded as a tuple (start_toknum, end_toknum, tokens), where
-       start_toknum is the token index of the first token in the block;
-       end_toknum is the token index of the first token not in the
-       block; and tokens is a list of the tokens in the block.
+       is encoded as a tuple (start_toknum, end_toknum, tokens,
+       num_bytes), where start_toknum is the token index of the first
+       token in the block; end_toknum is the token index of the first
+       token not in the block; tokens is a list of the tokens in the
+       block; and num_bytes is the number of bytes it was read from.
+    :ivar _block_cache: A ``BlockCache`` of recently read blocks, or
+       None.
     """
+    block_cache_size = None
+    """If not None, then each new corpus view is given its own
+       ``BlockCache``, holding at most this many tokens (or bytes,
+       depending on ``block_cache_unit``) of recently read blocks."""
+
+    block_cache_unit = 'tokens'
+    """The unit of ``block_cache_size``: ``'tokens'`` or ``'bytes'``."""
+
+    use_mmap = False
+    """If true, then local uncompressed files whose encoding is
+       supported by ``MmapStreamReader`` are read through a memory map,
+       rather than a ``SeekableUnicodeStreamReader``.  This avoids
+       repeatedly copying and re-decoding text, but requires that the
+       block reader use only ``seek()`` offsets returned by ``tell()``.
+       Can be overridden for individual views by the constructor."""
+
+    prefetch = 0
+    """The number of blocks that ``iterate_from()`` reads ahead, in a
+       background thread, while the caller is still processing the
+       tokens it has already been given; or 0 to read each block only
+       when it is needed.  Prefetching lets reading and decompressing
+       the file overlap with the caller's own work.  The prefetching
+       thread uses its own stream, but calls ``read_block()`` on this
+       view, so block readers must not rely on ``self._stream``.  Can
+       be overridden for individual views by the constructor."""
+
+    index_dir = None
+    """If not None, then the name of a directory where corpus views
+       save their toknum/filepos mapping once they have read their
+       file from start to finish.  Views that are later constructed
+       for the same file, block reader, encoding and start position
+       load the saved mapping, so their length and any of their
+       blocks are available without first scanning the file.  A
+       saved mapping is ignored if the file's size or modification
+       time has changed since it was written."""
+
     def __init__(self, fileid, block_reader=None, startpos=0,
-                 encoding=None, source=None):
+                 encoding=None, source=None, use_mmap=None,
+                 prefetch=None):
         """
         Create a new corpus view, based on the file ``fileid``, and
         read with ``block_reader``.  See the class documentation
@@ -146,6 +199,14 @@ class StreamBackedCorpusView(AbstractLazySequence):
             to annotate all strings read from the file with
             information about their start offset, end ofset,
             and docid.  The value of ``source`` will be used as the docid.
+
+        :param use_mmap: Whether to read the file through a memory
+            map, if possible (see ``StreamBackedCorpusView.use_mmap``).
+            If not specified, then the class default is used.
+
+        :param prefetch: The number of blocks to read ahead in a
+            background thread (see ``StreamBackedCorpusView.prefetch``).
+            If not specified, then the class default is used.
         """
         if block_reader:
             self.read_block = block_reader
@@ -154,6 +215,10 @@ class StreamBackedCorpusView(AbstractLazySequence):
         self._filepos = [startpos]
         self._encoding = encoding
         self._source = source
+        if use_mmap is not None:
+            self.use_mmap = use_mmap
+        if prefetch is not None:
+            self.prefetch = prefetch
         # We don't know our length (number of tokens) yet.
         self._len = None
 
@@ -188,11 +253,59 @@ class StreamBackedCorpusView(AbstractLazySequence):
         # increase efficiency of random access.
         self._cache = (-1, -1, None)
 
+        # Optionally, maintain a cache of other recently read blocks.
+        # Since block caches can be shared, their keys include a
+        # token that is unique to this view.
+        self._block_cache = None
+        self._block_cache_id = object()
+        if self.block_cache_size is not None:
+            self._block_cache = BlockCache(self.block_cache_size,
+                                           self.block_cache_unit)
+
+        # Use the toknum/filepos mapping from an earlier scan of the
+        # file, if one was saved.
+        if self.index_dir is not None:
+            self._load_block_index()
+
     fileid = property(lambda self: self._fileid, doc="""
         The fileid of the file that is accessed by this view.
 
         :type: str or PathPointer""")
 
+    block_cache = property(lambda self: self._block_cache, doc="""
+        The cache of recently read blocks used by this view, or None.
+
+        :type: BlockCache""")
+
+    def set_block_cache(self, cache):
+        """
+        Use ``cache`` to hold this view's recently read blocks.  The
+        same cache may be used by any number of corpus views.
+
+        :param cache: The cache to use, or None to cache only the most
+            recently read block.
+        :type cache: BlockCache
+        """
+        self._block_cache = cache
+
+    def cache_info(self):
+        """
+        Return a dictionary describing this view's block cache: the
+        number of lookups that found (``hits``) or did not find
+        (``misses``) a block in the cache; and the current (``size``)
+        and maximum (``maxsize``) size of the cached blocks, in
+        ``unit`` (tokens or bytes).  If the cache is shared, then these
+        describe its use by all of the views that share it.
+
+        :rtype: dict
+        """
+        cache = self._block_cache
+        if cache is None:
+            return None
+        return dict(hits=cache.hits, misses=cache.misses,
+                    maxsize=cache.maxsize, size=cache.currsize,
+                    unit=cache.unit)
+
     def read_block(self, stream):
         """
         Read a block from the input stream.
@@ -210,15 +323,47 @@ class StreamBackedCorpusView(AbstractLazySequence):
         will be called performed if any value is read from the view
         while its file stream is closed.
         """
-        if isinstance(self._fileid, PathPointer):
-            self._stream = self._fileid.open(self._encoding)
-        elif self._encoding:
-            self._stream = SeekableUnicodeStreamReader(
-                open(self._fileid, 'rb'), self._encoding)
-        else:
-            self._stream = open(self._fileid, 'rb')
+        self._stream = self._open_stream()
+
+    def _open_stream(self):
+        """
+        :return: A new stream for reading this corpus view's file.
+        """
+        stream = None
+        mmap_path = self._mmap_path()
+        if mmap_path is not None:
+            # If the file can't be mapped, then just read it normally.
+            try:
+                stream = MmapStreamReader(mmap_path, self._encoding)
+            except (EnvironmentError, OverflowError):
+                pass
+        if stream is None:
+            if isinstance(self._fileid, PathPointer):
+                stream = self._fileid.open(self._encoding)
+            elif self._encoding:
+                stream = SeekableUnicodeStreamReader(
+                    open(self._fileid, 'rb'), self._encoding)
+            else:
+                stream = open(self._fileid, 'rb')
         if self._source is not None:
-            self._stream = SourcedStringStream(self._stream, self._source)
+            stream = SourcedStringStream(stream, self._source)
+        return stream
+
+    def _mmap_path(self):
+        """
+        :return: The path of the file to read through a memory map,
+            or None if it should not (or can not) be memory mapped.
+        """
+        if not (self.use_mmap and
+                MmapStreamReader.supports_encoding(self._encoding)):
+            return None
+        if isinstance(self._fileid, GzipFileSystemPathPointer):
+            return None
+        elif isinstance(self._fileid, FileSystemPathPointer):
+            return self._fileid.path
+        elif isinstance(self._fileid, basestring):
+            return self._fileid
+        return None
 
     def close(self):
         """
@@ -263,9 +408,14 @@ class StreamBackedCorpusView(AbstractLazySequence):
             except StopIteration:
                 raise IndexError('index out of range')
 
+    def iterate_from(self, start_tok):
+        if self.prefetch > 0:
+            return self._iterate_prefetched(start_tok)
+        return self._iterate_blocks(start_tok)
+
     # If we wanted to be thread-safe, then this method would need to
     # do some locking.
-    def iterate_from(self, start_tok):
+    def _iterate_blocks(self, start_tok):
         # Start by feeding from the cache, if possible.
         if self._cache[0] <= start_tok < self._cache[1]:
             for tok in self._cache[2][start_tok-self._cache[0]:]:
@@ -284,48 +434,39 @@ class StreamBackedCorpusView(AbstractLazySequence):
             toknum = self._toknum[-1]
             filepos = self._filepos[-1]
 
-        # Open the stream, if it's not open already.
-        if self._stream is None:
-            self._open()
-
         # Each iteration through this loop, we read a single block
-        # from the stream.
+        # from the stream (or from the block cache).
+        block_cache = self._block_cache
         while filepos < self._eofpos:
+            # If we have already read this block, check the block cache.
+            if block_cache is not None and toknum < self._toknum[-1]:
+                cached = block_cache.get((self._block_cache_id, toknum))
+                if cached is not None:
+                    self._cache = cached
+                    block_index += 1
+                    new_filepos = self._filepos[block_index]
+                    for tok in cached[2][max(0, start_tok-toknum):]:
+                        yield tok
+                    if new_filepos == self._eofpos:
+                        break
+                    toknum = cached[1]
+                    filepos = new_filepos
+                    continue
+
+            # Open the stream, if it's not open already.
+            if self._stream is None:
+                self._open()
+
             # Read the next block.
             self._stream.seek(filepos)
             self._current_toknum = toknum
             self._current_blocknum = block_index
             tokens = self.read_block(self._stream)
-            assert isinstance(tokens, (tuple, list, AbstractLazySequence)), (
-                'block reader %s() should return list or tuple.' %
-                self.read_block.__name__)
-            num_toks = len(tokens)
             new_filepos = self._stream.tell()
-            assert new_filepos > filepos, (
-                'block reader %s() should consume at least 1 byte (filepos=%d)' %
-                (self.read_block.__name__, filepos))
-
-            # Update our cache.
-            self._cache = (toknum, toknum+num_toks, list(tokens))
-
-            # Update our mapping.
-            assert toknum <= self._toknum[-1]
-            if num_toks > 0:
-                block_index += 1
-                if toknum == self._toknum[-1]:
-                    assert new_filepos > self._filepos[-1] # monotonic!
-                    self._filepos.append(new_filepos)
-                    self._toknum.append(toknum+num_toks)
-                else:
-                    # Check for consistency:
-                    assert new_filepos == self._filepos[block_index], (
-                        'inconsistent block reader (num chars read)')
-                    assert toknum+num_toks == self._toknum[block_index], (
-                        'inconsistent block reader (num tokens returned)')
-
-            # If we reached the end of the file, then update self._len
-            if new_filepos == self._eofpos:
-                self._len = toknum + num_toks
+            _check_block(self, tokens, filepos, new_filepos)
+            num_toks = len(tokens)
+            block_index = self._add_block(block_index, toknum, tokens,
+                                          filepos, new_filepos)
             # Generate the tokens in this block (but skip any tokens
             # before start_tok).  Note that between yields, our state
             # may be modified.
@@ -342,6 +483,238 @@ class StreamBackedCorpusView(AbstractLazySequence):
         # If we reach this point, then we should know our length.
         assert self._len is not None
 
+    def _add_block(self, block_index, toknum, tokens, filepos,
+                   new_filepos):
+        """
+        Record a block that was just read from the file, by updating
+        the cache and the toknum/filepos mapping (and, at the end of
+        the file, the length).
+
+        :return: The index of the block that follows it.
+        """
+        num_toks = len(tokens)
+        # Update our cache.
+        self._cache = (toknum, toknum+num_toks, list(tokens),
+                       new_filepos-filepos)
+        if self._block_cache is not None and num_toks > 0:
+            self._block_cache[self._block_cache_id, toknum] = self._cache
+
+        # Update our mapping.
+        assert toknum <= self._toknum[-1]
+        if num_toks > 0:
+            block_index += 1
+            if toknum == self._toknum[-1]:
+                assert new_filepos > self._filepos[-1] # monotonic!
+                self._filepos.append(new_filepos)
+                self._toknum.append(toknum+num_toks)
+            else:
+                # Check for consistency:
+                assert new_filepos == self._filepos[block_index], (
+                    'inconsistent block reader (num chars read)')
+                assert toknum+num_toks == self._toknum[block_index], (
+                    'inconsistent block reader (num tokens returned)')
+
+        # If we reached the end of the file, then update self._len
+        # (and save our now complete mapping, if requested).
+        if new_filepos == self._eofpos and self._len is None:
+            self._len = toknum + num_toks
+            if self.index_dir is not None:
+                self._save_block_index()
+        return block_index
+
+    def _iterate_prefetched(self, start_tok):
+        """
+        Generate the tokens in this view starting at ``start_tok``,
+        like ``_iterate_blocks()``, but read the blocks in a
+        background thread, up to ``self.prefetch`` blocks ahead of the
+        tokens that have been generated.
+        """
+        # Start by feeding from the cache, if possible.
+        if self._cache[0] <= start_tok < self._cache[1]:
+            for tok in self._cache[2][start_tok-self._cache[0]:]:
+                yield tok
+                start_tok += 1
+
+        # Decide where in the file we should start.
+        if start_tok < self._toknum[-1]:
+            block_index = bisect.bisect_right(self._toknum, start_tok)-1
+        else:
+            block_index = len(self._toknum)-1
+        toknum = self._toknum[block_index]
+        filepos = self._filepos[block_index]
+        if filepos >= self._eofpos:
+            return
+
+        # The prefetcher only reads blocks; the view's state is only
+        # updated by this thread.
+        prefetcher = _BlockPrefetcher(self, block_index, toknum, filepos,
+                                      self.prefetch)
+        try:
+            for (tokens, filepos, new_filepos) in prefetcher:
+                block_index = self._add_block(block_index, toknum, tokens,
+                                              filepos, new_filepos)
+                for tok in tokens[max(0, start_tok-toknum):]:
+                    yield tok
+                toknum += len(tokens)
+        finally:
+            prefetcher.stop()
+
+    def iterate_parallel(self, start_tok=0, workers=None):
+        """
+        Return an iterator that generates the tokens in this corpus
+        view, starting at the token number ``start_tok`` (like
+        ``iterate_from()``), but decodes blocks in a pool of worker
+        processes.  The tokens are generated in order.
+
+        Only blocks whose position in the file is already known (from
+        an earlier pass over the file, or from an index saved in
+        ``index_dir``) can be decoded in parallel; the remainder of the
+        file is read in this process, as usual.
+
+        :param workers: The number of worker processes to use.  By
+            default, one per CPU.  If ``workers`` is 1 (or worker
+            processes can not be forked), then no pool is used.
+        """
+        workers = _num_workers(workers)
+        known_blocks = len(self._toknum) - 1
+        known_toks = self._toknum[-1]
+        if workers == 1 or start_tok >= known_toks:
+            for tok in self.iterate_from(start_tok):
+                yield tok
+            return
+
+        # Divide the known blocks into a few jobs per worker.
+        first = bisect.bisect_right(self._toknum, start_tok)-1
+        size = max(1, (known_blocks-first) // (workers*4))
+        jobs = [(id(self), i, min(i+size, known_blocks))
+                for i in range(first, known_blocks, size)]
+
+        toknum = self._toknum[first]
+        for tokens in _parallel_imap(self, _decode_blocks, jobs, workers):
+            for tok in tokens[max(0, start_tok-toknum):]:
+                yield tok
+            toknum += len(tokens)
+
+        # Read any blocks whose position was not known.
+        for tok in self.iterate_from(known_toks):
+            yield tok
+
+    def _decode_blocks(self, first, last):
+        """
+        :return: A list of the tokens in the blocks ``first`` through
+            ``last-1`` of the toknum/filepos mapping.
+        """
+        if self._stream is None:
+            self._open()
+        tokens = []
+        for block_index in range(first, last):
+            filepos = self._filepos[block_index]
+            # A mapping entry may span some empty blocks, followed by
+            # the block that contains its tokens.
+            while filepos < self._filepos[block_index+1]:
+                self._stream.seek(filepos)
+                self._current_toknum = self._toknum[block_index]
+                self._current_blocknum = block_index
+                tokens.extend(self.read_block(self._stream))
+                filepos = self._stream.tell()
+        assert len(tokens) == self._toknum[last]-self._toknum[first], (
+            'inconsistent block reader (num tokens returned)')
+        return tokens
+
+    # Saving and loading of the toknum/filepos mapping (see
+    # ``index_dir``).
+
+    def _block_index_file(self):
+        """
+        :return: A tuple ``(index_path, source_path)``, where
+            ``index_path`` is the file in ``index_dir`` that holds the
+            toknum/filepos mapping for this view, and ``source_path``
+            is the file system path whose size and modification time
+            are used to decide whether that mapping is still valid; or
+            None if this view's mapping can not be saved (e.g., because
+            its block reader can not be identified across processes).
+        """
+        fileid = self._fileid
+        if isinstance(fileid, FileSystemPathPointer):
+            source_path = name = fileid.path
+        elif isinstance(fileid, ZipFilePathPointer):
+            source_path = os.path.abspath(fileid.zipfile.filename)
+            name = '%s/%s' % (source_path, fileid.entry)
+        elif isinstance(fileid, basestring):
+            source_path = name = os.path.abspath(fileid)
+        else:
+            return None
+
+        # The mapping depends on how blocks are read, so it is keyed
+        # by the block reader (including the configuration of the
+        # object it is bound to, such as a view's grouping) as well as
+        # by the file.
+        reader_name = _stable_repr(self.read_block)
+        if reader_name is None:
+            return None
+
+        key = repr((name, reader_name, self._encoding, self._filepos[0]))
+        index_path = os.path.join(self.index_dir,
+                                  sha1(key).hexdigest() + '.idx')
+        return index_path, source_path
+
+    def _load_block_index(self):
+        """
+        Replace this view's toknum/filepos mapping with the mapping
+        saved in ``index_dir``, if there is one and it is still valid
+        for the underlying file.
+        """
+        paths = self._block_index_file()
+        if paths is None: return
+        index_path, source_path = paths
+        try:
+            stat = os.stat(source_path)
+            infile = open(index_path, 'rb')
+            try:
+                index = pickle.load(infile)
+            finally:
+                infile.close()
+        except Exception:
+            return
+        if (index.get('size') != stat.st_size or
+            index.get('mtime') != stat.st_mtime or
+            index.get('eofpos') != self._eofpos or
+            index.get('filepos', [None])[0] != self._filepos[0]):
+            return
+        self._toknum = index['toknum']
+        self._filepos = index['filepos']
+        self._len = index['len']
+
+    def _save_block_index(self):
+        """
+        Save this view's (complete) toknum/filepos mapping to
+        ``index_dir``.  Failures are silently ignored, since the
+        mapping can always be rebuilt by reading the file.
+        """
+        paths = self._block_index_file()
+        if paths is None: return
+        index_path, source_path = paths
+        try:
+            stat = os.stat(source_path)
+            index = dict(size=stat.st_size, mtime=stat.st_mtime,
+                         eofpos=self._eofpos, len=self._len,
+                         toknum=self._toknum, filepos=self._filepos)
+            if not os.path.isdir(self.index_dir):
+                os.makedirs(self.index_dir)
+            # Write to a temporary file first, so that other processes
+            # never see a partially written index.
+            fd, tmp_path = tempfile.mkstemp(dir=self.index_dir)
+            outfile = os.fdopen(fd, 'wb')
+            try:
+                pickle.dump(index, outfile, pickle.HIGHEST_PROTOCOL)
+            finally:
+                outfile.close()
+            if os.path.exists(index_path) and sys.platform == 'win32':
+                os.remove(index_path)
+            os.rename(tmp_path, index_path)
+        except (IOError, OSError):
+            pass
+
     # Use concat for these, so we can use a ConcatenatedCorpusView
     # when possible.
     def __add__(self, other):
@@ -373,6 +746,34 @@ class ConcatenatedCorpusView(AbstractLazySequence):
         """The most recently accessed corpus subview (or None).
         Before a new subview is accessed, this subview will be closed."""
 
+        # Subviews that cache blocks share a single cache, so that the
+        # cache is bounded for the concatenation as a whole.
+        block_caches = [piece.block_cache for piece in corpus_views
+                        if getattr(piece, 'block_cache', None) is not None]
+        if block_caches:
+            self.set_block_cache(block_caches[0])
+
+    def _get_block_cache(self):
+        for piece in self._pieces:
+            cache = getattr(piece, 'block_cache', None)
+            if cache is not None:
+                return cache
+        return None
+
+    block_cache = property(_get_block_cache, doc="""
+        The block cache shared by this view's subviews, or None.
+
+        :type: BlockCache""")
+
+    def set_block_cache(self, cache):
+        """
+        Use ``cache`` to hold the recently read blocks of all of this
+        view's subviews.
+        """
+        for piece in self._pieces:
+            if hasattr(piece, 'set_block_cache'):
+                piece.set_block_cache(cache)
+
     def __len__(self):
         if len(self._offsets) <= len(self._pieces):
             # Iterate to the end of the corpus.
@@ -408,6 +809,333 @@ class ConcatenatedCorpusView(AbstractLazySequence):
             # Move on to the next piece.
             piecenum += 1
 
+    def iterate_parallel(self, start_tok=0, workers=None):
+        """
+        Return an iterator that generates the tokens in this corpus
+        view, starting at the token number ``start_tok`` (like
+        ``iterate_from()``), but decodes its subviews in a pool of
+        worker processes.  The tokens are generated in order.
+
+        :param workers: The number of worker processes to use.  By
+            default, one per CPU.  If ``workers`` is 1 (or worker
+            processes can not be forked), then no pool is used.
+        """
+        workers = _num_workers(workers)
+        if workers == 1:
+            for tok in self.iterate_from(start_tok):
+                yield tok
+            return
+
+        piecenum = bisect.bisect_right(self._offsets, start_tok)-1
+        if piecenum >= len(self._pieces):
+            return
+        offset = self._offsets[piecenum]
+        jobs = [(id(self), piecenum, max(0, start_tok-offset))]
+        jobs += [(id(self), i, 0)
+                 for i in range(piecenum+1, len(self._pieces))]
+
+        for (_, piecenum, start), (tokens, length, mapping) in izip(
+            jobs, _parallel_imap(self, _decode_piece, jobs, workers)):
+            piece = self._pieces[piecenum]
+            # Record what the worker learned about the piece.
+            if mapping is not None and piece._len is None:
+                piece._toknum, piece._filepos, piece._len = mapping
+                if piece.index_dir is not None:
+                    piece._save_block_index()
+            if piecenum+1 == len(self._offsets):
+                self._offsets.append(offset + length)
+
+            # Skip any tokens before start_tok (the offset of a piece
+            # may not have been known when the jobs were created).
+            for tok in tokens[max(0, start_tok-offset-start):]:
+                yield tok
+            offset += length
+
+def _check_block(view, tokens, filepos, new_filepos):
+    assert isinstance(tokens, (tuple, list, AbstractLazySequence)), (
+        'block reader %s() should return list or tuple.' %
+        view.read_block.__name__)
+    assert new_filepos > filepos, (
+        'block reader %s() should consume at least 1 byte (filepos=%d)' %
+        (view.read_block.__name__, filepos))
+
+# The attributes of a StreamBackedCorpusView that hold its state,
+# rather than its configuration; _stable_repr() ignores them.
+_VIEW_STATE_ATTRIBUTES = frozenset([
+    '_toknum', '_filepos', '_encoding', '_source', '_len', '_fileid',
+    '_stream', '_current_toknum', '_current_blocknum', '_eofpos',
+    '_cache', '_block_cache', '_block_cache_id', 'read_block',
+    'use_mmap', 'prefetch'])
+
+def _stable_repr(value, depth=0):
+    """
+    :return: A string that identifies ``value`` (a block reader, or
+        part of the configuration of the object that it is bound to)
+        in any process, for use in the keys of saved block indexes; or
+        None if there is no such string (e.g., for lambda functions, or
+        objects that are only identified by their address).
+    """
+    if depth > 10:
+        return None
+    if value is None or isinstance(value, (basestring, int, long, float)):
+        return repr(value)
+    if isinstance(value, (tuple, list)):
+        items = [_stable_repr(item, depth+1) for item in value]
+        if None in items:
+            return None
+        return '[%s]' % ', '.join(items)
+    if isinstance(value, (set, frozenset)):
+        items = [_stable_repr(item, depth+1) for item in value]
+        if None in items:
+            return None
+        return '%s([%s])' % (type(value).__name__, ', '.join(sorted(items)))
+    if isinstance(value, dict):
+        items = [(_stable_repr(k, depth+1), _stable_repr(v, depth+1))
+                 for (k, v) in value.items()]
+        if None in [i for item in items for i in item]:
+            return None
+        return '{%s}' % ', '.join(sorted('%s: %s' % item for item in items))
+    if isinstance(value, types.FunctionType):
+        if value.__name__ == '<lambda>':
+            return None
+        return '%s.%s' % (value.__module__, value.__name__)
+    if isinstance(value, types.BuiltinFunctionType):
+        return '%s.%s' % (value.__module__, value.__name__)
+    if isinstance(value, types.MethodType):
+        if value.im_self is None:
+            owner = _stable_repr(value.im_class, depth+1)
+        else:
+            owner = _stable_repr(value.im_self, depth+1)
+        if owner is None:
+            return None
+        return '%s.%s' % (owner, value.__name__)
+    if isinstance(value, type(re.compile(''))):
+        return 're.compile(%r, %d)' % (value.pattern, value.flags)
+    if isinstance(value, (type, types.ClassType)):
+        return '%s.%s' % (value.__module__, value.__name__)
+    if getattr(type(value), '__getstate__', None) is not None:
+        # Identify the object by the state that it is pickled with.
+        config = _stable_repr(value.__getstate__(), depth+1)
+        if config is None:
+            return None
+        return '%s(%s)' % (_stable_repr(type(value)), config)
+    if isinstance(getattr(value, '__dict__', None), dict):
+        config = vars(value)
+        if isinstance(value, StreamBackedCorpusView):
+            config = dict((k, v) for (k, v) in config.items()
+                          if k not in _VIEW_STATE_ATTRIBUTES)
+        config = _stable_repr(config, depth+1)
+        if config is None:
+            return None
+        return '%s(%s)' % (_stable_repr(type(value)), config)
+    return None
+
+######################################################################
+#{ Prefetching
+######################################################################
+
+class _BlockPrefetcher(object):
+    """
+    Reads the blocks of a corpus view in a background thread, and
+    generates them (as ``(tokens, filepos, new_filepos)`` tuples) in
+    order.  At most ``size`` blocks are read ahead of the blocks that
+    have been consumed.  Any exception raised while reading a block
+    is re-raised by the consumer.
+
+    The blocks are read by a (shallow) copy of the view, so the
+    ``_current_toknum`` and ``_current_blocknum`` that the background
+    thread sets for the block reader are not those of the view, which
+    may be reading blocks in the consumer's thread at the same time.
+    """
+    def __init__(self, view, block_index, toknum, filepos, size):
+        self._queue = Queue.Queue(size)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(copy.copy(view), block_index, toknum, filepos))
+        self._thread.setDaemon(True)
+        self._thread.start()
+
+    def _run(self, view, block_index, toknum, filepos):
+        try:
+            stream = view._open_stream()
+            try:
+                while filepos < view._eofpos and not self._stopped.isSet():
+                    stream.seek(filepos)
+                    view._current_toknum = toknum
+                    view._current_blocknum = block_index
+                    tokens = view.read_block(stream)
+                    new_filepos = stream.tell()
+                    _check_block(view, tokens, filepos, new_filepos)
+                    self._put(('block', (tokens, filepos, new_filepos)))
+                    if tokens: block_index += 1
+                    toknum += len(tokens)
+                    filepos = new_filepos
+            finally:
+                stream.close()
+            self._put(('eof', None))
+        except:
+            self._put(('error', sys.exc_info()))
+
+    def _put(self, item):
+        # Don't bother if the consumer has stopped listening.  (If it
+        # stops while we're waiting, then stop() makes room for us.)
+        if not self._stopped.isSet():
+            self._queue.put(item)
+
+    def __iter__(self):
+        while True:
+            kind, value = self._queue.get()
+            if kind == 'block':
+                yield value
+            elif kind == 'eof':
+                return
+            else:
+                raise value[0], value[1], value[2]
+
+    def stop(self):
+        """
+        Stop reading blocks.  The background thread exits the next
+        time it finishes reading a block.
+        """
+        self._stopped.set()
+        # Discard any blocks that were read ahead, so the background
+        # thread is not left waiting for room in the queue.
+        try:
+            while True: self._queue.get_nowait()
+        except Queue.Empty:
+            pass
+
+######################################################################
+#{ Parallel Decoding
+######################################################################
+
+_parallel_views = {}
+"""The corpus views that are currently being decoded in parallel,
+   indexed by id.  Worker processes inherit this dictionary when they
+   are forked, so the views themselves never need to be pickled."""
+
+def _num_workers(workers):
+    """
+    :return: The number of worker processes that should be used to
+        decode a corpus view, given the requested number ``workers``.
+    """
+    # Workers rely on fork() to inherit the views they decode.
+    if not hasattr(os, 'fork'):
+        return 1
+    try:
+        from multiprocessing import cpu_count
+        if workers is None:
+            workers = cpu_count()
+    except (ImportError, NotImplementedError):
+        return 1
+    return max(1, workers or 1)
+
+def _parallel_imap(view, func, jobs, workers):
+    """
+    Apply ``func`` to each of ``jobs`` in a pool of ``workers``
+    processes that have access to ``view``, and generate the results
+    in order.  Only a few jobs are submitted ahead of the results that
+    have been consumed, so memory use is bounded.
+    """
+    from multiprocessing import Pool
+    _parallel_views[id(view)] = view
+    try:
+        pool = Pool(workers, _detach_streams, (id(view),))
+    finally:
+        _parallel_views.pop(id(view), None)
+    try:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.apply_async(func, (job,)))
+            if len(pending) >= 2*workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+    finally:
+        pool.terminate()
+        pool.join()
+
+def _detach_streams(view_id, view=None):
+    """
+    Forget the file streams that a worker process inherited for the
+    view with the given id (and its subviews), so that the worker
+    opens its own streams rather than sharing file positions with its
+    parent.
+    """
+    if view is None:
+        view = _parallel_views[view_id]
+    if isinstance(view, ConcatenatedCorpusView):
+        for piece in view._pieces:
+            _detach_streams(view_id, piece)
+    elif isinstance(view, StreamBackedCorpusView):
+        view._stream = None
+
+# These are run in the worker processes of _parallel_imap(), so they
+# must be defined at the top level of the module.
+def _decode_blocks(args):
+    view_id, first, last = args
+    return _parallel_views[view_id]._decode_blocks(first, last)
+
+def _decode_piece(args):
+    view_id, piecenum, start = args
+    piece = _parallel_views[view_id]._pieces[piecenum]
+    tokens = list(piece.iterate_from(start))
+    mapping = None
+    if isinstance(piece, StreamBackedCorpusView):
+        mapping = (piece._toknum, piece._filepos, piece._len)
+    # Having read to the end of the piece, its length is known.
+    return tokens, len(piece), mapping
+
+######################################################################
+#{ Block Cache
+######################################################################
+
+class BlockCache(LRUCache):
+    """
+    A least recently used cache of the blocks read by one or more
+    corpus views, whose total size is bounded by a number of tokens,
+    or by the number of bytes that the blocks were read from.
+
+        >>> cache = BlockCache(50000, 'bytes')
+        >>> cache
+        <BlockCache with 0 blocks, 0 of 50000 bytes>
+    """
+    def __init__(self, maxsize=100000, unit='tokens'):
+        """
+        :param maxsize: The maximum total size of the cached blocks.
+        :param unit: ``'tokens'`` or ``'bytes'``.
+        """
+        if unit == 'tokens':
+            sizeof = _block_num_tokens
+        elif unit == 'bytes':
+            sizeof = _block_num_bytes
+        else:
+            raise ValueError('unit should be "tokens" or "bytes"')
+        LRUCache.__init__(self, maxsize, sizeof)
+        self.unit = unit
+
+    def hit_rate(self):
+        """
+        :return: The fraction of lookups that found their block in
+            the cache.
+        :rtype: float
+        """
+        lookups = self.hits + self.misses
+        if lookups == 0: return 0.0
+        return float(self.hits) / lookups
+
+    def __repr__(self):
+        return '<BlockCache with %d blocks, %d of %s %s>' % (
+            len(self), self.currsize, self.maxsize, self.unit)
+
+# Cached blocks are (start_toknum, end_toknum, tokens, num_bytes) tuples.
+def _block_num_tokens(block):
+    return block[1] - block[0]
+
+def _block_num_bytes(block):
+    return block[3]
+
 def concat(docs):
     """
     Concatenate together the contents of multiple documents from a
@@ -743,9 +1471,18 @@ def _parse_sexpr_block(block):
 #{ Finding Corpus Items
 ######################################################################
 
-def find_corpus_fileids(root, regexp):
+def find_corpus_fileids(root, regexp, manifest_dir=None):
+    """
+    Return a sorted list of the paths (relative to ``root``) of the
+    files under ``root`` that match ``regexp``.  If ``manifest_dir``
+    is given, and ``root`` is a directory, then the list is read from
+    (and saved to) a ``CorpusManifest`` in that directory.
+    """
     if not isinstance(root, PathPointer):
         raise TypeError('find_corpus_fileids: expected a PathPointer')
+    if (manifest_dir is not None and
+        isinstance(root, FileSystemPathPointer)):
+        return CorpusManifest(manifest_dir, root, regexp).fileids()
     regexp += '$'
 
     # Find fileids in a zipfile: scan the zipfile's namelist.  Filter
@@ -781,6 +1518,207 @@ def _path_from(parent, child):
         assert os.path.split(child)[0] != child
     return path
 
+class CorpusManifest(object):
+    """
+    A persistent record of the file identifiers (and, optionally, the
+    categories) of a corpus rooted in a directory, which lets corpus
+    readers avoid walking the directory tree on every load.
+
+    The manifest is stored in ``manifest_dir``, and can be shared by
+    any number of processes.  It records the modification time of
+    each directory under the corpus root, along with the names of the
+    matching files and the subdirectories in that directory.  When the
+    manifest is reloaded, only directories whose modification time has
+    changed are listed again, so checking a manifest costs one
+    ``stat`` per directory rather than one per file.  (Editing a
+    file's contents does not change its directory's modification
+    time; but that does not affect the file identifiers or
+    categories.)
+
+        >>> manifest = CorpusManifest(manifest_dir, root, r'.*\.txt') # doctest: +SKIP
+        >>> manifest.fileids() # doctest: +SKIP
+        ['a.txt', 'news/b.txt']
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self, manifest_dir, root, regexp):
+        """
+        :param manifest_dir: The directory where the manifest is saved.
+        :param root: The root directory of the corpus.
+        :type root: FileSystemPathPointer
+        :param regexp: A regular expression over file identifiers,
+            as used by ``find_corpus_fileids()``.
+        """
+        if not isinstance(root, FileSystemPathPointer):
+            raise TypeError('CorpusManifest: expected a '
+                            'FileSystemPathPointer')
+        self._root = root
+        self._regexp = regexp
+        self._manifest_dir = manifest_dir
+        key = repr((os.path.abspath(root.path), regexp))
+        self._path = os.path.join(manifest_dir,
+                                  sha1(key).hexdigest()+'.manifest')
+
+        self._dirs = {}
+        """Maps the path of each directory (relative to the root, with
+        a trailing '/') to a tuple ``(mtime, fileids, subdirs)``."""
+        self._categories = {}
+        """Maps a category source to a tuple ``(stamp, f2c)``, where
+        ``f2c`` is a dictionary from file identifiers to lists of
+        categories."""
+        self._fileids = None
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            infile = open(self._path, 'rb')
+            try:
+                manifest = pickle.load(infile)
+            finally:
+                infile.close()
+        except Exception:
+            return
+        if (isinstance(manifest, dict) and
+            manifest.get('version') == self.FORMAT_VERSION and
+            manifest.get('key') == (self._root.path, self._regexp)):
+            self._dirs = manifest['dirs']
+            self._categories = manifest['categories']
+
+    def save(self):
+        """
+        Write this manifest to ``manifest_dir``, if it has changed
+        since it was loaded.  Failures are silently ignored, since the
+        manifest can always be rebuilt from the corpus itself.
+        """
+        if not self._dirty: return
+        manifest = dict(version=self.FORMAT_VERSION,
+                        key=(self._root.path, self._regexp),
+                        dirs=self._dirs, categories=self._categories)
+        try:
+            if not os.path.isdir(self._manifest_dir):
+                os.makedirs(self._manifest_dir)
+            # Write to a temporary file first, so that other processes
+            # never see a partially written manifest.
+            fd, tmp_path = tempfile.mkstemp(dir=self._manifest_dir)
+            outfile = os.fdopen(fd, 'wb')
+            try:
+                pickle.dump(manifest, outfile, pickle.HIGHEST_PROTOCOL)
+            finally:
+                outfile.close()
+            if os.path.exists(self._path) and sys.platform == 'win32':
+                os.remove(self._path)
+            os.rename(tmp_path, self._path)
+            self._dirty = False
+        except (IOError, OSError):
+            pass
+
+    def fileids(self):
+        """
+        Return a sorted list of the file identifiers under the root
+        that match the regexp.  Directories that changed since the
+        manifest was saved are listed again, and the manifest is saved
+        if anything changed.
+
+        :rtype: list(str)
+        """
+        if self._fileids is None:
+            self.refresh()
+        return self._fileids
+
+    def refresh(self):
+        """
+        Bring this manifest up to date with the corpus directory,
+        listing only those directories whose modification time has
+        changed.
+        """
+        regexp = re.compile(self._regexp + '$')
+        dirs = {}
+        fileids = []
+        stack = ['']
+        while stack:
+            prefix = stack.pop()
+            dirpath = os.path.join(self._root.path, *prefix.split('/'))
+            try:
+                mtime = os.stat(dirpath).st_mtime
+            except OSError:
+                continue
+            entry = self._dirs.get(prefix)
+            if entry is None or entry[0] != mtime:
+                entry = self._list_dir(dirpath, prefix, mtime, regexp)
+                self._dirty = True
+            dirs[prefix] = entry
+            fileids += entry[1]
+            stack += [prefix+subdir+'/' for subdir in entry[2]]
+        if len(dirs) != len(self._dirs):
+            self._dirty = True
+        self._dirs = dirs
+        self._fileids = sorted(fileids)
+        self.save()
+
+    def _list_dir(self, dirpath, prefix, mtime, regexp):
+        # Mirror os.walk(): ignore unreadable directories, and don't
+        # follow symbolic links to directories.
+        try:
+            names = os.listdir(dirpath)
+        except OSError:
+            names = []
+        fileids, subdirs = [], []
+        for name in names:
+            path = os.path.join(dirpath, name)
+            if os.path.isdir(path):
+                # Don't visit svn directories:
+                if name != '.svn' and not os.path.islink(path):
+                    subdirs.append(name)
+            elif regexp.match(prefix+name):
+                fileids.append(prefix+name)
+        # A directory that is modified again within the resolution of
+        # its timestamp would look unchanged; so don't trust the
+        # timestamp of a directory that was modified very recently.
+        if mtime is not None and time.time() - mtime < 2:
+            mtime = None
+        return (mtime, fileids, subdirs)
+
+    def categories(self, source, stamp, compute):
+        """
+        Return a dictionary mapping each file identifier to a list of
+        its categories, as computed by ``compute``, using the saved
+        mapping where possible.
+
+        :param source: A hashable value identifying where the
+            categories come from (e.g. a ``cat_pattern``).
+        :param stamp: A value that changes whenever the categories
+            might change, other than by adding or removing files (e.g.
+            the size and modification time of a ``cat_file``); or
+            None.
+        :param compute: A function that takes a list of file
+            identifiers, and returns a dictionary mapping each of them
+            to a list of categories.  Unless ``stamp`` has changed, it
+            is only called with the file identifiers that were added
+            (or renamed) since the manifest was saved.
+        """
+        fileids = self.fileids()
+        saved_stamp, f2c = self._categories.get(source, (None, None))
+        if f2c is None or saved_stamp != stamp:
+            f2c = compute(fileids)
+        elif set(f2c) != set(fileids):
+            # Files have been added, removed or renamed: drop the
+            # entries of the files that are gone, and compute the
+            # categories of the new ones.
+            new_fileids = [f for f in fileids if f not in f2c]
+            f2c = dict((f, f2c[f]) for f in fileids if f in f2c)
+            f2c.update(compute(new_fileids))
+        else:
+            return f2c
+        self._categories[source] = (stamp, f2c)
+        self._dirty = True
+        self.save()
+        return f2c
+
+    def __repr__(self):
+        return '<CorpusManifest for %r in %r>' % (self._regexp,
+                                                   self._root.path)
+
 ######################################################################
 #{ Paragraph structure in Treebank files
 ######################################################################
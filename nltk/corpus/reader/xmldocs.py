@@ -36,12 +36,16 @@ class XMLCorpusReader(CorpusReader):
         self._wrap_etree = wrap_etree
         CorpusReader.__init__(self, root, fileids)
 
-    def xml(self, fileid=None):
+    def _single_fileid(self, fileid):
         # Make sure we have exactly one file -- no concatenating XML.
         if fileid is None and len(self._fileids) == 1:
             fileid = self._fileids[0]
         if not isinstance(fileid, basestring):
             raise TypeError('Expected a single file identifier string')
+        return fileid
+
+    def xml(self, fileid=None):
+        fileid = self._single_fileid(fileid)
         # Read the XML in using ElementTree.
         elt = ElementTree.parse(self.abspath(fileid).open()).getroot()
         # If requested, wrap it.
@@ -60,16 +64,34 @@ class XMLCorpusReader(CorpusReader):
         :rtype: list(str)
         """
 
-        elt = self.xml(fileid)
+        fileid = self._single_fileid(fileid)
         word_tokenizer=WordPunctTokenizer()
-        iterator = elt.getiterator()
         out = []
 
-        for node in iterator:
-            text = node.text
-            if text is not None:
-                toks = word_tokenizer.tokenize(text)
-                out.extend(toks)
+        # Parse the file incrementally, discarding each element once
+        # it has been processed, so the document tree is never built.
+        # An element's text is complete when its first child starts
+        # (or when it ends, if it has no children); tokenizing it then
+        # keeps the words in document order.
+        stream = self.abspath(fileid).open()
+        try:
+            parents = []
+            pending = None
+            for event, node in ElementTree.iterparse(stream,
+                                                     ('start', 'end')):
+                if pending is not None:
+                    if pending.text is not None:
+                        out.extend(word_tokenizer.tokenize(pending.text))
+                    pending = None
+                if event == 'start':
+                    parents.append(node)
+                    pending = node
+                else:
+                    parents.pop()
+                    if parents: parents[-1].remove(node)
+                    node.clear()
+        finally:
+            stream.close()
         return out
 
     def raw(self, fileids=None):
@@ -105,6 +127,21 @@ class XMLCorpusView(StreamBackedCorpusView):
     element as-is (i.e., as an ElementTree object); but it can be
     overridden, either via subclassing or via the ``elt_handler``
     constructor parameter.
+
+    Iterating over a view gives the same items as indexing it, even in
+    files that use namespace prefixes (whose prefixed tags are matched
+    as written):
+
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), 'ns.xml')
+        >>> open(path, 'w').write(
+        ...     '<doc><p><s n="1"/><s n="2"/></p><p xmlns:x="http://x">'
+        ...     '<s n="3"/><x:s n="4"/><s n="5"/></p></doc>')
+        >>> v = XMLCorpusView(path, '.*/s')
+        >>> [elt.get('n') for elt in v]
+        ['1', '2', '3', '5']
+        >>> [v[i].get('n') for i in range(len(v))]
+        ['1', '2', '3', '5']
     """
 
     #: If true, then display debugging output to stdout when reading
@@ -114,6 +151,14 @@ class XMLCorpusView(StreamBackedCorpusView):
     #: The number of characters read at a time by this corpus reader.
     _BLOCK_SIZE = 1024
 
+    #: If true, then iterating over the view from its first item
+    #: (e.g., with a ``for`` loop, ``list()`` or ``len()``) parses the
+    #: file incrementally with ``iterparse_elements()``, rather than
+    #: reading it in blocks.  Random access still reads blocks.  (Once
+    #: a namespace prefix is declared, iteration goes on by reading
+    #: blocks too, since blocks are matched by their prefixed tags.)
+    streaming = True
+
     def __init__(self, fileid, tagspec, elt_handler=None):
         """
         Create a new corpus view based on a specified XML file.
@@ -171,6 +216,42 @@ class XMLCorpusView(StreamBackedCorpusView):
         # No encoding found -- what should the default be?
         return 'utf-8'
 
+    def iterate_from(self, start_tok):
+        if start_tok == 0 and self.streaming:
+            return self._iterparse()
+        return StreamBackedCorpusView.iterate_from(self, start_tok)
+
+    def _iterparse(self):
+        """
+        Generate the items in this view by parsing the file
+        incrementally.  Elements are discarded once they have been
+        processed, so memory use does not grow with the size of the
+        file.
+        """
+        if isinstance(self._fileid, PathPointer):
+            stream = self._fileid.open()
+        else:
+            stream = open(self._fileid, 'rb')
+        num_toks = 0
+        try:
+            for elt, context in _iterparse_elements(stream, self._tagspec,
+                                                    False):
+                if elt is None:
+                    break
+                yield self.handle_elt(elt, context)
+                num_toks += 1
+            else:
+                if self._len is None:
+                    self._len = num_toks
+                return
+        finally:
+            stream.close()
+        # The file declares a namespace prefix: read the remaining
+        # items in blocks, so that they match the items that indexing
+        # finds.  (The items so far can not have used the prefix.)
+        for tok in StreamBackedCorpusView.iterate_from(self, num_toks):
+            yield tok
+
     def handle_elt(self, elt, context):
         """
         Convert an element into an appropriate value for inclusion in
@@ -378,3 +459,80 @@ class XMLCorpusView(StreamBackedCorpusView):
                             context)
                 for (elt, context) in elts]
 
+
+def iterparse_elements(source, tagspec):
+    """
+    Parse an XML file incrementally, and generate a tuple
+    ``(elt, context)`` for each non-nested element that matches a tag
+    specification, as soon as the element has been parsed.  ``context``
+    is the element's tag path (see ``XMLCorpusView``).  Each element
+    is detached from the document tree before it is generated, and
+    all other elements are discarded once they end; so the memory
+    used does not depend on the size of the file.  Namespaces are
+    removed from the tag names of the generated elements.
+
+        >>> from StringIO import StringIO
+        >>> xml = '<doc><p><s n="1">One</s><s n="2">Two</s></p></doc>'
+        >>> for elt, context in iterparse_elements(StringIO(xml), '.*/s'):
+        ...     print context, elt.get('n'), elt.text
+        doc/p/s 1 One
+        doc/p/s 2 Two
+
+    :param source: A file name or a binary file object.
+    :param tagspec: A tag specification, as a regular expression
+        string or a compiled regular expression that must match the
+        whole tag path.
+    """
+    return _iterparse_elements(source, tagspec, True)
+
+def _iterparse_elements(source, tagspec, allow_prefixes):
+    """
+    Generate the elements of ``source`` that match ``tagspec``, like
+    ``iterparse_elements()``.  If ``allow_prefixes`` is false, then
+    stop (generating ``(None, None)``) as soon as a namespace prefix
+    is declared.
+    """
+    if isinstance(tagspec, basestring):
+        tagspec = re.compile(tagspec+r'\Z')
+
+    stack = [] # (elt, context) for each open element outside a match
+    depth = 0 # how deeply nested we are in the current match
+    namespaced = False # have we seen any namespaced tags?
+    events = ('start', 'end')
+    if not allow_prefixes:
+        events += ('start-ns',)
+    for event, elt in ElementTree.iterparse(source, events):
+        if event == 'start-ns':
+            # (elt is a (prefix, uri) tuple.)
+            if elt[0] and not allow_prefixes:
+                yield None, None
+                return
+        elif event == 'start':
+            if depth:
+                depth += 1
+                continue
+            tag = elt.tag
+            if tag[:1] == '{':
+                tag = tag[tag.index('}')+1:]
+                namespaced = True
+            if stack: context = stack[-1][1] + '/' + tag
+            else: context = tag
+            stack.append( (elt, context) )
+            if tagspec.match(context):
+                depth = 1
+        else:
+            if depth > 1:
+                depth -= 1
+                continue
+            elt, context = stack.pop()
+            if stack: stack[-1][0].remove(elt)
+            if depth:
+                depth = 0
+                elt.tail = None
+                if namespaced:
+                    for sub in elt.getiterator():
+                        if sub.tag[:1] == '{':
+                            sub.tag = sub.tag[sub.tag.index('}')+1:]
+                yield elt, context
+            else:
+                elt.clear()
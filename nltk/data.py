@@ -39,6 +39,12 @@ import re
 import urllib2
 import zipfile
 import codecs
+import mmap
+import time
+import threading
+import bisect
+import zlib
+import struct
 
 from gzip import GzipFile, READ as GZ_READ, WRITE as GZ_WRITE
 
@@ -52,12 +58,18 @@ try:
 except:
     import pickle
 
+try:
+    from hashlib import sha1
+except ImportError:
+    from sha import new as sha1
+
 try:
     from cStringIO import StringIO
 except:
     from StringIO import StringIO
 
 import nltk
+from nltk.util import LRUCache
 
 ######################################################################
 # Search Path
@@ -253,7 +265,9 @@ class BufferedGzipFile(GzipFile):
         GzipFile.flush(self, lib_mode)
 
     def read(self, size=None):
-        if not size:
+        # Note that GzipFile.seek() calls read(0), which must not
+        # read the whole file.
+        if size is None:
             size = self._size
             contents = StringIO()
             while True:
@@ -281,18 +295,431 @@ class BufferedGzipFile(GzipFile):
             self._write_gzip(data)
 
 
+class GzipSeekIndex(object):
+    """
+    The seek points of a gzip file: positions from which it can be
+    decompressed without starting again from the beginning.  Seek
+    points are recorded by ``IndexedGzipFile`` as it decompresses the
+    file, roughly every ``SPACING`` bytes of uncompressed data, and at
+    the start of each gzip member.  A seek point within a member holds
+    a copy of the decompressor's state (about 40KB); seek points at the
+    start of members need no state, so they can be saved (along with
+    the uncompressed size, once it is known) with ``save()``, and
+    reused by other processes.
+
+    At most ``MAX_DECOMPRESSORS`` seek points within members are kept.
+    When there would be more, every other one is discarded, and the
+    spacing between new seek points is doubled:
+
+        >>> index = GzipSeekIndex()
+        >>> index.MAX_DECOMPRESSORS = 4
+        >>> for upos in range(1, 21):
+        ...     index.add(upos * index.SPACING, upos, zlib.decompressobj())
+        >>> len(index), index.find(16 * index.SPACING)[0] / index.SPACING
+        (4, 9)
+    """
+    SPACING = 2**20
+    MAX_DECOMPRESSORS = 256
+    FORMAT_VERSION = 1
+
+    def __init__(self, source=None):
+        """
+        :param source: The path of the gzip file, if it is a file.
+        """
+        self.source = source
+        self.size = None
+        """The size of the uncompressed file, if known."""
+        self.save_as = None
+        """If not None, then the name of a file where this index is
+           saved once the size of the uncompressed file is known."""
+        self._upos = [0]
+        self._points = [(0, 0, None)]
+        self._spacing = self.SPACING
+        self._num_decompressors = 0
+
+    def add(self, upos, cpos, decompressor):
+        """
+        Record that decompression can resume at uncompressed position
+        ``upos``, by feeding the compressed data from ``cpos`` onwards
+        to a copy of ``decompressor`` (or to a new decompressor, if
+        it is None).  Seek points that are too close to an existing
+        seek point are ignored, unless they start a member.
+        """
+        i = bisect.bisect_right(self._upos, upos)
+        if self._upos[i-1] == upos:
+            return
+        if decompressor is not None:
+            if upos - self._upos[i-1] < self._spacing:
+                return
+            decompressor = decompressor.copy()
+            self._num_decompressors += 1
+        self._upos.insert(i, upos)
+        self._points.insert(i, (upos, cpos, decompressor))
+        if self._num_decompressors > self.MAX_DECOMPRESSORS:
+            self._thin()
+
+    def _thin(self):
+        """
+        Discard every other seek point within a member, and double
+        the spacing between new seek points.
+        """
+        points = []
+        discard = False
+        for point in self._points:
+            if point[2] is not None:
+                if discard:
+                    self._num_decompressors -= 1
+                    discard = False
+                    continue
+                discard = True
+            points.append(point)
+        self._points = points
+        self._upos = [upos for (upos, cpos, d) in points]
+        self._spacing *= 2
+
+    def find(self, upos):
+        """
+        :return: The last seek point at or before ``upos``, as a tuple
+            ``(upos, cpos, decompressor)``.  ``decompressor`` is None
+            at the start of a member.
+        """
+        return self._points[bisect.bisect_right(self._upos, upos)-1]
+
+    def __len__(self):
+        return len(self._points)
+
+    def save(self, filename):
+        """
+        Save the uncompressed size and the member seek points of this
+        index to ``filename``.  Failures are silently ignored.
+        """
+        members = [(u, c) for (u, c, d) in self._points if d is None]
+        try:
+            stat = os.stat(self.source)
+            index = dict(version=self.FORMAT_VERSION, size=self.size,
+                         members=members, csize=stat.st_size,
+                         mtime=stat.st_mtime)
+            tmp_path = '%s.%d.tmp' % (filename, os.getpid())
+            outfile = open(tmp_path, 'wb')
+            try:
+                pickle.dump(index, outfile, pickle.HIGHEST_PROTOCOL)
+            finally:
+                outfile.close()
+            if os.path.exists(filename) and sys.platform == 'win32':
+                os.remove(filename)
+            os.rename(tmp_path, filename)
+        except (IOError, OSError):
+            pass
+
+    def load(self, filename):
+        """
+        Load the seek points saved in ``filename``, if they are still
+        valid for the gzip file.
+
+        :return: True if the seek points were loaded.
+        """
+        try:
+            infile = open(filename, 'rb')
+            try:
+                index = pickle.load(infile)
+            finally:
+                infile.close()
+            stat = os.stat(self.source)
+        except Exception:
+            return False
+        if (not isinstance(index, dict) or
+            index.get('version') != self.FORMAT_VERSION or
+            index.get('csize') != stat.st_size or
+            index.get('mtime') != stat.st_mtime):
+            return False
+        self.size = index['size']
+        for (upos, cpos) in index['members']:
+            self.add(upos, cpos, None)
+        return True
+
+_gzip_seek_indexes = weakref.WeakValueDictionary()
+"""The ``GzipSeekIndex`` for each gzip file that is currently open,
+   keyed by its path, size and modification time."""
+
+_gzip_sizes = LRUCache(1000)
+"""The uncompressed size of each recently measured gzip file, keyed
+   like ``_gzip_seek_indexes``.  Unlike the seek indexes, the sizes
+   are kept after the files are closed."""
+
+def _gzip_key(path):
+    """
+    :return: The key of the gzip file ``path`` in ``_gzip_seek_indexes``
+        and ``_gzip_sizes``.
+    """
+    stat = os.stat(path)
+    return (path, stat.st_size, stat.st_mtime)
+
+def _gzip_seek_index(path, save=False):
+    """
+    :return: The shared ``GzipSeekIndex`` for the gzip file ``path``.
+        If ``save`` is true, the index is saved alongside the file
+        (with the suffix ``.seekidx``) once its size is known.
+    """
+    key = _gzip_key(path)
+    index = _gzip_seek_indexes.get(key)
+    if index is None:
+        index = GzipSeekIndex(path)
+        if not index.load(path+'.seekidx') and save:
+            index.save_as = path+'.seekidx'
+        _gzip_seek_indexes[key] = index
+    return index
+
+class IndexedGzipFile(object):
+    """
+    A read-only file-like object for gzip-compressed data, which
+    records seek points (in a ``GzipSeekIndex``) as it decompresses
+    the data.  Unlike ``GzipFile``, seeking backwards does not
+    decompress the file from the beginning again, but resumes from
+    the nearest seek point.  Several ``IndexedGzipFile`` objects can
+    share one index.
+
+        >>> from StringIO import StringIO
+        >>> compressed = StringIO()
+        >>> outfile = GzipFile(fileobj=compressed, mode='wb')
+        >>> outfile.writelines(['line one\\n', 'line two\\n'])
+        >>> outfile.close()
+        >>> stream = IndexedGzipFile(fileobj=StringIO(compressed.getvalue()))
+        >>> stream.readline(), stream.tell()
+        ('line one\\n', 9)
+        >>> stream.seek(5); stream.read()
+        'one\\nline two\\n'
+    """
+    CHUNK = 2**16
+    """The number of bytes of compressed data read at a time."""
+
+    def __init__(self, filename=None, fileobj=None, index=None):
+        """
+        :param filename: The gzip file to read.
+        :param fileobj: A binary file object from which to read the
+            compressed data, instead of ``filename``.
+        :param index: The ``GzipSeekIndex`` to use and update.  By
+            default, a new index is used.
+        """
+        if fileobj is None:
+            fileobj = open(filename, 'rb')
+        self._fileobj = fileobj
+        self.name = filename or getattr(fileobj, 'name', None)
+        if index is None:
+            index = GzipSeekIndex()
+        self._index = index
+        self._restore(index.find(0))
+
+    def _restore(self, point):
+        """Resume decompression from the given seek point."""
+        upos, cpos, decompressor = point
+        self._fileobj.seek(cpos)
+        self._cpos = cpos
+        if decompressor is None:
+            self._decompressor = zlib.decompressobj(16+zlib.MAX_WBITS)
+        else:
+            self._decompressor = decompressor.copy()
+        self._eof = False
+        self._buf = ''
+        self._bufpos = self._dpos = self._pos = upos
+
+    def _decompress_chunk(self):
+        """
+        Decompress the next chunk of the file, and record any new seek
+        points.  ``self._dpos`` is the uncompressed position of the end
+        of the data decompressed so far.
+
+        :return: The decompressed data, or None at the end of the file.
+        """
+        if self._eof:
+            return None
+        data = self._fileobj.read(self.CHUNK)
+        if not data:
+            self._eof = True
+            if self._index.size is None:
+                self._index.size = self._dpos
+                if self._index.save_as is not None:
+                    self._index.save(self._index.save_as)
+            return None
+        self._cpos += len(data)
+        out = self._decompressor.decompress(data)
+        while self._decompressor.unused_data:
+            # We've reached the end of a gzip member; the rest of the
+            # chunk belongs to the next one (or is padding).
+            rest = self._decompressor.unused_data
+            if rest.strip('\0') == '' or not '\x1f\x8b'.startswith(rest[:2]):
+                self._fileobj.seek(0, 2)
+                break
+            self._index.add(self._dpos + len(out),
+                            self._cpos - len(rest), None)
+            self._decompressor = zlib.decompressobj(16+zlib.MAX_WBITS)
+            out += self._decompressor.decompress(rest)
+        self._dpos += len(out)
+        self._index.add(self._dpos, self._cpos, self._decompressor)
+        return out
+
+    def _fill(self, n):
+        """
+        Decompress data until at least ``n`` bytes following the
+        current position are buffered (or the end of the file is
+        reached).  Any data before the current position is discarded.
+        """
+        # Skip any data between the buffer and the current position.
+        while self._dpos < self._pos:
+            out = self._decompress_chunk()
+            if out is None:
+                return
+            self._buf = out[len(out)-max(0, self._dpos-self._pos):]
+            self._bufpos = self._dpos - len(self._buf)
+        if self._dpos - self._pos >= n:
+            return
+        parts = [self._buf[self._pos-self._bufpos:]]
+        avail = len(parts[0])
+        while avail < n:
+            out = self._decompress_chunk()
+            if out is None:
+                break
+            parts.append(out)
+            avail += len(out)
+        self._buf = ''.join(parts)
+        self._bufpos = self._pos
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = sys.maxint
+        self._fill(size)
+        start = self._pos - self._bufpos
+        data = self._buf[start:start+size]
+        self._pos += len(data)
+        return data
+
+    def readline(self, size=-1):
+        if size is None or size < 0:
+            size = sys.maxint
+        self._fill(0) # make sure the buffer contains our position
+        searched = 0
+        while True:
+            start = self._pos - self._bufpos
+            end = self._buf.find('\n', start+searched, start+size)
+            if end >= 0:
+                end += 1
+                break
+            searched = len(self._buf) - start
+            if searched >= size:
+                end = start + size
+                break
+            self._fill(searched + self.CHUNK)
+            if self._dpos - self._pos <= searched:
+                end = len(self._buf) # end of file
+                break
+        line = self._buf[self._pos-self._bufpos:end]
+        self._pos += len(line)
+        return line
+
+    def readlines(self, sizehint=None):
+        return list(iter(self.readline, ''))
+
+    def next(self):
+        line = self.readline()
+        if line: return line
+        raise StopIteration
+
+    def __iter__(self):
+        return self
+
+    def xreadlines(self):
+        return self
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self.size()
+        elif whence != 0:
+            raise ValueError('Bad whence argument')
+        if offset < 0:
+            raise IOError('Negative seek')
+        if not self._bufpos <= offset <= self._dpos:
+            # Resume from the nearest seek point, unless we can get
+            # there sooner by decompressing forwards.
+            point = self._index.find(offset)
+            if offset < self._bufpos or point[0] > self._dpos:
+                self._restore(point)
+        self._pos = offset
+
+    def tell(self):
+        return self._pos
+
+    def size(self):
+        """
+        :return: The size of the uncompressed data.  If it is not yet
+            known, then the data is decompressed to the end (without
+            changing the current position).
+        """
+        if self._index.size is None:
+            pos = self._pos
+            self._pos = sys.maxint
+            self._fill(0)
+            self.seek(pos)
+        return self._index.size
+
+    @property
+    def closed(self):
+        return self._fileobj.closed
+
+    @property
+    def mode(self):
+        return 'rb'
+
+    def close(self):
+        self._fileobj.close()
+
+
 class GzipFileSystemPathPointer(FileSystemPathPointer):
     """
     A subclass of ``FileSystemPathPointer`` that identifies a gzip-compressed
     file located at a given absolute path.  ``GzipFileSystemPathPointer`` is
     appropriate for loading large gzip-compressed pickle objects efficiently.
+
+    The streams returned by ``open()`` are ``IndexedGzipFile`` objects,
+    which share the seek points of each file, so random access into
+    the file does not decompress it from the start each time.
     """
+    save_seek_index = False
+    """If true, then the uncompressed size and member seek points of
+       each gzip file are saved alongside it (with the suffix
+       ``.seekidx``) once it has been read to the end.  Any saved seek
+       index that is still valid is used, whether or not this is set."""
+
     def open(self, encoding=None):
-        stream = BufferedGzipFile(self._path, 'rb')
+        stream = IndexedGzipFile(self._path, index=self._seek_index())
         if encoding:
             stream = SeekableUnicodeStreamReader(stream, encoding)
         return stream
 
+    def _seek_index(self):
+        return _gzip_seek_index(self._path, self.save_seek_index)
+
+    def file_size(self):
+        """
+        Return the size of the uncompressed contents of the file, in
+        bytes.  (The size in a gzip file's trailer is only reliable
+        for small, single-member files, so unless the file has a saved
+        seek index, it is decompressed to find its size.)  The size
+        is remembered until the file is modified.
+        """
+        key = _gzip_key(self._path)
+        size = _gzip_sizes.get(key)
+        if size is None:
+            index = self._seek_index()
+            if index.size is None:
+                stream = IndexedGzipFile(self._path, index=index)
+                try:
+                    stream.size()
+                finally:
+                    stream.close()
+            size = _gzip_sizes[key] = index.size
+        return size
+
 
 class ZipFilePathPointer(PathPointer):
     """
@@ -308,7 +735,7 @@ class ZipFilePathPointer(PathPointer):
         does not contain the specified entry.
         """
         if isinstance(zipfile, basestring):
-            zipfile = OpenOnDemandZipFile(os.path.abspath(zipfile))
+            zipfile = OpenOnDemandZipFile.get(os.path.abspath(zipfile))
 
         # Normalize the entry string:
         entry = re.sub('(^|/)/+', r'\1', entry)
@@ -351,7 +778,7 @@ class ZipFilePathPointer(PathPointer):
         data = self._zipfile.read(self._entry)
         stream = StringIO(data)
         if self._entry.endswith('.gz'):
-            stream = BufferedGzipFile(self._entry, fileobj=stream)
+            stream = IndexedGzipFile(self._entry, fileobj=stream)
         elif encoding is not None:
             stream = SeekableUnicodeStreamReader(stream, encoding)
         return stream
@@ -374,11 +801,226 @@ class ZipFilePathPointer(PathPointer):
 # Access Functions
 ######################################################################
 
-# Don't use a weak dictionary, because in the common case this
-# causes a lot more reloading that necessary.
-_resource_cache = {}
-"""A dictionary used to cache resources so that they won't
-   need to be loaded more than once."""
+class ResourceCache(object):
+    """
+    The cache used by ``load()`` so that resources won't need to be
+    loaded more than once.  Resources are held (by strong references)
+    in a least recently used cache, whose total size can be bounded by
+    ``maxsize``.  (Don't rely on weak references alone, because in the
+    common case this causes a lot more reloading than necessary.)  When
+    the cache is full, the least recently used resources are dropped;
+    but a dropped resource that is still in use elsewhere is found
+    again, through a weak reference, rather than reloaded.  Pinned
+    resources are never dropped, and do not count towards ``maxsize``.
+
+    The size of a resource is the number of (uncompressed) bytes it was
+    loaded from, which is only a rough guide to the memory it uses.
+
+    The cache also records, for each resource, its size, how long it
+    took to load, how many times it was loaded and how many times it
+    was found in the cache; see ``info()``.
+
+        >>> import os, tempfile
+        >>> from nltk.data import ResourceCache
+        >>> cache = ResourceCache(maxsize=10)
+        >>> cache.put('a', set('A'), size=6)
+        >>> cache.put('b', 'B', size=4)
+        >>> cache.pin('a')
+        >>> cache.put('c', 'C', size=8)
+        >>> cache.get('a'), cache.get('b'), cache.get('c')
+        (set(['A']), None, 'C')
+        >>> info = cache.info()
+        >>> info['size'], info['pinned_size'], info['hits'], info['misses']
+        (8, 6, 2, 1)
+        >>> info['resources']['b']['cached'], info['resources']['a']['pinned']
+        (False, True)
+
+    A resource that is dropped while it is still in use is not loaded
+    again:
+
+        >>> cache.unpin('a')
+        >>> a = cache.get('a')
+        >>> cache.put('d', 'D', size=8)
+        >>> cache.info()['size'], cache.get('a')
+        (8, set(['A']))
+
+    A resource that is too large for the cache can still be pinned,
+    given its value:
+
+        >>> cache.put('e', 'E', size=20)
+        >>> cache.get('e') is None
+        True
+        >>> cache.pin('e', 'E')
+        >>> cache.get('e'), cache.info()['pinned_size']
+        ('E', 20)
+
+    ``load()`` uses a single ``ResourceCache``, which is controlled by
+    the module functions ``clear_cache()``, ``set_cache_size()``,
+    ``pin()``, ``unpin()`` and ``cache_info()``:
+
+        >>> import nltk.data
+        >>> fd, path = tempfile.mkstemp(suffix='.cfg')
+        >>> os.write(fd, "S -> 'a'\\n"); os.close(fd)
+        9
+        >>> url = 'file:' + path
+        >>> grammar = nltk.data.pin(url)
+        >>> nltk.data.clear_cache()
+        >>> nltk.data.load(url) is grammar
+        True
+        >>> stats = nltk.data.cache_info()['resources'][url]
+        >>> stats['size'], stats['loads'], stats['hits'], stats['pinned']
+        (9, 1, 1, True)
+        >>> nltk.data.clear_cache(url)
+        >>> os.remove(path)
+    """
+    def __init__(self, maxsize=None):
+        """
+        :param maxsize: The maximum total size, in bytes, of the
+            resources that are not pinned; or None for no limit.
+        """
+        self._lru = LRUCache(maxsize, sizeof=lambda entry: entry[1])
+        self._pinned = {}
+        self._weak = weakref.WeakValueDictionary()
+        self._stats = {}
+        self.hits = self.misses = 0
+
+    def _get_maxsize(self):
+        return self._lru.maxsize
+    def _set_maxsize(self, maxsize):
+        self._lru.maxsize = maxsize
+        while maxsize is not None and self._lru.currsize > maxsize:
+            del self._lru[self._lru.keys()[0]]
+    maxsize = property(_get_maxsize, _set_maxsize, doc="""
+        The maximum total size, in bytes, of the resources that are
+        not pinned; or None for no limit.""")
+
+    def get(self, resource_url):
+        """
+        Return the cached value of the given resource, or None if it
+        is not cached.
+        """
+        entry = self._pinned.get(resource_url) or self._lru.get(resource_url)
+        if entry is not None:
+            value = entry[0]
+        else:
+            value = self._weak.get(resource_url)
+            if value is None:
+                self.misses += 1
+                return None
+            # It's still in use: put it back in the cache.
+            self._lru[resource_url] = (value,
+                                       self._stats[resource_url]['size'])
+        self.hits += 1
+        self._stats[resource_url]['hits'] += 1
+        return value
+
+    def put(self, resource_url, value, size=0, load_time=0.0):
+        """
+        Add a resource to the cache.
+
+        :param size: The size of the resource, in bytes.
+        :param load_time: The time it took to load the resource, in
+            seconds.
+        """
+        stats = self._stats.setdefault(
+            resource_url, dict(size=0, load_time=0.0, loads=0, hits=0))
+        stats['size'] = size
+        stats['load_time'] = load_time
+        stats['loads'] += 1
+        if resource_url in self._pinned:
+            self._pinned[resource_url] = (value, size)
+        else:
+            self._lru[resource_url] = (value, size)
+        try:
+            self._weak[resource_url] = value
+        except TypeError:
+            pass # e.g., strings and tuples
+
+    def pin(self, resource_url, value=None):
+        """
+        Keep the given (cached) resource in the cache until it is
+        unpinned or removed.
+
+        :param value: The value of the resource, if it has been loaded
+            but may have been dropped from the cache since (e.g.,
+            because it is larger than ``maxsize``).
+        :raise KeyError: If the resource is not in the cache, and no
+            value is given.
+        """
+        if resource_url in self._pinned:
+            return
+        entry = self._lru.get(resource_url)
+        if entry is not None:
+            del self._lru[resource_url]
+        else:
+            if value is None:
+                value = self._weak.get(resource_url)
+            if value is None:
+                raise KeyError(resource_url)
+            stats = self._stats.get(resource_url, {})
+            entry = (value, stats.get('size', 0))
+        self._pinned[resource_url] = entry
+
+    def unpin(self, resource_url):
+        """
+        Allow the given resource to be dropped from the cache again.
+        """
+        entry = self._pinned.pop(resource_url, None)
+        if entry is not None:
+            self._lru[resource_url] = entry
+
+    def remove(self, resource_url):
+        """
+        Remove the given resource from the cache (even if it is pinned).
+        """
+        self._pinned.pop(resource_url, None)
+        if resource_url in self._lru:
+            del self._lru[resource_url]
+        self._weak.pop(resource_url, None)
+
+    def clear(self):
+        """
+        Remove all resources that are not pinned from the cache.
+        """
+        self._lru.clear()
+        for resource_url in self._weak.keys():
+            if resource_url not in self._pinned:
+                self._weak.pop(resource_url, None)
+
+    def __contains__(self, resource_url):
+        return (resource_url in self._pinned or resource_url in self._lru
+                or resource_url in self._weak)
+
+    def info(self):
+        """
+        Return a dictionary describing the cache: the number of lookups
+        that found (``hits``) or did not find (``misses``) a resource;
+        the total size of the unpinned resources (``size``) and its
+        limit (``maxsize``); the total size of the pinned resources
+        (``pinned_size``); and, for each resource that has been loaded
+        (``resources``), a dictionary giving its ``size``, ``load_time``,
+        number of ``loads`` and ``hits``, and whether it is ``cached``
+        and ``pinned``.
+
+        :rtype: dict
+        """
+        resources = {}
+        for resource_url, stats in self._stats.items():
+            stats = dict(stats, cached=resource_url in self,
+                         pinned=resource_url in self._pinned)
+            resources[resource_url] = stats
+        return dict(hits=self.hits, misses=self.misses,
+                    size=self._lru.currsize, maxsize=self.maxsize,
+                    pinned_size=sum(size for (value, size)
+                                    in self._pinned.values()),
+                    resources=resources)
+
+    def __repr__(self):
+        return '<ResourceCache with %d resources (%d pinned)>' % (
+            len(self._lru) + len(self._pinned), len(self._pinned))
+
+_resource_cache = ResourceCache()
+"""The cache used by ``load()``."""
 
 def find(resource_name):
     """
@@ -534,8 +1176,15 @@ AUTO_FORMATS = {
     'logic': 'logic',
     'val': 'val'}
 
+shared_image_dir = os.environ.get('NLTK_SHARED_IMAGES') or (
+    os.path.join(os.path.expanduser('~/'), 'nltk_data', 'shared_images'))
+"""The directory where ``load()`` writes the shared images of resources
+   that are loaded with ``shared=True``.  By default, this is the
+   directory given by the ``NLTK_SHARED_IMAGES`` environment variable,
+   or ``nltk_data/shared_images`` in the user's home directory."""
+
 def load(resource_url, format='auto', cache=True, verbose=False,
-         logic_parser=None, fstruct_parser=None):
+         logic_parser=None, fstruct_parser=None, shared=False):
     """
     Load a given resource from the NLTK data package.  The following
     resource formats are currently supported:
@@ -561,9 +1210,11 @@ def load(resource_url, format='auto', cache=True, verbose=False,
     :type cache: bool
     :param cache: If true, add this resource to a cache.  If load()
         finds a resource in its cache, then it will return it from the
-        cache rather than loading it.  The cache uses weak references,
-        so a resource wil automatically be expunged from the cache
-        when no more objects are using it.
+        cache rather than loading it.  The cache keeps resources until
+        they are removed with ``clear_cache()``, or (if its size is
+        limited with ``set_cache_size()``) until they are the least
+        recently used; resources can be kept in the cache regardless
+        with ``pin()``.  See also ``cache_info()``.
     :type verbose: bool
     :param verbose: If true, print a message when loading a resource.
         Messages are not displayed when a resource is retrieved from
@@ -574,6 +1225,16 @@ def load(resource_url, format='auto', cache=True, verbose=False,
     :type fstruct_parser: FeatStructParser
     :param fstruct_parser: The parser that will be used to parse the
         feature structure of an fcfg.
+    :type shared: bool
+    :param shared: If true, load a pickled resource through a shared,
+        read-only image of it (see ``nltk.sharedimage``), which is
+        written to ``shared_image_dir`` if it does not exist or is out
+        of date.  The resource's large components (numpy arrays, and
+        sets and dictionaries of strings) are memory-mapped from the
+        image, so that all of the processes that load the resource in
+        this way share one copy of them, and do not need to unpickle
+        them.  If the resource is already in the cache, then the
+        cached copy is returned.
     """
     # If we've cached the resource, then just return it.
     if cache:
@@ -600,45 +1261,106 @@ def load(resource_url, format='auto', cache=True, verbose=False,
                              'argument to specify the format explicitly.'
                              % resource_url)
 
+    if format not in FORMATS:
+        raise ValueError('Unknown format type!')
+    if shared and format != 'pickle':
+        raise ValueError('Only pickled resources can be loaded shared')
+
     # Load the resource.
-    if format == 'pickle':
-        resource_val = pickle.load(_open(resource_url))
+    start_time = time.time()
+    stream = None if shared else _open(resource_url)
+    if shared:
+        resource_val, size = _load_shared(resource_url)
+    elif format == 'pickle':
+        resource_val = pickle.load(stream)
     elif format == 'yaml':
         import yaml
-        resource_val = yaml.load(_open(resource_url))
+        resource_val = yaml.load(stream)
     elif format == 'cfg':
-        resource_val = nltk.grammar.parse_cfg(_open(resource_url).read())
+        resource_val = nltk.grammar.parse_cfg(stream.read())
     elif format == 'pcfg':
-        resource_val = nltk.grammar.parse_pcfg(_open(resource_url).read())
+        resource_val = nltk.grammar.parse_pcfg(stream.read())
     elif format == 'fcfg':
-        resource_val = nltk.grammar.parse_fcfg(_open(resource_url).read(),
+        resource_val = nltk.grammar.parse_fcfg(stream.read(),
                                       logic_parser=logic_parser,
                                       fstruct_parser=fstruct_parser)
     elif format == 'fol':
-        resource_val = nltk.sem.parse_logic(_open(resource_url).read(),
+        resource_val = nltk.sem.parse_logic(stream.read(),
                                        logic_parser=nltk.sem.logic.LogicParser())
     elif format == 'logic':
-        resource_val = nltk.sem.parse_logic(_open(resource_url).read(),
+        resource_val = nltk.sem.parse_logic(stream.read(),
                                        logic_parser=logic_parser)
     elif format == 'val':
-        resource_val = nltk.sem.parse_valuation(_open(resource_url).read())
+        resource_val = nltk.sem.parse_valuation(stream.read())
     elif format == 'raw':
-        resource_val = _open(resource_url).read()
-    else:
-        assert format not in FORMATS
-        raise ValueError('Unknown format type!')
+        resource_val = stream.read()
 
     # If requested, add it to the cache.
     if cache:
-        try:
-            _resource_cache[resource_url] = resource_val
-        except TypeError:
-            # We can't create weak references to some object types, like
-            # strings and tuples.  For now, just don't cache them.
-            pass
+        # The number of bytes read is a rough guide to its size.
+        if not shared:
+            try:
+                size = stream.tell()
+            except (AttributeError, IOError):
+                size = 0
+        _resource_cache.put(resource_url, resource_val, size,
+                            time.time()-start_time)
 
     return resource_val
 
+def _load_shared(resource_url):
+    """
+    Load a pickled resource through its shared image, writing the image
+    first if necessary.  If the image can't be written, then the
+    resource is loaded as usual.
+
+    :return: The resource, and the size of its image (or, if it was
+        loaded as usual, the number of bytes read).
+    """
+    from nltk import sharedimage
+    source = _resource_source(resource_url)
+    image_path = os.path.join(shared_image_dir,
+                              sha1(resource_url).hexdigest() + '.shim')
+    try:
+        return (sharedimage.read_image(image_path, source),
+                os.path.getsize(image_path))
+    except (EnvironmentError, ValueError, EOFError, struct.error,
+            pickle.UnpicklingError):
+        pass
+
+    stream = _open(resource_url)
+    resource_val = pickle.load(stream)
+    try:
+        if not os.path.isdir(shared_image_dir):
+            os.makedirs(shared_image_dir)
+        sharedimage.write_image(image_path, resource_val, source)
+        return (sharedimage.read_image(image_path, source),
+                os.path.getsize(image_path))
+    except (EnvironmentError, pickle.PicklingError):
+        try:
+            size = stream.tell()
+        except (AttributeError, IOError):
+            size = 0
+        return resource_val, size
+
+def _resource_source(resource_url):
+    """
+    :return: A value that changes whenever the given resource does: its
+        URL, and the size and modification time of the file that holds
+        it (if it is a local file).
+    """
+    protocol, path = re.match('(?:(\w+):)?(.*)', resource_url).groups()
+    if protocol is None or protocol.lower() == 'nltk':
+        pointer = find(path)
+        if isinstance(pointer, ZipFilePathPointer):
+            path = pointer.zipfile.filename
+        else:
+            path = pointer.path
+    elif protocol.lower() != 'file':
+        return (resource_url, None, None)
+    stat = os.stat(path)
+    return (resource_url, stat.st_size, stat.st_mtime)
+
 def show_cfg(resource_url, escape='##'):
     """
     Write out a grammar file, ignoring escaped and empty lines.
@@ -658,12 +1380,57 @@ def show_cfg(resource_url, escape='##'):
         print l
 
 
-def clear_cache():
+def clear_cache(resource_url=None):
     """
-    Remove all objects from the resource cache.
-    :see: load()
+    Remove the given resource from the resource cache; or, if no
+    resource is given, remove all resources that are not pinned.
+    :see: load(), pin()
     """
-    _resource_cache.clear()
+    if resource_url is None:
+        _resource_cache.clear()
+    else:
+        _resource_cache.remove(resource_url)
+
+def pin(resource_url, **kwargs):
+    """
+    Load the given resource (from the resource cache, if possible),
+    and keep it in the cache until it is unpinned or removed with
+    ``clear_cache(resource_url)``.  This is useful for resources (such
+    as tagger models) that should stay loaded in long-running
+    programs, however many other resources are loaded.
+
+    :param kwargs: Keyword arguments for ``load()``.
+    :return: The resource.
+    """
+    resource_val = load(resource_url, cache=True, **kwargs)
+    _resource_cache.pin(resource_url, resource_val)
+    return resource_val
+
+def unpin(resource_url):
+    """
+    Allow a pinned resource to be dropped from the resource cache
+    again.
+    :see: pin()
+    """
+    _resource_cache.unpin(resource_url)
+
+def set_cache_size(maxsize):
+    """
+    Limit the total size, in bytes, of the resources that are kept in
+    the resource cache (not counting pinned resources); or, if
+    ``maxsize`` is None, remove the limit.  The size of a resource is
+    the number of bytes it was loaded from.
+    """
+    _resource_cache.maxsize = maxsize
+
+def cache_info():
+    """
+    Return a dictionary describing the use of the resource cache, and
+    the resources that have been loaded.  See ``ResourceCache.info()``.
+
+    :rtype: dict
+    """
+    return _resource_cache.info()
 
 def _open(resource_url):
     """
@@ -731,19 +1498,87 @@ class OpenOnDemandZipFile(zipfile.ZipFile):
     ``OpenOnDemandZipFile`` must be constructed from a filename, not a
     file-like object (to allow re-opening).  ``OpenOnDemandZipFile`` is
     read-only (i.e. ``write()`` and ``writestr()`` are disabled.
+
+    Recently read entries are kept (decompressed) in memory, so that
+    re-opening an entry does not decompress it again; and ``get()``
+    returns a shared ``OpenOnDemandZipFile`` for each of the most
+    recently used zip files, so that its directory is not read again
+    every time it is used.  ``read()`` may be called from several
+    threads at once.
     """
+    entry_cache_size = 2**24
+    """The maximum total size, in bytes, of the decompressed entries
+       that are kept in memory (for all zip files together)."""
+
+    pool_size = 64
+    """The maximum number of shared zip files that ``get()`` keeps."""
+
+    _pool = LRUCache(pool_size)
+    """The shared zip files returned by ``get()``, keyed by filename."""
+
+    _entries = LRUCache(entry_cache_size, sizeof=len)
+    """The recently read entries of all zip files, keyed by
+       ``(filename, stamp, name)``."""
+
+    _cache_lock = threading.Lock()
+    """A lock that guards ``_pool`` and ``_entries``."""
+
     def __init__(self, filename):
         if not isinstance(filename, basestring):
             raise TypeError('ReopenableZipFile filename must be a string')
         zipfile.ZipFile.__init__(self, filename)
         assert self.filename == filename
         self.close()
+        stat = os.stat(filename)
+        self._stamp = (stat.st_size, stat.st_mtime)
+        self._read_lock = threading.Lock()
+
+    @classmethod
+    def get(cls, filename):
+        """
+        Return a shared ``OpenOnDemandZipFile`` for ``filename``.  A
+        new one is created if the file has changed since the shared
+        one was created.
+        """
+        stat = os.stat(filename)
+        cls._cache_lock.acquire()
+        try:
+            cls._pool.maxsize = cls.pool_size
+            zf = cls._pool.get(filename)
+            if zf is None or zf._stamp != (stat.st_size, stat.st_mtime):
+                zf = cls._pool[filename] = cls(filename)
+            return zf
+        finally:
+            cls._cache_lock.release()
 
     def read(self, name):
-        assert self.fp is None
-        self.fp = open(self.filename, 'rb')
-        value = zipfile.ZipFile.read(self, name)
-        self.close()
+        key = (self.filename, self._stamp, name)
+        self._cache_lock.acquire()
+        try:
+            value = self._entries.get(key)
+        finally:
+            self._cache_lock.release()
+        if value is not None:
+            return value
+        # The file pointer is only open while an entry is read, so
+        # only one thread may read at a time.
+        self._read_lock.acquire()
+        try:
+            assert self.fp is None
+            self.fp = open(self.filename, 'rb')
+            try:
+                value = zipfile.ZipFile.read(self, name)
+            finally:
+                self.close()
+        finally:
+            self._read_lock.release()
+        self._cache_lock.acquire()
+        try:
+            self._entries.maxsize = self.entry_cache_size
+            if len(value) <= self.entry_cache_size:
+                self._entries[key] = value
+        finally:
+            self._cache_lock.release()
         return value
 
     def write(self, *args, **kwargs):
@@ -1185,8 +2020,285 @@ class SeekableUnicodeStreamReader(object):
 
         return None
 
+######################################################################
+# Memory-mapped Stream Reader
+######################################################################
+
+class MmapStreamReader(object):
+    """
+    A stream reader for a local file that reads the file through a
+    memory map.  It supports the same read, ``seek()`` and ``tell()``
+    operations as ``SeekableUnicodeStreamReader`` (returning unicode
+    strings if an encoding is given, and byte strings otherwise); but
+    since the whole file is addressable, each line is sliced directly
+    from the map and decoded just once, and ``tell()`` never needs to
+    re-decode any text.
+
+    Only encodings in which a line ending is always encoded by the
+    same bytes as in ASCII, and whose decoders are stateless, are
+    supported (see ``supports_encoding()``).  Decoding is always
+    strict.
+
+        >>> import tempfile
+        >>> fd, path = tempfile.mkstemp()
+        >>> os.write(fd, u'caf\\xe9\\nna\\xefve\\r\\nend'.encode('utf-8'))
+        17
+        >>> os.close(fd)
+        >>> stream = MmapStreamReader(path, 'utf-8')
+        >>> stream.readline(), stream.tell()
+        (u'caf\\xe9\\n', 6)
+        >>> stream.readlines()
+        [u'na\\xefve\\r\\n', u'end']
+        >>> stream.seek(6); stream.read(4)
+        u'na\\xef'
+        >>> stream.close(); os.remove(path)
+    """
+    _MAX_CHAR_BYTES = 4
+    """The maximum number of bytes used to encode one character."""
+
+    def __init__(self, path, encoding=None):
+        """
+        :param path: The path of the file to read.
+        :param encoding: The encoding of the file's contents, or None
+            to read byte strings.
+        :raise ValueError: If the encoding is not supported.
+        """
+        if not self.supports_encoding(encoding):
+            raise ValueError('MmapStreamReader does not support the '
+                             '%s encoding' % encoding)
+        self.stream = open(path, 'rb')
+        """The underlying file."""
+
+        self.encoding = encoding
+        """The name of the encoding used to decode the file, or None."""
+
+        if os.fstat(self.stream.fileno()).st_size == 0:
+            # Empty files can't be mapped (but a string will do).
+            self._map = ''
+        else:
+            self._map = mmap.mmap(self.stream.fileno(), 0,
+                                  access=mmap.ACCESS_READ)
+        self._pos = 0
+        if encoding is None:
+            self._decode = None
+            self._bom = 0
+        else:
+            self._decode = codecs.getdecoder(encoding)
+            self._bom = 0
+            if (codecs.lookup(encoding).name == 'utf-8' and
+                self._map[:3] == codecs.BOM_UTF8):
+                self._bom = 3
+
+    @staticmethod
+    def supports_encoding(encoding):
+        """
+        :return: True if ``MmapStreamReader`` can read files that use
+            ``encoding`` (which may be None, for byte strings).
+        :rtype: bool
+        """
+        if encoding is None:
+            return True
+        try:
+            name = codecs.lookup(encoding).name
+        except LookupError:
+            return False
+        return (name in ('utf-8', 'ascii') or name.startswith('iso8859') or
+                re.match(r'cp125\d$', name) is not None)
+
+    #/////////////////////////////////////////////////////////////////
+    # Read methods
+    #/////////////////////////////////////////////////////////////////
+
+    def read(self, size=None):
+        """
+        Read up to ``size`` bytes (or, if it is not specified, the
+        rest of the file), and return them decoded.
+        """
+        self._skip_bom()
+        if size is None:
+            end = len(self._map)
+        else:
+            end = min(self._pos + size, len(self._map))
+        return self._consume(end, size is not None)
+
+    def readline(self, size=None):
+        """
+        Read a line of text (or, if ``size`` is specified, at most
+        ``size`` bytes of it), and return it decoded.
+        """
+        if self._pos == 0:
+            self._pos = self._bom
+        pos, map = self._pos, self._map
+        if size is None:
+            limit = len(map)
+        else:
+            limit = min(pos + size, len(map))
+        end = map.find('\n', pos, limit) + 1 or limit
+        data = map[pos:end]
+        if self._decode is None:
+            # Like file.readline(), only split on '\n'.
+            self._pos = end
+            return data
+
+        # Check for a '\r' line ending (which may be followed by a
+        # '\n', even if it's past the limit).
+        cr = data.find('\r')
+        if cr >= 0:
+            end = pos + cr + 1
+            if map[end:end+1] == '\n':
+                end += 1
+            data = map[pos:end]
+
+        if size is not None and end == limit and cr < 0:
+            # The limit may fall inside a character.
+            line = self._consume(end, True)
+        else:
+            line = self._decode(data)[0]
+            self._pos = end
+        # Unicode has a few other line separators (e.g. u'\u2028');
+        # in the rare case that the line contains one, stop there.
+        lines = line.splitlines(True)
+        if len(lines) > 1:
+            line = lines[0]
+            self._pos = pos + len(line.encode(self.encoding))
+        return line
+
+    def readlines(self, sizehint=None, keepends=True):
+        """
+        Read the rest of the file, and return it as a list of lines.
+
+        :param sizehint: Ignored.
+        :param keepends: If false, then strip newlines.
+        """
+        return self.read().splitlines(keepends)
+
+    def next(self):
+        """Return the next decoded line from the underlying stream."""
+        line = self.readline()
+        if line: return line
+        else: raise StopIteration
+
+    def __iter__(self):
+        """Return self"""
+        return self
+
+    def xreadlines(self):
+        """Return self"""
+        return self
+
+    #/////////////////////////////////////////////////////////////////
+    # Pass-through methods & properties
+    #/////////////////////////////////////////////////////////////////
+
+    @property
+    def closed(self):
+        """True if the underlying stream is closed."""
+        return self.stream.closed
+
+    @property
+    def name(self):
+        """The name of the underlying stream."""
+        return self.stream.name
+
+    @property
+    def mode(self):
+        """The mode of the underlying stream."""
+        return self.stream.mode
+
+    def close(self):
+        """
+        Close the memory map and the underlying stream.
+        """
+        if not isinstance(self._map, str):
+            self._map.close()
+        self.stream.close()
+
+    #/////////////////////////////////////////////////////////////////
+    # Seek and tell
+    #/////////////////////////////////////////////////////////////////
+
+    def seek(self, offset, whence=0):
+        """
+        Move the stream to a new byte position.
+
+        :param whence: If 0, then the offset is from the start of the
+            file; if 1, then from the current position; and if 2, then
+            from the end of the file.
+        """
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += len(self._map)
+        self._pos = max(0, offset)
+
+    def char_seek_forward(self, offset):
+        """
+        Move the read pointer forward by ``offset`` characters.
+        """
+        if offset < 0:
+            raise ValueError('Negative offsets are not supported')
+        self._skip_bom()
+        if self._decode is None:
+            self._pos += offset
+            return
+        end = self._pos + offset*self._MAX_CHAR_BYTES
+        chars = self._decode_to(end)[0]
+        self._pos += len(chars[:offset].encode(self.encoding))
+
+    def tell(self):
+        """
+        Return the current byte position in the file.
+        """
+        return self._pos
+
+    #/////////////////////////////////////////////////////////////////
+    # Helper methods
+    #/////////////////////////////////////////////////////////////////
+
+    def _skip_bom(self):
+        if self._pos == 0:
+            self._pos = self._bom
+
+    def _consume(self, end, partial):
+        """
+        Return the decoded text from the current position to ``end``,
+        and move past it.  If ``end`` may fall inside a character (as
+        indicated by ``partial``), then stop before that character.
+        """
+        if self._decode is None:
+            text = self._map[self._pos:end]
+            self._pos = max(self._pos, end)
+            return text
+        if not partial:
+            text = self._decode(self._map[self._pos:end])[0]
+            self._pos = max(self._pos, end)
+            return text
+        chars, consumed = self._decode_to(end)
+        # Always return at least one character, if there is one.
+        while not chars and end < len(self._map):
+            end += 1
+            chars, consumed = self._decode_to(end)
+        self._pos += consumed
+        return chars
+
+    def _decode_to(self, end):
+        """
+        Decode the bytes from the current position up to ``end``,
+        ignoring a character that is truncated at ``end``.  Return a
+        tuple ``(chars, num_consumed)``.
+        """
+        data = self._map[self._pos:end]
+        try:
+            return self._decode(data)
+        except UnicodeDecodeError, exc:
+            if exc.end != len(data):
+                raise
+            return self._decode(data[:exc.start])
+
 __all__ = ['path', 'PathPointer', 'FileSystemPathPointer', 'BufferedGzipFile',
            'GzipFileSystemPathPointer', 'GzipFileSystemPathPointer',
            'find', 'retrieve', 'FORMATS', 'AUTO_FORMATS', 'load',
            'show_cfg', 'clear_cache', 'LazyLoader', 'OpenOnDemandZipFile',
-           'GzipFileSystemPathPointer', 'SeekableUnicodeStreamReader']
+           'GzipFileSystemPathPointer', 'SeekableUnicodeStreamReader',
+           'MmapStreamReader', 'IndexedGzipFile', 'GzipSeekIndex',
+           'ResourceCache', 'pin', 'unpin', 'set_cache_size', 'cache_info']
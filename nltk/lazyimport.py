@@ -15,6 +15,9 @@
     or contact the author. All Rights Reserved.
 """
 
+import sys
+from types import ModuleType
+
 ### Constants
 
 _debug = 0
@@ -139,3 +142,121 @@ class LazyModule:
 
     def __repr__(self):
         return "<LazyModule '%s'>" % self.__name__
+
+### Lazy packages
+
+class LazyPackage(ModuleType):
+
+    """ Lazy package class.
+
+        A LazyPackage replaces a package's module object (in
+        sys.modules), so that the names which the package exports
+        from its modules, and the modules themselves, are only
+        imported when they are first requested:
+
+        - exports maps each exported name to the (relative) name of
+          the module that it is imported from (or of the package that
+          it is a submodule of); and
+
+        - every other attribute that the package does not define is
+          looked up as a submodule of the package.
+
+        Imported values are then stored in the package's namespace,
+        so that later lookups are as fast as for any other module.
+        If an import fails, then AttributeError is raised (as if the
+        name had not been defined).
+
+        Example of turning a package into a lazy package, as the last
+        statement of its __init__.py:
+
+        LazyPackage.install(__name__, {'Week': 'ISO'}, ['ISO'])
+
+    """
+
+    def __init__(self, module, exports, submodules=()):
+
+        """ Create a LazyPackage with the contents of module (the
+            package's original module object).
+
+            exports maps exported names to module names, and
+            submodules lists the names of modules that are part of
+            the package's public interface (see __all__).
+
+        """
+        ModuleType.__init__(self, module.__name__, module.__doc__)
+        self.__dict__.update(module.__dict__)
+        # Keep the original module, whose namespace is the globals of
+        # the functions it defines (and would be cleared if the module
+        # was deleted).
+        self.__dict__['_LazyPackage__module'] = module
+        self.__dict__['_LazyPackage__exports'] = exports
+        self.__dict__['_LazyPackage__submodules'] = tuple(submodules)
+
+    @classmethod
+    def install(cls, name, exports, submodules=()):
+
+        """ Replace the module called name in sys.modules with a
+            LazyPackage, and return it.
+
+        """
+        package = cls(sys.modules[name], exports, submodules)
+        sys.modules[name] = package
+        return package
+
+    def __lazypackage_import(self, module_name):
+
+        """ Import the given submodule, and return it.
+        """
+        full_name = self.__name__ + '.' + module_name
+        if _debug:
+            print 'LazyPackage: Loading module %r' % full_name
+        __import__(full_name)
+        return sys.modules[full_name]
+
+    def __getattr__(self, name):
+
+        """ Import the requested name on demand.
+        """
+        if name.startswith('__'):
+            raise AttributeError(name)
+        module_name = self.__exports.get(name)
+        try:
+            if module_name is None:
+                value = self.__lazypackage_import(name)
+            else:
+                module = self.__lazypackage_import(module_name)
+                try:
+                    value = getattr(module, name)
+                except AttributeError:
+                    # It's a submodule that hasn't been imported yet.
+                    value = self.__lazypackage_import(module_name + '.' +
+                                                      name)
+        except ImportError, e:
+            raise AttributeError('%r module has no attribute %r (%s)' %
+                                 (self.__name__, name, e))
+        setattr(self, name, value)
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(self.__exports) |
+                      set(self.__submodules))
+
+    @property
+    def __all__(self):
+
+        """ The names imported by "from package import *": the
+            exported names and public submodules that can be imported,
+            and the public names that the package defines itself.
+
+        """
+        names = [name for name in self.__dict__ if not name.startswith('_')]
+        for name in list(self.__exports) + list(self.__submodules):
+            try:
+                getattr(self, name)
+            except AttributeError:
+                continue
+            names.append(name)
+        return sorted(set(names))
+
+    def __repr__(self):
+        return "<LazyPackage '%s'>" % self.__name__
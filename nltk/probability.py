@@ -44,11 +44,32 @@ _NINF = float('-1e300')
 
 import math
 import random
+import sys
 import warnings
+from array import array
+from bisect import bisect_left, insort
 from operator import itemgetter
-from itertools import imap, islice
+from itertools import imap, islice, izip, repeat
 from collections import defaultdict
 
+_numpy_module = []
+
+def _numpy():
+    """
+    Return the ``numpy`` module, or None if NumPy is not installed.
+    NumPy is only imported when it is first needed, since importing
+    it is slow.
+    """
+    if not _numpy_module:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy_module.append(numpy)
+    return _numpy_module[0]
+
+from nltk.util import LRUCache
+
 ##//////////////////////////////////////////////////////
 ##  Frequency Distributions
 ##//////////////////////////////////////////////////////
@@ -106,6 +127,15 @@ class FreqDist(dict):
         if samples:
             self.update(samples)
 
+    # If more than this many samples change between two requests for
+    # the frequency-ordered view, it is cheaper to re-sort the whole
+    # distribution than to repair the sorted view one sample at a time.
+    _MAX_PENDING_UPDATES = 1000
+
+    # The attributes that are rebuilt on demand by ``_reset_caches()``,
+    # and so are not pickled.
+    _CACHE_ATTRIBUTES = ('_Nr_cache', '_max_cache', '_item_cache', '_pending')
+
     def inc(self, sample, count=1):
         """
         Increment this FreqDist's count for the given sample.
@@ -132,12 +162,12 @@ class FreqDist(dict):
         :rtype: None
         :raise TypeError: If ``sample`` is not a supported sample type.
         """
-
-        self._N += (value - self.get(sample, 0))
+        old = dict.get(self, sample)
+        self._N += (value - (old or 0))
         dict.__setitem__(self, sample, value)
 
-        # Invalidate the caches
-        self._reset_caches()
+        # Update the caches to reflect the new count
+        self._update_caches(sample, old, value)
 
     def N(self):
         """
@@ -199,19 +229,30 @@ class FreqDist(dict):
             if bins is None: return 0
             else: return bins-self.B()
 
+        Nr = self.Nr_table()
+        if r >= len(Nr): return 0
+        return Nr[r]
+
+    def Nr_table(self):
+        """
+        Return a list mapping each count *r* to the number of samples
+        with that count (the "count of counts" table).  The entry for
+        *r=0* is not meaningful (use ``Nr(0, bins)`` instead).  The
+        list is kept up to date as the counts in this distribution
+        change, and should not be modified.
+
+        :rtype: list(int)
+        """
         # We have to search the entire distribution to find Nr.  Since
         # this is an expensive operation, and is likely to be used
         # repeatedly, cache the results.
         if self._Nr_cache is None:
             self._cache_Nr_values()
-
-        if r >= len(self._Nr_cache): return 0
-        return self._Nr_cache[r]
+        return self._Nr_cache
 
     def _cache_Nr_values(self):
         Nr = [0]
-        for sample in self:
-            c = self.get(sample, 0)
+        for c in dict.itervalues(self):
             if c >= len(Nr):
                 Nr += [0]*(c+1-len(Nr))
             Nr[c] += 1
@@ -270,7 +311,7 @@ class FreqDist(dict):
         if self._max_cache is None:
             if len(self) == 0:
                 raise ValueError('A FreqDist must have at least one sample before max is defined.')
-            self._max_cache = max([(a,b) for (b,a) in self.items()])[1]
+            self._max_cache = max((c, s) for (s, c) in dict.iteritems(self))[1]
         return self._max_cache
 
     def plot(self, *args, **kwargs):
@@ -350,8 +391,57 @@ class FreqDist(dict):
         print
 
     def _sort_keys_by_value(self):
-        if not self._item_cache:
-            self._item_cache = sorted(dict.items(self), key=lambda x:(-x[1], x[0]))
+        """
+        Bring ``_item_cache`` up to date.  ``_item_cache`` is a list of
+        ``(-count, sample)`` pairs, sorted in increasing order (i.e.,
+        by decreasing frequency, with ties broken by sample).  Rather
+        than being discarded whenever a count changes, it is repaired
+        by moving just the samples whose counts have changed since it
+        was last brought up to date (recorded in ``_pending``).
+        """
+        if self._item_cache is None:
+            self._item_cache = sorted((-c, s) for (s, c) in
+                                      dict.iteritems(self))
+        elif self._pending:
+            cache = self._item_cache
+            for sample, old in self._pending.iteritems():
+                if old is not None:
+                    del cache[bisect_left(cache, (-old, sample))]
+                insort(cache, (-dict.__getitem__(self, sample), sample))
+        self._pending = {}
+
+    def _update_caches(self, sample, old, new):
+        """
+        Update the cached values that depend on the count of
+        ``sample``, which has just changed from ``old`` to ``new``
+        (where ``old`` is None if ``sample`` was not previously
+        recorded).
+        """
+        if self._item_cache is not None and sample not in self._pending:
+            if len(self._pending) >= self._MAX_PENDING_UPDATES:
+                self._item_cache = None
+                self._pending = {}
+            else:
+                self._pending[sample] = old
+
+        Nr = self._Nr_cache
+        if Nr is not None:
+            if new < 0 or (old is not None and old < 0):
+                self._Nr_cache = None
+            else:
+                if old is not None:
+                    Nr[old] -= 1
+                if new >= len(Nr):
+                    Nr += [0]*(new+1-len(Nr))
+                Nr[new] += 1
+
+        if self._max_cache is not None:
+            if sample == self._max_cache:
+                if new < old:
+                    self._max_cache = None
+            elif (new, sample) > (dict.__getitem__(self, self._max_cache),
+                                  self._max_cache):
+                self._max_cache = sample
 
     def keys(self):
         """
@@ -360,7 +450,7 @@ class FreqDist(dict):
         :rtype: list(any)
         """
         self._sort_keys_by_value()
-        return map(itemgetter(0), self._item_cache)
+        return map(itemgetter(1), self._item_cache)
 
     def values(self):
         """
@@ -369,7 +459,7 @@ class FreqDist(dict):
         :rtype: list(any)
         """
         self._sort_keys_by_value()
-        return map(itemgetter(1), self._item_cache)
+        return [-c for (c, s) in self._item_cache]
 
     def items(self):
         """
@@ -378,7 +468,7 @@ class FreqDist(dict):
         :rtype: list(tuple)
         """
         self._sort_keys_by_value()
-        return self._item_cache[:]
+        return [(s, -c) for (c, s) in self._item_cache]
 
     def __iter__(self):
         """
@@ -410,8 +500,7 @@ class FreqDist(dict):
 
         :rtype: iter of any
         """
-        self._sort_keys_by_value()
-        return iter(self._item_cache)
+        return iter(self.items())
 
     def copy(self):
         """
@@ -429,13 +518,66 @@ class FreqDist(dict):
         :param samples: The samples to add.
         :type samples: list
         """
-        try:
-            sample_iter = samples.iteritems()
-        except:
-            sample_iter = imap(lambda x: (x,1), samples)
+        if isinstance(samples, FreqDist):
+            # Don't sort the other distribution's samples.
+            sample_iter = dict.iteritems(samples)
+        else:
+            try:
+                sample_iter = samples.iteritems()
+            except:
+                sample_iter = imap(lambda x: (x,1), samples)
         for sample, count in sample_iter:
             self.inc(sample, count=count)
 
+    @classmethod
+    def from_iterable_parallel(cls, shards, func=None, processes=None):
+        """
+        Construct a new frequency distribution by counting the samples
+        in each of ``shards`` in a pool of worker processes, and then
+        merging the counts.  For integer counts, the result is equal
+        to the sequentially built distribution
+        ``FreqDist(chain(*shards))`` (or ``FreqDist(chain(*map(func,
+        shards)))``), regardless of the order in which the workers
+        finish.
+
+            >>> from nltk.probability import FreqDist
+            >>> shards = [['a', 'b', 'a'], ['c', 'a'], ['b']]
+            >>> fdist = FreqDist.from_iterable_parallel(shards, processes=2)
+            >>> fdist == FreqDist('abacab')
+            True
+
+        When counting a corpus, it is usually best to pass a list of
+        fileids as ``shards``, and a function that reads a fileid's
+        samples as ``func``; that way, the corpus is read and decoded
+        by the workers rather than by the calling process.  Because
+        ``func`` is sent to the workers, it must be picklable (e.g., a
+        function defined at the top level of a module).
+
+        If the ``multiprocessing`` module is not available, or
+        ``processes`` is at most one, the shards are counted in this
+        process.
+
+        :param shards: The shards to count.  Each shard is a sequence
+            of samples, or (if ``func`` is given) an argument for
+            ``func``.
+        :type shards: iter
+        :param func: A function that is called (in a worker process)
+            with each shard, and returns the samples in that shard.
+        :type func: function
+        :param processes: The number of worker processes to use.
+            Defaults to the number of CPUs.
+        :type processes: int
+        :rtype: FreqDist
+        """
+        return _count_in_parallel(cls, shards, func, processes)
+
+    def _merge(self, other):
+        """
+        Add the counts recorded by the frequency distribution
+        ``other`` to this frequency distribution.
+        """
+        self.update(other)
+
     def pop(self, other):
         self._N -= 1
         self._reset_caches()
@@ -451,10 +593,25 @@ class FreqDist(dict):
         self._reset_caches()
         dict.clear(self)
 
+    def __reduce__(self):
+        # Pickle the counts as a plain dict, so that unpickling does
+        # not call __setitem__ (and update the caches) once per sample.
+        state = dict((name, value) for (name, value)
+                     in self.__dict__.iteritems()
+                     if name not in self._CACHE_ATTRIBUTES)
+        return (_unpickle_freqdist, (self.__class__, dict(self)), state)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # The caches are rebuilt on demand (and pickles written by
+        # older versions of NLTK store them in a different format).
+        self._reset_caches()
+
     def _reset_caches(self):
         self._Nr_cache = None
         self._max_cache = None
         self._item_cache = None
+        self._pending = {}
 
     def __add__(self, other):
         clone = self.copy()
@@ -496,6 +653,461 @@ class FreqDist(dict):
     def __getitem__(self, sample):
         return self.get(sample, 0)
 
+def _iter_counts(fdist):
+    """
+    Return an iterator over the ``(sample, count)`` pairs of the given
+    frequency distribution, in arbitrary order (and so without sorting
+    them, as ``FreqDist.iteritems()`` does).
+    """
+    if isinstance(fdist, FreqDist):
+        return dict.iteritems(fdist)
+    return fdist.iteritems()
+
+def _counts_of(fdist, samples):
+    """
+    Return a list of the counts of the given samples in the given
+    frequency distribution.
+    """
+    if isinstance(fdist, FreqDist):
+        # FreqDist.get is dict.get, so this loop runs in C.
+        return list(imap(fdist.get, samples, repeat(0)))
+    return map(fdist.__getitem__, samples)
+
+def _unpickle_freqdist(cls, counts):
+    fdist = cls()
+    dict.update(fdist, counts)
+    return fdist
+
+class SampleIndex(object):
+    """
+    A one-to-one mapping between samples and consecutive integer ids,
+    starting at zero.  A ``SampleIndex`` is used by ``CompactFreqDist``
+    to intern its samples; it can be shared by several distributions
+    (e.g., the unigram, bigram and trigram tables of a language model),
+    so that each sample is stored only once.
+
+        >>> from nltk.probability import SampleIndex
+        >>> index = SampleIndex(['the', 'cat'])
+        >>> index.intern('sat'), index.intern('the')
+        (2, 0)
+        >>> index.lookup('dog') is None
+        True
+        >>> index[1]
+        'cat'
+    """
+    def __init__(self, samples=()):
+        """
+        Construct a new sample index, and intern each of ``samples``.
+
+        :param samples: The samples to add to the index.
+        :type samples: iter
+        """
+        self._ids = {}
+        self._samples = []
+        for sample in samples:
+            self.intern(sample)
+
+    def intern(self, sample):
+        """
+        Return the id of the given sample, adding it to the index if
+        it is not already there.
+
+        :rtype: int
+        """
+        i = self._ids.get(sample)
+        if i is None:
+            i = self._ids[sample] = len(self._samples)
+            self._samples.append(sample)
+        return i
+
+    def lookup(self, sample):
+        """
+        Return the id of the given sample, or None if it is not in the
+        index.
+
+        :rtype: int or None
+        """
+        return self._ids.get(sample)
+
+    def __getitem__(self, i):
+        """
+        Return the sample whose id is ``i``.
+        """
+        return self._samples[i]
+
+    def __len__(self):
+        return len(self._samples)
+
+    def __iter__(self):
+        return iter(self._samples)
+
+    def __contains__(self, sample):
+        return sample in self._ids
+
+    def __repr__(self):
+        return '<SampleIndex with %d samples>' % len(self._samples)
+
+class CompactFreqDist(object):
+    """
+    A frequency distribution that stores its counts in a typed array
+    (see the ``array`` module), indexed by integer sample ids.  This
+    takes much less memory than a ``FreqDist`` (which stores a Python
+    int object and a dictionary entry per sample), and so is suitable
+    for very large tables, such as n-gram counts.
+
+    If ``index`` is None, then the samples must be non-negative
+    integers, which are used directly as ids; otherwise, samples are
+    mapped to ids by the given ``SampleIndex``.
+
+        >>> from nltk.probability import CompactFreqDist, SampleIndex
+        >>> fdist = CompactFreqDist('abracadabra', index=SampleIndex())
+        >>> fdist.N(), fdist.B(), fdist['a'], fdist.freq('b')
+        (11, 5, 5, 0.18181818181818182)
+        >>> fdist.Nr(1), fdist.Nr(2), sorted(fdist.hapaxes())
+        (2, 2, ['c', 'd'])
+        >>> fdist.items()
+        [('a', 5), ('b', 2), ('r', 2), ('c', 1), ('d', 1)]
+
+    ``CompactFreqDist`` supports the methods of ``FreqDist`` that are
+    used by the probability estimators in this module, so it can be
+    used in place of a ``FreqDist`` to build (e.g.) an ``MLEProbDist``
+    or a ``SimpleGoodTuringProbDist``.  The underlying array of
+    counts is returned by ``counts()``; use ``numpy.frombuffer()`` to
+    view it as a NumPy array without copying it.
+    """
+    def __init__(self, samples=None, index=None, typecode='l'):
+        """
+        Construct a new compact frequency distribution.
+
+        :param samples: The samples to initialize the frequency
+            distribution with.
+        :type samples: Sequence
+        :param index: The index used to map samples to ids; or None
+            if the samples are themselves non-negative integer ids.
+        :type index: SampleIndex
+        :param typecode: The ``array`` typecode used to store counts.
+            A smaller type (such as ``'i'``) saves memory, but limits
+            the largest count that can be stored.
+        :type typecode: str
+        """
+        self._index = index
+        self._counts = array(typecode)
+        self._N = 0
+        self._B = 0
+        self._reset_caches()
+        if samples:
+            self.update(samples)
+
+    def _id(self, sample):
+        """
+        Return the id of ``sample``, or None if it has no id.
+        """
+        if self._index is None:
+            return sample
+        return self._index.lookup(sample)
+
+    def _sample(self, i):
+        if self._index is None:
+            return i
+        return self._index[i]
+
+    def index(self):
+        """
+        Return the index used to map samples to ids, or None if the
+        samples are their own ids.
+
+        :rtype: SampleIndex
+        """
+        return self._index
+
+    def counts(self):
+        """
+        Return the array of counts, indexed by sample id.  The array
+        may be longer than the number of samples (any extra entries
+        are zero), and should not be modified.
+
+        :rtype: array
+        """
+        return self._counts
+
+    def inc(self, sample, count=1):
+        """
+        Increment this distribution's count for the given sample.
+
+        :param sample: The sample whose count should be incremented.
+        :type sample: any
+        :param count: The amount to increment the sample's count by.
+        :type count: int
+        :rtype: None
+        """
+        if count == 0: return
+        self[sample] = self[sample] + count
+
+    def __setitem__(self, sample, value):
+        """
+        Set this distribution's count for the given sample.
+
+        :raise ValueError: If ``index`` is None and ``sample`` is not
+            a non-negative integer.
+        """
+        if self._index is None:
+            if not (isinstance(sample, (int, long)) and sample >= 0):
+                raise ValueError('CompactFreqDist samples must be '
+                                 'non-negative integers: %r' % (sample,))
+            i = sample
+        else:
+            i = self._index.intern(sample)
+        counts = self._counts
+        if i >= len(counts):
+            # Grow geometrically, so that adding new samples takes
+            # amortized constant time.
+            size = max(i + 1, 2 * len(counts))
+            counts.extend(array(counts.typecode, [0]) * (size-len(counts)))
+        old = counts[i]
+        counts[i] = value
+        self._N += value - old
+        self._B += (value != 0) - (old != 0)
+        self._reset_caches()
+
+    def __getitem__(self, sample):
+        i = self._id(sample)
+        if i is None or not 0 <= i < len(self._counts):
+            return 0
+        return self._counts[i]
+
+    def __contains__(self, sample):
+        return self[sample] != 0
+
+    def __len__(self):
+        return self._B
+
+    def update(self, samples):
+        """
+        Update the frequency distribution with the provided list of
+        samples (or with the counts of a ``FreqDist`` or another
+        ``CompactFreqDist``).
+
+        :param samples: The samples to add.
+        :type samples: list
+        """
+        if isinstance(samples, FreqDist):
+            sample_iter = dict.iteritems(samples)
+        else:
+            try:
+                sample_iter = samples.iteritems()
+            except AttributeError:
+                sample_iter = imap(lambda x: (x,1), samples)
+        for sample, count in sample_iter:
+            self.inc(sample, count)
+
+    def N(self):
+        """
+        Return the total number of sample outcomes that have been
+        recorded by this distribution.
+
+        :rtype: int
+        """
+        return self._N
+
+    def B(self):
+        """
+        Return the number of sample values (or "bins") that have
+        counts greater than zero.
+
+        :rtype: int
+        """
+        return self._B
+
+    def freq(self, sample):
+        """
+        Return the frequency of a given sample: the count of that
+        sample divided by ``N()``.
+
+        :rtype: float
+        """
+        if self._N == 0:
+            return 0
+        return float(self[sample]) / self._N
+
+    def _nonzero_ids(self):
+        counts = self._counts
+        numpy = _numpy()
+        if numpy is not None and len(counts):
+            return numpy.flatnonzero(self._count_vector()).tolist()
+        return [i for i in xrange(len(counts)) if counts[i]]
+
+    def _count_vector(self):
+        """
+        Return the counts as a NumPy array that shares this
+        distribution's memory.
+        """
+        return _numpy().frombuffer(self._counts, self._counts.typecode)
+
+    def samples(self):
+        """
+        Return a list of all samples that have been recorded as
+        outcomes by this frequency distribution.
+
+        :rtype: list
+        """
+        return self.keys()
+
+    def iteritems(self):
+        """
+        Return an iterator over the ``(sample, count)`` pairs, in
+        arbitrary order.  This is cheaper than ``items()``, which
+        sorts them.
+        """
+        counts = self._counts
+        for i in self._nonzero_ids():
+            yield self._sample(i), counts[i]
+
+    def items(self):
+        """
+        Return the items sorted in decreasing order of frequency.
+
+        :rtype: list(tuple)
+        """
+        if self._item_cache is None:
+            self._item_cache = sorted(self.iteritems(),
+                                      key=lambda x:(-x[1], x[0]))
+        return self._item_cache[:]
+
+    def keys(self):
+        """
+        Return the samples sorted in decreasing order of frequency.
+
+        :rtype: list(any)
+        """
+        return [s for (s, c) in self.items()]
+
+    def values(self):
+        """
+        Return the counts sorted in decreasing order.
+
+        :rtype: list(int)
+        """
+        return [c for (s, c) in self.items()]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def hapaxes(self):
+        """
+        Return a list of all samples that occur once (hapax legomena).
+
+        :rtype: list
+        """
+        counts = self._counts
+        numpy = _numpy()
+        if numpy is not None and len(counts):
+            ids = numpy.flatnonzero(self._count_vector() == 1).tolist()
+        else:
+            ids = [i for i in xrange(len(counts)) if counts[i] == 1]
+        return [self._sample(i) for i in ids]
+
+    def max(self):
+        """
+        Return the sample with the greatest number of outcomes in this
+        frequency distribution.
+
+        :rtype: any
+        """
+        if self._B == 0:
+            raise ValueError('A FreqDist must have at least one sample '
+                             'before max is defined.')
+        numpy = _numpy()
+        if numpy is not None:
+            i = int(numpy.argmax(self._count_vector()))
+        else:
+            counts = self._counts
+            i = max(xrange(len(counts)), key=counts.__getitem__)
+        return self._sample(i)
+
+    def Nr(self, r, bins=None):
+        """
+        Return the number of samples with count r.
+
+        :type r: int
+        :param r: A sample count.
+        :type bins: int
+        :param bins: The number of possible sample outcomes, used to
+            calculate Nr(0) (see ``FreqDist.Nr()``).
+        :rtype: int
+        """
+        if r < 0: raise IndexError, 'FreqDist.Nr(): r must be non-negative'
+        if r == 0:
+            if bins is None: return 0
+            else: return bins-self.B()
+        Nr = self.Nr_table()
+        if r >= len(Nr): return 0
+        return Nr[r]
+
+    def Nr_table(self):
+        """
+        Return a list mapping each count *r* to the number of samples
+        with that count (the "count of counts" table).  The entry for
+        *r=0* is not meaningful (use ``Nr(0, bins)`` instead).
+
+        :rtype: list(int)
+        """
+        if self._Nr_cache is None:
+            counts = self._counts
+            numpy = _numpy()
+            if numpy is not None and len(counts):
+                Nr = numpy.bincount(self._count_vector()).tolist()
+            else:
+                Nr = [0]
+                for c in counts:
+                    if c >= len(Nr):
+                        Nr += [0]*(c+1-len(Nr))
+                    Nr[c] += 1
+            self._Nr_cache = Nr
+        return self._Nr_cache
+
+    def copy(self):
+        """
+        Create a copy of this frequency distribution.  The copy shares
+        this distribution's index.
+
+        :rtype: CompactFreqDist
+        """
+        clone = self.__class__(index=self._index,
+                               typecode=self._counts.typecode)
+        clone._counts.extend(self._counts)
+        clone._N, clone._B = self._N, self._B
+        return clone
+
+    def freqdist(self):
+        """
+        Return a ``FreqDist`` with the same counts as this
+        distribution.
+
+        :rtype: FreqDist
+        """
+        return FreqDist(dict(self.iteritems()))
+
+    def _reset_caches(self):
+        self._Nr_cache = None
+        self._item_cache = None
+
+    def __eq__(self, other):
+        if not isinstance(other, (CompactFreqDist, FreqDist)):
+            return False
+        return dict(self.iteritems()) == dict(other.iteritems())
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __repr__(self):
+        """
+        Return a string representation of this ``CompactFreqDist``.
+
+        :rtype: string
+        """
+        return '<CompactFreqDist with %d samples and %d outcomes>' % (
+            self.B(), self.N())
+
 ##//////////////////////////////////////////////////////
 ##  Probability Distributions
 ##//////////////////////////////////////////////////////
@@ -551,6 +1163,34 @@ class ProbDistI(object):
         else:
             return math.log(p, 2)
 
+    def logprob_batch(self, samples):
+        """
+        Return the base 2 logarithms of the probabilities of the given
+        samples, as a NumPy array (or as a list, if NumPy is not
+        installed).  The result is the same as calling ``logprob()``
+        for each sample, but subclasses may define faster
+        implementations.
+
+        :param samples: The samples whose log probabilities should be
+               returned.
+        :type samples: iter
+        :rtype: numpy.ndarray or list(float)
+        """
+        return _as_array(map(self.logprob, samples))
+
+    def prob_many(self, samples):
+        """
+        Return a list of the probabilities of the given samples.  This
+        is equivalent to ``[self.prob(s) for s in samples]``, but
+        subclasses may define faster implementations.
+
+        :param samples: The samples whose probabilities should be
+               returned.
+        :type samples: iter
+        :rtype: list(float)
+        """
+        return map(self.prob, samples)
+
     def max(self):
         """
         Return the sample with the greatest probability.  If two or
@@ -691,6 +1331,14 @@ class DictionaryProbDist(ProbDistI):
             elif self._prob_dict[sample] == 0: return _NINF
             else: return math.log(self._prob_dict[sample], 2)
 
+    def logprob_batch(self, samples):
+        if self._log:
+            return _as_array(list(imap(self._prob_dict.get, samples,
+                                       repeat(_NINF))))
+        else:
+            return _log2_array(list(imap(self._prob_dict.get, samples,
+                                         repeat(0))))
+
     def max(self):
         if not hasattr(self, '_max'):
             self._max = max((p,v) for (v,p) in self._prob_dict.items())[1]
@@ -731,6 +1379,16 @@ class MLEProbDist(ProbDistI):
     def prob(self, sample):
         return self._freqdist.freq(sample)
 
+    def logprob_batch(self, samples):
+        N = self._freqdist.N()
+        counts = _counts_of(self._freqdist, samples)
+        if N == 0:
+            return _as_array([_NINF] * len(counts))
+        numpy = _numpy()
+        if numpy is not None:
+            return _log2_array(numpy.array(counts, numpy.float64) / N)
+        return _log2_array([float(c) / N for c in counts])
+
     def max(self):
         return self._freqdist.max()
 
@@ -816,6 +1474,15 @@ class LidstoneProbDist(ProbDistI):
         c = self._freqdist[sample]
         return (c + self._gamma) / self._divisor
 
+    def logprob_batch(self, samples):
+        gamma, divisor = self._gamma, self._divisor
+        counts = _counts_of(self._freqdist, samples)
+        numpy = _numpy()
+        if numpy is not None:
+            return _log2_array((numpy.array(counts, numpy.float64) + gamma)
+                               / divisor)
+        return _log2_array([(c + gamma) / divisor for c in counts])
+
     def max(self):
         # For Lidstone distributions, probability is monotonic with
         # frequency, so the most probable sample is the one that
@@ -907,7 +1574,131 @@ class ELEProbDist(LidstoneProbDist):
         """
         return '<ELEProbDist based on %d samples>' % self._freqdist.N()
 
-class HeldoutProbDist(ProbDistI):
+class _CountTableProbDist(ProbDistI):
+    """
+    A base class for derived probability distributions in which the
+    probability of a sample depends only on its count *r* in a
+    frequency distribution.  The first time a probability is requested,
+    the probability (and log probability) for each count that occurs in
+    the frequency distribution is computed, and stored in a table; so
+    ``prob()`` and ``logprob()`` only need to look up the sample's
+    count, and then its probability.
+
+    Subclasses must define ``_prob_for_count()``, and call
+    ``_build_tables()`` once they are initialized.  Because the tables
+    are only built once, the frequency distribution should not be
+    changed after the first probability has been requested; the
+    estimates would not reflect the change.
+    """
+    def _prob_for_count(self, r):
+        """
+        Return the probability estimate for a sample that occurs *r*
+        times in the frequency distribution.
+
+        :rtype: float
+        """
+        raise AssertionError()
+
+    def _build_tables(self, fdist):
+        """
+        Record that the probabilities are computed from the counts in
+        ``fdist``.  The tables themselves are built by ``_tables()``
+        when they are first needed.
+        """
+        self._count_fdist = fdist
+        self._prob_table = self._logprob_table = None
+
+    def _tables(self):
+        """
+        Return the probability and log probability tables, computing
+        them (for each count *r* that occurs in the frequency
+        distribution, and for *r=0*) if this has not been done yet.
+
+        :rtype: tuple(dict, dict)
+        """
+        if self._prob_table is None:
+            Nr = self._count_fdist.Nr_table()
+            prob_table = {0: self._prob_for_count(0)}
+            for r in xrange(1, len(Nr)):
+                if Nr[r]:
+                    prob_table[r] = self._prob_for_count(r)
+
+            logprob_table = {}
+            for r, p in prob_table.iteritems():
+                if p == 0:
+                    logprob_table[r] = _NINF
+                elif p is not None:
+                    logprob_table[r] = math.log(p, 2)
+            self._logprob_table = logprob_table
+            self._prob_table = prob_table
+        return self._prob_table, self._logprob_table
+
+    def prob(self, sample):
+        r = self._count_fdist[sample]
+        try:
+            return self._tables()[0][r]
+        except KeyError:
+            return self._prob_for_count(r)
+
+    def logprob(self, sample):
+        try:
+            return self._tables()[1][self._count_fdist[sample]]
+        except KeyError:
+            return ProbDistI.logprob(self, sample)
+
+    def logprob_batch(self, samples):
+        samples = list(samples)
+        table = self._tables()[1]
+        logprobs = []
+        for sample, r in izip(samples, _counts_of(self._count_fdist, samples)):
+            try:
+                logprobs.append(table[r])
+            except KeyError:
+                logprobs.append(ProbDistI.logprob(self, sample))
+        return _as_array(logprobs)
+
+    def prob_many(self, samples):
+        fdist = self._count_fdist
+        # Only an array needs NumPy, so it is already imported if
+        # ``samples`` is one.
+        numpy = sys.modules.get('numpy')
+        if (numpy is not None and isinstance(samples, numpy.ndarray) and
+            isinstance(fdist, CompactFreqDist) and fdist.index() is None):
+            return self._prob_array(fdist, samples).tolist()
+        table = self._tables()[0]
+        probs = []
+        for sample in samples:
+            r = fdist[sample]
+            try:
+                probs.append(table[r])
+            except KeyError:
+                probs.append(self._prob_for_count(r))
+        return probs
+
+    def _prob_array(self, fdist, ids):
+        """
+        Return a NumPy array of the probabilities of the samples whose
+        ids are given by the NumPy array ``ids``; the frequency
+        distribution ``fdist`` is a ``CompactFreqDist`` that uses
+        sample ids directly.
+        """
+        numpy = _numpy()
+        counts = fdist._count_vector()
+        ids = numpy.asarray(ids, dtype=numpy.intp)
+        known = ids < len(counts)
+        r = numpy.zeros(len(ids), dtype=counts.dtype)
+        r[known] = counts[ids[known]]
+
+        prob_table = self._tables()[0]
+        table_r = numpy.array(sorted(prob_table), dtype=counts.dtype)
+        table_p = numpy.array([prob_table[x] for x in table_r])
+        pos = numpy.searchsorted(table_r, r).clip(0, len(table_r)-1)
+        if not (table_r[pos] == r).all():
+            # Some counts have changed since the table was built.
+            return numpy.array([self._prob_for_count(x) for x in r])
+        return table_p[pos]
+
+class HeldoutProbDist(_CountTableProbDist):
     """
     The heldout estimate for the probability distribution of the
     experiment used to generate two frequency distributions.  These
@@ -975,12 +1766,15 @@ class HeldoutProbDist(ProbDistI):
 
         # Calculate Tr, Nr, and N.
         Tr = self._calculate_Tr()
-        Nr = [base_fdist.Nr(r, bins) for r in range(self._max_r+1)]
+        Nr = base_fdist.Nr_table()[:self._max_r+1]
+        Nr += [0] * (self._max_r+1-len(Nr))
+        Nr[0] = base_fdist.Nr(0, bins)
         N = heldout_fdist.N()
 
         # Use Tr, Nr, and N to compute the probability estimate for
         # each value of r.
         self._estimate = self._calculate_estimate(Tr, Nr, N)
+        self._build_tables(base_fdist)
 
     def _calculate_Tr(self):
         """
@@ -991,9 +1785,9 @@ class HeldoutProbDist(ProbDistI):
         :rtype: list(float)
         """
         Tr = [0.0] * (self._max_r+1)
-        for sample in self._heldout_fdist:
+        for sample, count in _iter_counts(self._heldout_fdist):
             r = self._base_fdist[sample]
-            Tr[r] += self._heldout_fdist[sample]
+            Tr[r] += count
         return Tr
 
     def _calculate_estimate(self, Tr, Nr, N):
@@ -1043,9 +1837,8 @@ class HeldoutProbDist(ProbDistI):
     def samples(self):
         return self._base_fdist.keys()
 
-    def prob(self, sample):
+    def _prob_for_count(self, r):
         # Use our precomputed probability estimate.
-        r = self._base_fdist[sample]
         return self._estimate[r]
 
     def max(self):
@@ -1132,7 +1925,7 @@ class CrossValidationProbDist(ProbDistI):
         """
         return '<CrossValidationProbDist: %d-way>' % len(self._freqdists)
 
-class WittenBellProbDist(ProbDistI):
+class WittenBellProbDist(_CountTableProbDist):
     """
     The Witten-Bell estimate of a probability distribution. This distribution
     allocates uniform probability mass to as yet unseen events by using the
@@ -1188,10 +1981,9 @@ class WittenBellProbDist(ProbDistI):
             self._P0 = 1.0 / self._Z
         else:
             self._P0 = self._T / float(self._Z * (self._N + self._T))
+        self._build_tables(freqdist)
 
-    def prob(self, sample):
-        # inherit docs from ProbDistI
-        c = self._freqdist[sample]
+    def _prob_for_count(self, c):
         if c == 0:
             return self._P0
         else:
@@ -1259,7 +2051,7 @@ class WittenBellProbDist(ProbDistI):
 # significance criterion.
 #
 
-class GoodTuringProbDist(ProbDistI):
+class GoodTuringProbDist(_CountTableProbDist):
     """
     The Good-Turing estimate of a probability distribution. This method
     calculates the probability mass to assign to events with zero or low
@@ -1290,10 +2082,9 @@ class GoodTuringProbDist(ProbDistI):
             bins = freqdist.B()
         self._freqdist = freqdist
         self._bins = bins
+        self._build_tables(freqdist)
 
-    def prob(self, sample):
-        count = self._freqdist[sample]
-
+    def _prob_for_count(self, count):
         # unseen sample's frequency (count zero) uses frequency one's
         if count == 0 and self._freqdist.N() != 0:
             p0 = 1.0 * self._freqdist.Nr(1) / self._freqdist.N()
@@ -1341,7 +2132,7 @@ class GoodTuringProbDist(ProbDistI):
 ##  Simple Good-Turing Probablity Distributions
 ##//////////////////////////////////////////////////////
 
-class SimpleGoodTuringProbDist(ProbDistI):
+class SimpleGoodTuringProbDist(_CountTableProbDist):
     """
     SimpleGoodTuring ProbDist approximates from frequency to freqency of
     frequency into a linear line under log space by linear regression.
@@ -1380,20 +2171,18 @@ class SimpleGoodTuringProbDist(ProbDistI):
         self.find_best_fit(r, nr)
         self._switch(r, nr)
         self._renormalize(r, nr)
+        self._build_tables(freqdist)
 
     def _r_Nr(self):
         """
         Split the frequency distribution in two list (r, Nr), where Nr(r) > 0
         """
         r, nr = [], []
-        b, i = 0, 0
-        while b != self._freqdist.B():
-            nr_i = self._freqdist.Nr(i)
-            if nr_i > 0:
-                b += nr_i
+        Nr = self._freqdist.Nr_table()
+        for i in xrange(1, len(Nr)):
+            if Nr[i] > 0:
                 r.append(i)
-                nr.append(nr_i)
-            i += 1
+                nr.append(Nr[i])
         return (r, nr)
 
     def find_best_fit(self, r, nr):
@@ -1495,15 +2284,7 @@ class SimpleGoodTuringProbDist(ProbDistI):
 
         return math.exp(self._intercept + self._slope * math.log(r))
 
-    def prob(self, sample):
-        """
-        Return the sample's probability.
-
-        :param sample: sample of the event
-        :type sample: str
-        :rtype: float
-        """
-        count = self._freqdist[sample]
+    def _prob_for_count(self, count):
         p = self._prob_measure(count)
         if count == 0:
             if self._bins == self._freqdist.B():
@@ -1649,6 +2430,53 @@ class MutableProbDist(ProbDistI):
             if log: self._data[i] = 2**(prob)
             else:   self._data[i] = prob
 
+##//////////////////////////////////////////////////////
+##  Parallel Counting
+##//////////////////////////////////////////////////////
+
+def _count_shard(args):
+    """
+    Count the samples in a single shard.  This is run in the worker
+    processes of ``_count_in_parallel()``, so it must be defined at
+    the top level of the module.
+    """
+    cls, func, shard = args
+    if func is not None:
+        shard = func(shard)
+    return cls(shard)
+
+def _count_in_parallel(cls, shards, func=None, processes=None):
+    """
+    Return a new ``cls`` (``FreqDist`` or ``ConditionalFreqDist``)
+    that records the samples in each of ``shards``, counting each
+    shard in a pool of worker processes.
+    """
+    try:
+        from multiprocessing import Pool, cpu_count
+        if processes is None:
+            processes = cpu_count()
+    except (ImportError, NotImplementedError):
+        processes = 1
+
+    result = cls()
+    if processes <= 1:
+        for shard in shards:
+            if func is not None:
+                shard = func(shard)
+            result._merge(cls(shard))
+        return result
+
+    pool = Pool(processes)
+    try:
+        tasks = ((cls, func, shard) for shard in shards)
+        # Counts are sums, so they can be merged in any order.
+        for counts in pool.imap_unordered(_count_shard, tasks):
+            result._merge(counts)
+    finally:
+        pool.terminate()
+        pool.join()
+    return result
+
 ##//////////////////////////////////////////////////////
 ##  Probability Distribution Operations
 ##//////////////////////////////////////////////////////
@@ -1731,6 +2559,47 @@ class ConditionalFreqDist(defaultdict):
             for (cond, sample) in cond_samples:
                 self[cond].inc(sample)
 
+    @classmethod
+    def from_iterable_parallel(cls, shards, func=None, processes=None):
+        """
+        Construct a new conditional frequency distribution by counting
+        the ``(condition, sample)`` pairs in each of ``shards`` in a
+        pool of worker processes, and then merging the counts.  See
+        ``FreqDist.from_iterable_parallel()`` for details.
+
+            >>> from nltk.probability import ConditionalFreqDist
+            >>> shards = [[(1, 'a'), (2, 'bb')], [(1, 'a'), (1, 'c')]]
+            >>> cfdist = ConditionalFreqDist.from_iterable_parallel(shards)
+            >>> cfdist[1].items()
+            [('a', 2), ('c', 1)]
+
+        :param shards: The shards to count.  Each shard is a sequence
+            of ``(condition, sample)`` pairs, or (if ``func`` is given)
+            an argument for ``func``.
+        :type shards: iter
+        :param func: A function that is called (in a worker process)
+            with each shard, and returns the ``(condition, sample)``
+            pairs in that shard.
+        :type func: function
+        :param processes: The number of worker processes to use.
+            Defaults to the number of CPUs.
+        :type processes: int
+        :rtype: ConditionalFreqDist
+        """
+        return _count_in_parallel(cls, shards, func, processes)
+
+    def _merge(self, other):
+        """
+        Add the counts recorded by the conditional frequency
+        distribution ``other`` to this conditional frequency
+        distribution.
+        """
+        for condition, fdist in other.iteritems():
+            self[condition]._merge(fdist)
+
+    def __reduce__(self):
+        return (self.__class__, (), None, None, self.iteritems())
+
     def conditions(self):
         """
         Return a list of the conditions that have been accessed for
@@ -1883,6 +2752,49 @@ class ConditionalProbDistI(defaultdict):
         """
         return self.keys()
 
+    def logprob_batch(self, pairs):
+        """
+        Return the base 2 logarithms of the probabilities of the given
+        ``(condition, sample)`` pairs, i.e., of each ``sample`` given
+        its ``condition``, as a NumPy array (or as a list, if NumPy is
+        not installed).  The samples for each condition are scored
+        together, using ``ProbDistI.logprob_batch()``.
+
+        :type pairs: iter(tuple)
+        :rtype: numpy.ndarray or list(float)
+        """
+        pairs = list(pairs)
+        indices = defaultdict(list)
+        for i, (condition, sample) in enumerate(pairs):
+            indices[condition].append(i)
+        logprobs = [None] * len(pairs)
+        for condition, condition_indices in indices.iteritems():
+            samples = [pairs[i][1] for i in condition_indices]
+            for i, logprob in izip(condition_indices,
+                                   self[condition].logprob_batch(samples)):
+                logprobs[i] = logprob
+        return _as_array(logprobs)
+
+    def logprob_matrix(self, conditions, samples):
+        """
+        Return a matrix whose entry *[i, j]* is the base 2 logarithm of
+        the probability of ``samples[j]`` given ``conditions[i]``, as a
+        two-dimensional NumPy array (or, if NumPy is not installed, as
+        a list of lists).
+
+        :type conditions: list
+        :type samples: list
+        :rtype: numpy.ndarray or list(list(float))
+        """
+        samples = list(samples)
+        rows = [list(self[condition].logprob_batch(samples))
+                for condition in conditions]
+        numpy = _numpy()
+        if numpy is None:
+            return rows
+        return numpy.array(rows, numpy.float64).reshape(len(rows),
+                                                        len(samples))
+
     def __repr__(self):
         """
         Return a string representation of this ``ConditionalProbDist``.
@@ -1959,6 +2871,113 @@ class ConditionalProbDist(ConditionalProbDistI):
                                                *factory_args, **factory_kw_args)
 
 
+class LazyConditionalProbDist(ConditionalProbDistI):
+    """
+    A conditional probability distribution that is constructed in the
+    same way as a ``ConditionalProbDist``, but which only creates the
+    probability distribution for a condition when it is first used.
+    At most ``cache_size`` of these distributions are kept (the least
+    recently used ones are discarded, and recreated if they are used
+    again), so the memory used by a ``LazyConditionalProbDist`` is
+    bounded, and creating one takes constant time.  This is useful
+    when there are very many conditions, such as the histories of a
+    trigram model.
+
+        >>> from nltk.probability import (ConditionalFreqDist,
+        ...     LazyConditionalProbDist, MLEProbDist)
+        >>> cfdist = ConditionalFreqDist((len(w), w) for w in
+        ...     'the cat sat on the mat with a hat'.split())
+        >>> cpdist = LazyConditionalProbDist(cfdist, MLEProbDist,
+        ...                                  cache_size=2)
+        >>> cpdist[3].prob('the')
+        0.3333333333333333
+        >>> cpdist[3].max(), cpdist[2].max(), cpdist[4].max()
+        ('the', 'on', 'with')
+        >>> sorted(cpdist.cache_info().items())
+        [('hits', 1), ('maxsize', 2), ('misses', 3), ('size', 2)]
+
+    Because the distributions are recreated, changes that are made to
+    them are not guaranteed to persist.
+    """
+    def __init__(self, cfdist, probdist_factory,
+                 *factory_args, **factory_kw_args):
+        """
+        Construct a new lazy conditional probability distribution.
+        The arguments are the same as for ``ConditionalProbDist``,
+        with the addition of:
+
+        :type cache_size: int
+        :param cache_size: The maximum number of probability
+            distributions to keep, or None for no limit (default
+            1000).
+        """
+        cache_size = _get_kwarg(factory_kw_args, 'cache_size', 1000)
+        defaultdict.__init__(self)
+        self._cfdist = cfdist
+        self._probdist_factory = probdist_factory
+        self._factory_args = factory_args
+        self._factory_kw_args = factory_kw_args
+        self._cache = LRUCache(cache_size)
+
+    def __getitem__(self, condition):
+        probdist = self._cache.get(condition)
+        if probdist is None:
+            if condition in self._cfdist:
+                fdist = self._cfdist[condition]
+            else:
+                fdist = FreqDist()
+            probdist = self._probdist_factory(fdist, *self._factory_args,
+                                              **self._factory_kw_args)
+            self._cache[condition] = probdist
+        return probdist
+
+    def __contains__(self, condition):
+        return condition in self._cfdist
+
+    def __len__(self):
+        return len(self._cfdist)
+
+    def __iter__(self):
+        return iter(self._cfdist)
+
+    def keys(self):
+        return self._cfdist.keys()
+
+    def iterkeys(self):
+        return iter(self._cfdist)
+
+    def itervalues(self):
+        for condition in self._cfdist:
+            yield self[condition]
+
+    def iteritems(self):
+        for condition in self._cfdist:
+            yield condition, self[condition]
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
+
+    def get(self, condition, default=None):
+        if condition in self._cfdist:
+            return self[condition]
+        return default
+
+    def cache_info(self):
+        """
+        Return a dictionary describing the cache of probability
+        distributions: the number of lookups that found (``hits``) or
+        did not find (``misses``) a distribution in the cache; and its
+        current (``size``) and maximum (``maxsize``) number of
+        distributions.
+
+        :rtype: dict
+        """
+        return dict(hits=self._cache.hits, misses=self._cache.misses,
+                    maxsize=self._cache.maxsize, size=len(self._cache))
+
 class DictionaryConditionalProbDist(ConditionalProbDistI):
     """
     An alternative ConditionalProbDist that simply wraps a dictionary of
@@ -1995,6 +3014,34 @@ def add_logs(logx, logy):
     base = min(logx, logy)
     return base + math.log(2**(logx-base) + 2**(logy-base), 2)
 
+def _as_array(values):
+    """
+    Return the given list of floats as a NumPy array, or unchanged if
+    NumPy is not installed.
+    """
+    numpy = _numpy()
+    if numpy is None:
+        return values
+    return numpy.array(values, numpy.float64)
+
+def _log2_array(probs):
+    """
+    Return the base 2 logarithms of the given probabilities (as a
+    NumPy array, if NumPy is installed), using ``_NINF`` for zero
+    probabilities.  The values are the same as those computed by
+    ``ProbDistI.logprob()``.
+    """
+    numpy = _numpy()
+    if numpy is None:
+        return [_NINF if p == 0 else math.log(p, 2) for p in probs]
+    probs = numpy.asarray(probs, numpy.float64)
+    logprobs = numpy.empty(len(probs), numpy.float64)
+    nonzero = probs != 0
+    # math.log(p, 2) is computed as log(p)/log(2).
+    logprobs[nonzero] = numpy.log(probs[nonzero]) / math.log(2)
+    logprobs[~nonzero] = _NINF
+    return logprobs
+
 def sum_logs(logs):
     if len(logs) == 0:
         # Use some approximation to infinity.  What this does
@@ -2241,11 +3288,12 @@ if __name__ == '__main__':
     demo(5, 5000)
     gt_demo()
 
-__all__ = ['ConditionalFreqDist', 'ConditionalProbDist',
+__all__ = ['CompactFreqDist', 'ConditionalFreqDist', 'ConditionalProbDist',
            'ConditionalProbDistI', 'CrossValidationProbDist',
            'DictionaryConditionalProbDist', 'DictionaryProbDist', 'ELEProbDist',
            'FreqDist', 'GoodTuringProbDist', 'SimpleGoodTuringProbDist', 'HeldoutProbDist',
-           'ImmutableProbabilisticMixIn', 'LaplaceProbDist', 'LidstoneProbDist',
+           'ImmutableProbabilisticMixIn', 'LaplaceProbDist',
+           'LazyConditionalProbDist', 'LidstoneProbDist',
            'MLEProbDist', 'MutableProbDist', 'ProbDistI', 'ProbabilisticMixIn',
-           'UniformProbDist', 'WittenBellProbDist', 'add_logs',
+           'SampleIndex', 'UniformProbDist', 'WittenBellProbDist', 'add_logs',
            'log_likelihood', 'sum_logs', 'entropy']
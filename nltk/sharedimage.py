@@ -0,0 +1,547 @@
+# Natural Language Toolkit: Shared Model Images
+#
+# Copyright (C) 2001-2012 NLTK Project
+# URL: <http://www.nltk.org/>
+# For license information, see LICENSE.TXT
+
+"""
+Read-only, memory-mapped images of pickled models, which can be
+shared by many processes.
+
+When many worker processes each unpickle the same model (such as a
+sentence tokenizer, tagger or chunker), each of them spends time
+unpickling it, and each holds a private copy of it.  A *shared image*
+of a model is a file which stores the model's large components in a
+form that can be used directly from a read-only memory map:
+
+  - numpy arrays (such as classifier weights) are stored as raw
+    data, and are loaded as read-only arrays backed by the map;
+  - sets of strings are stored as hash tables of utf-8 encoded
+    strings, and are loaded as ``SharedStringSet`` objects;
+  - dictionaries that map strings to numbers (including
+    ``defaultdict(int)`` and ``defaultdict(float)``) are stored in
+    the same way, with a column of values, and are loaded as
+    ``SharedStringDict`` objects.
+
+The rest of the model is pickled as usual, as a (small) *skeleton*.
+Reading an image only unpickles the skeleton and maps the file; since
+the operating system keeps one copy of each page of a mapped file, all
+of the processes that read the same image share one physical copy of
+its large components.
+
+Shared components are read-only: a model whose components must be
+modified after it is loaded (e.g., to continue training it) should be
+loaded as usual.  Looking up a string in a ``SharedStringSet`` or
+``SharedStringDict`` is several times slower than in a ``set`` or
+``dict``.
+
+    >>> import os, tempfile
+    >>> from collections import defaultdict
+    >>> from nltk.sharedimage import write_image, read_image
+    >>> counts = defaultdict(int, [('dr', 3), ('mr', 5), ('etc', 1)])
+    >>> model = dict(abbrevs=set(['dr', 'mr', 'etc']), counts=counts,
+    ...              name='toy')
+    >>> fd, path = tempfile.mkstemp(); os.close(fd)
+    >>> write_image(path, model, min_size=2)
+    >>> shared = read_image(path)
+    >>> shared['abbrevs']
+    SharedStringSet(['dr', 'etc', 'mr'])
+    >>> 'mr' in shared['abbrevs'], 'ms' in shared['abbrevs']
+    (True, False)
+    >>> shared['counts']['mr'], shared['counts']['ms']
+    (5, 0)
+    >>> sorted(shared['counts'].items()) == sorted(counts.items())
+    True
+    >>> shared['name']
+    'toy'
+    >>> del shared; os.remove(path)
+
+``nltk.data.load()`` reads pickled resources through shared images
+when it is called with ``shared=True``; images are written (to
+``nltk.data.shared_image_dir``) the first time each resource is loaded
+in this way, and rewritten whenever the resource changes.
+"""
+
+import os
+import sys
+import mmap
+import struct
+import tempfile
+import zlib
+from collections import defaultdict
+
+try: import cPickle as pickle
+except ImportError: import pickle
+
+try: from cStringIO import StringIO
+except ImportError: from StringIO import StringIO
+
+try: import numpy
+except ImportError: numpy = None
+
+FORMAT_VERSION = 1
+"""The version of the shared image format.  Images written with a
+   different version are ignored (and rewritten)."""
+
+MIN_SIZE = 256
+"""The default ``min_size`` for ``write_image()``: sets and
+   dictionaries with fewer items, and arrays with fewer bytes, are
+   pickled as part of the skeleton."""
+
+_MAGIC = 'NLTKSHIM'
+
+# The image header: magic, format version, byte order, and the offset
+# and length of the pickled skeleton.
+_HEADER = struct.Struct('<8sIIQQ')
+
+# Components are aligned to this many bytes.
+_ALIGN = 16
+
+_BYTE_ORDERS = {'little': 0, 'big': 1}
+
+######################################################################
+#{ Shared String Tables
+######################################################################
+
+class _SharedStringTable(object):
+    """
+    A read-only hash table of strings, in a memory map.  A table holds
+    either byte strings or unicode strings (which are utf-8 encoded),
+    and, optionally, a number for each string.  It is laid out as:
+
+      - a header: the number of strings ``n``, the number of hash
+        slots (a power of two), the length of the string data, whether
+        the strings are unicode, and the typecode of the values (or a
+        space, if there are none);
+      - the ``n+1`` (native-endian, 64 bit) offsets of the strings in
+        the string data;
+      - the hash slots, each holding 0 (for an empty slot) or one more
+        than the index of a string;
+      - the string data;
+      - the ``n`` values, if any.
+
+    Strings are hashed with ``zlib.crc32()``, so that tables do not
+    depend on Python's hash function, and collisions are resolved by
+    linear probing.
+    """
+    _TABLE_HEADER = struct.Struct('=QQQBc')
+
+    def __init__(self, buf, offset):
+        self._buf = buf
+        (self._n, nslots, data_len, is_unicode,
+         typecode) = self._TABLE_HEADER.unpack_from(buf, offset)
+        self._unicode = bool(is_unicode)
+        self._mask = nslots - 1
+        # Each section is aligned (as is the table itself).
+        self._offsets = offset + _aligned(self._TABLE_HEADER.size)
+        self._slots = _aligned(self._offsets + 8 * (self._n + 1))
+        self._data = _aligned(self._slots + 4 * nslots)
+        if typecode == ' ':
+            self._value = None
+        else:
+            self._value = struct.Struct('=' + typecode)
+            self._values = _aligned(self._data + data_len)
+
+    @classmethod
+    def encode(cls, strings, values=None):
+        """
+        :return: The encoding of a table holding the given strings
+            (and values), as a byte string.
+        :param strings: A list of distinct strings, either all byte
+            strings or all unicode strings.
+        :param values: A list of numbers (either all ints or all
+            floats) for the strings, or None.
+        """
+        is_unicode = bool(strings) and isinstance(strings[0], unicode)
+        if is_unicode:
+            strings = [s.encode('utf-8') for s in strings]
+        nslots = 1
+        while nslots < 2 * len(strings):
+            nslots *= 2
+
+        offsets = [0]
+        slots = [0] * nslots
+        mask = nslots - 1
+        for i, s in enumerate(strings):
+            offsets.append(offsets[-1] + len(s))
+            slot = zlib.crc32(s) & mask
+            while slots[slot]:
+                slot = (slot + 1) & mask
+            slots[slot] = i + 1
+        data = ''.join(strings)
+
+        if values is None:
+            typecode = ' '
+        elif all(isinstance(v, (int, long)) for v in values):
+            typecode = 'q'
+        else:
+            typecode = 'd'
+        pieces = [cls._TABLE_HEADER.pack(len(strings), nslots, len(data),
+                                         is_unicode, typecode),
+                  struct.pack('=%dQ' % len(offsets), *offsets),
+                  struct.pack('=%dI' % nslots, *slots), data]
+        if values is not None:
+            pieces.append(struct.pack('=%d%s' % (len(values), typecode),
+                                      *values))
+        return _join_aligned(pieces)
+
+    def _index(self, key):
+        """
+        :return: The index of the given string in the table, or -1.
+        """
+        # Strings that compare equal to the table's strings (such as
+        # ascii byte strings, in a table of unicode strings) are found.
+        try:
+            if self._unicode:
+                if isinstance(key, str):
+                    key = key.decode('ascii')
+                key = key.encode('utf-8')
+            elif isinstance(key, unicode):
+                key = key.encode('ascii')
+            elif not isinstance(key, str):
+                return -1
+        except (UnicodeError, AttributeError):
+            return -1
+
+        buf, mask = self._buf, self._mask
+        slot = zlib.crc32(key) & mask
+        while True:
+            i, = _UINT32.unpack_from(buf, self._slots + 4 * slot)
+            if i == 0:
+                return -1
+            start, end = _OFFSET_PAIR.unpack_from(buf, self._offsets + 8*(i-1))
+            if buf[self._data + start:self._data + end] == key:
+                return i - 1
+            slot = (slot + 1) & mask
+
+    def _string(self, i):
+        start, end = _OFFSET_PAIR.unpack_from(self._buf, self._offsets + 8*i)
+        s = self._buf[self._data + start:self._data + end]
+        if self._unicode:
+            return s.decode('utf-8')
+        return s
+
+    def _get_value(self, i):
+        return self._value.unpack_from(
+            self._buf, self._values + self._value.size * i)[0]
+
+    def __len__(self):
+        return self._n
+
+    def __iter__(self):
+        for i in xrange(self._n):
+            yield self._string(i)
+
+_UINT32 = struct.Struct('=I')
+_OFFSET_PAIR = struct.Struct('=QQ')
+
+class SharedStringSet(_SharedStringTable):
+    """
+    A read-only set of strings, stored in a memory map by
+    ``write_image()``.  It supports all of the non-mutating operations
+    of ``frozenset``; operations that return new sets (such as union)
+    return ``frozenset`` objects.  It is pickled as a ``frozenset``.
+    """
+    def __contains__(self, key):
+        return self._index(key) >= 0
+
+    def __hash__(self):
+        return hash(frozenset(self))
+
+    def __reduce__(self):
+        return (frozenset, (list(self),))
+
+    def __repr__(self):
+        return 'SharedStringSet(%r)' % sorted(self)
+
+def _unshared(value):
+    if isinstance(value, SharedStringSet):
+        return frozenset(value)
+    return value
+
+def _frozenset_method(name):
+    """
+    :return: A method for ``SharedStringSet`` that applies the given
+        ``frozenset`` method to a ``frozenset`` of the set's strings
+        (and of any other ``SharedStringSet`` arguments).
+    """
+    method = getattr(frozenset, name)
+    def shared_method(self, *others):
+        return method(frozenset(self), *map(_unshared, others))
+    shared_method.__name__ = name
+    shared_method.__doc__ = method.__doc__
+    return shared_method
+
+for _name in ['__eq__', '__ne__', '__le__', '__lt__', '__ge__', '__gt__',
+              '__and__', '__rand__', '__or__', '__ror__', '__sub__',
+              '__rsub__', '__xor__', '__rxor__', 'isdisjoint', 'issubset',
+              'issuperset', 'union', 'intersection', 'difference',
+              'symmetric_difference', 'copy']:
+    if hasattr(frozenset, _name): # (Python 2.5 has no isdisjoint.)
+        setattr(SharedStringSet, _name, _frozenset_method(_name))
+del _name
+
+class SharedStringDict(_SharedStringTable):
+    """
+    A read-only dictionary from strings to numbers, stored in a memory
+    map by ``write_image()``.  It supports all of the non-mutating
+    operations of ``dict``.  If it was written from a ``defaultdict``,
+    then looking up a missing key returns the default value (without
+    adding the key).  It is pickled as a ``dict`` (or ``defaultdict``).
+    """
+    def __init__(self, buf, offset, default_factory=None):
+        _SharedStringTable.__init__(self, buf, offset)
+        self.default_factory = default_factory
+
+    def __getitem__(self, key):
+        i = self._index(key)
+        if i < 0:
+            if self.default_factory is None:
+                raise KeyError(key)
+            return self.default_factory()
+        return self._get_value(i)
+
+    def __contains__(self, key):
+        return self._index(key) >= 0
+
+    has_key = __contains__
+
+    def get(self, key, default=None):
+        i = self._index(key)
+        if i < 0:
+            return default
+        return self._get_value(i)
+
+    iterkeys = _SharedStringTable.__iter__
+
+    def itervalues(self):
+        for i in xrange(self._n):
+            yield self._get_value(i)
+
+    def iteritems(self):
+        for i in xrange(self._n):
+            yield (self._string(i), self._get_value(i))
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        return list(self.itervalues())
+
+    def items(self):
+        return list(self.iteritems())
+
+    def __eq__(self, other):
+        if isinstance(other, SharedStringDict):
+            other = dict(other.iteritems())
+        return dict(self.iteritems()) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __reduce__(self):
+        if self.default_factory is None:
+            return (dict, (self.items(),))
+        return (defaultdict, (self.default_factory, self.items()))
+
+    def __repr__(self):
+        return 'SharedStringDict(%r)' % dict(self.iteritems())
+
+######################################################################
+#{ Writing
+######################################################################
+
+class _ImageWriter(object):
+    """
+    Pickles a model's skeleton, while collecting the encodings of its
+    shared components.
+    """
+    def __init__(self, min_size):
+        self.min_size = min_size
+        self.pieces = []
+        self.offset = _aligned(_HEADER.size)
+        # Persistent ids of the components that have been written, by
+        # id().  The components are kept, so their ids stay unique.
+        self._written = {}
+
+    def persistent_id(self, obj):
+        written = self._written.get(id(obj))
+        if written is not None:
+            return written[1]
+        pid = self._encode(obj)
+        if pid is not None:
+            self._written[id(obj)] = (obj, pid)
+        return pid
+
+    def _add(self, data):
+        offset = self.offset
+        self.pieces.append(data)
+        self.offset = _aligned(offset + len(data))
+        return offset
+
+    def _encode(self, obj):
+        """
+        :return: The persistent id for ``obj``, after adding its
+            encoding; or None, if it should be pickled as usual.
+        """
+        t = type(obj)
+        if numpy is not None and t is numpy.ndarray:
+            if obj.dtype.hasobject or obj.nbytes < self.min_size:
+                return None
+            data = numpy.ascontiguousarray(obj).tostring()
+            return ('ndarray', self._add(data), obj.dtype.str, obj.shape)
+
+        if t in (set, frozenset):
+            if len(obj) < self.min_size or not _is_string_list(obj):
+                return None
+            return ('set', self._add(_SharedStringTable.encode(list(obj))))
+
+        if t is dict:
+            default_factory = None
+        elif t is defaultdict and obj.default_factory in (int, float):
+            default_factory = obj.default_factory
+        else:
+            return None
+        if len(obj) < self.min_size or not _is_string_list(obj):
+            return None
+        keys = list(obj)
+        values = [obj[key] for key in keys]
+        if not (all(type(v) in (int, long) and -2**63 <= v < 2**63
+                    for v in values) or
+                all(type(v) is float for v in values)):
+            return None
+        return ('dict', self._add(_SharedStringTable.encode(keys, values)),
+                default_factory)
+
+def _is_string_list(strings):
+    """
+    :return: True if the given strings are all byte strings or all
+        unicode strings.
+    """
+    types = set(type(s) for s in strings)
+    return types == set([str]) or types == set([unicode])
+
+def write_image(path, model, source=None, min_size=MIN_SIZE):
+    """
+    Write a shared image of the given model.  The file is written
+    atomically.
+
+    :param path: The path of the image file.
+    :param model: The model (which must be picklable).
+    :param source: A value identifying the version of the resource
+        that ``model`` was loaded from.  ``read_image()`` can check it.
+    :param min_size: Sets and dictionaries of strings are shared if
+        they have at least this many items, and numpy arrays if they
+        have at least this many bytes.
+    """
+    writer = _ImageWriter(min_size)
+    skeleton = StringIO()
+    pickler = pickle.Pickler(skeleton, 2)
+    pickler.persistent_id = writer.persistent_id
+    pickler.dump(model)
+    header = pickle.dumps(dict(source=source), 2)
+    skeleton = header + skeleton.getvalue()
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    outfile = os.fdopen(fd, 'wb')
+    try:
+        try:
+            outfile.write(_HEADER.pack(_MAGIC, FORMAT_VERSION,
+                                       _BYTE_ORDERS[sys.byteorder],
+                                       writer.offset, len(skeleton)))
+            pos = _HEADER.size
+            for piece in writer.pieces:
+                outfile.write('\0' * (_aligned(pos) - pos))
+                outfile.write(piece)
+                pos = _aligned(pos) + len(piece)
+            outfile.write('\0' * (writer.offset - pos))
+            outfile.write(skeleton)
+        finally:
+            outfile.close()
+        if os.path.exists(path) and sys.platform == 'win32':
+            os.remove(path)
+        os.rename(tmp_path, path)
+    except:
+        os.remove(tmp_path)
+        raise
+
+######################################################################
+#{ Reading
+######################################################################
+
+def read_image(path, source=None):
+    """
+    Read a shared image written by ``write_image()``.
+
+    :return: The model.
+    :param source: If specified, then the image is only read if it was
+        written with the same ``source`` value.
+    :raise ValueError: If the file is not a shared image, was written
+        with a different format version or byte order, or is out of
+        date.
+    """
+    infile = open(path, 'rb')
+    try:
+        header = infile.read(_HEADER.size)
+        if len(header) < _HEADER.size or not header.startswith(_MAGIC):
+            raise ValueError('%s is not a shared image' % path)
+        (magic, version, byteorder, skeleton_offset,
+         skeleton_len) = _HEADER.unpack(header)
+        if version != FORMAT_VERSION:
+            raise ValueError('%s has format version %d (expected %d)' %
+                             (path, version, FORMAT_VERSION))
+        if byteorder != _BYTE_ORDERS[sys.byteorder]:
+            raise ValueError('%s was written on an incompatible platform'
+                             % path)
+        buf = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        infile.close()
+
+    def persistent_load(pid):
+        if pid[0] == 'ndarray':
+            if numpy is None:
+                raise ValueError('%s contains numpy arrays, but numpy '
+                                 'is not installed' % path)
+            kind, offset, dtype, shape = pid
+            dtype = numpy.dtype(dtype)
+            count = int(numpy.prod(shape))
+            return numpy.frombuffer(buf, dtype, count, offset).reshape(shape)
+        elif pid[0] == 'set':
+            return SharedStringSet(buf, pid[1])
+        elif pid[0] == 'dict':
+            return SharedStringDict(buf, pid[1], pid[2])
+        raise pickle.UnpicklingError('Unknown component type %r' % (pid[0],))
+
+    # The skeleton holds two pickles: the image's header, and the model.
+    skeleton = StringIO(buf[skeleton_offset:skeleton_offset+skeleton_len])
+    unpickler = pickle.Unpickler(skeleton)
+    unpickler.persistent_load = persistent_load
+    header = unpickler.load()
+    if source is not None and header['source'] != source:
+        raise ValueError('%s is out of date' % path)
+    return unpickler.load()
+
+######################################################################
+#{ Helpers
+######################################################################
+
+def _aligned(pos):
+    """
+    :return: The smallest multiple of ``_ALIGN`` that is at least ``pos``.
+    """
+    return (pos + _ALIGN - 1) // _ALIGN * _ALIGN
+
+def _join_aligned(pieces):
+    """
+    :return: The concatenation of the given byte strings, each padded
+        to a multiple of ``_ALIGN`` bytes (except the last).
+    """
+    result = []
+    for piece in pieces[:-1]:
+        result.append(piece)
+        result.append('\0' * (_aligned(len(piece)) - len(piece)))
+    result.extend(pieces[-1:])
+    return ''.join(result)
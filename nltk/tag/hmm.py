@@ -306,18 +306,12 @@ class HiddenMarkovModelTagger(TaggerI):
               P[i] = log( P(tag[0]=state[i]) )
         """
         if not self._cache:
-            N = len(self._states)
             M = len(self._symbols)
-            P = zeros(N, float32)
-            X = zeros((N, N), float32)
-            O = zeros((N, M), float32)
-            for i in range(N):
-                si = self._states[i]
-                P[i] = self._priors.logprob(si)
-                for j in range(N):
-                    X[i, j] = self._transitions[si].logprob(self._states[j])
-                for k in range(M):
-                    O[i, k] = self._outputs[si].logprob(self._symbols[k])
+            P = array(self._priors.logprob_batch(self._states), float32)
+            X = array(self._transitions.logprob_matrix(self._states,
+                                                       self._states), float32)
+            O = array(self._outputs.logprob_matrix(self._states,
+                                                   self._symbols), float32)
             S = {}
             for k in range(M):
                 S[self._symbols[k]] = k
@@ -335,17 +329,13 @@ class HiddenMarkovModelTagger(TaggerI):
                     self._symbols.append(symbol)
             # don't bother with the work if there aren't any new symbols
             if not self._cache:
-                N = len(self._states)
                 M = len(self._symbols)
                 Q = O.shape[1]
                 # add new columns to the output probability table without
-                # destroying the old probabilities
-                O = hstack([O, zeros((N, M - Q), float32)])
-                for i in range(N):
-                    si = self._states[i]
-                    # only calculate probabilities for new symbols
-                    for k in range(Q, M):
-                        O[i, k] = self._outputs[si].logprob(self._symbols[k])
+                # destroying the old probabilities (only calculate
+                # probabilities for the new symbols)
+                O = hstack([O, array(self._outputs.logprob_matrix(
+                    self._states, self._symbols[Q:]), float32)])
                 # only create symbol mappings for new symbols
                 for k in range(Q, M):
                     S[self._symbols[k]] = k
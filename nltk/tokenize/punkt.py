@@ -77,10 +77,17 @@ The algorithm for this tokenizer is described in::
 # TODO: Frequent sentence starters optionally exclude always-capitalised words
 # FIXME: Problem with ending string with e.g. '!!!' -> '!! !'
 
+import os
 import re
+import sys
 import math
 from collections import defaultdict
 
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
 from nltk.probability import FreqDist
 from nltk.tokenize.api import TokenizerI
 
@@ -143,7 +150,8 @@ class PunktLanguageVars(object):
     constructors.
     """
 
-    __slots__ = ('_re_period_context', '_re_word_tokenizer')
+    __slots__ = ('_re_period_context', '_re_word_tokenizer',
+                 '_re_sent_end_word')
 
     def __getstate__(self):
         # All modifications to the class are performed by inheritance.
@@ -242,6 +250,27 @@ class PunktLanguageVars(object):
                 re.UNICODE | re.VERBOSE)
             return self._re_period_context
 
+    _sent_end_word_fmt = r"""
+        (?<!\S)                      # the start of a word
+        \S*?%(SentEndChars)s         # up to its first potential sentence ending
+        """
+    """Format of a regular expression to find the words (that is, runs of
+    non-whitespace characters) that include a potential sentence ending."""
+
+    def _sent_end_word_re(self):
+        """Compiles and returns a regular expression to find words that
+        include a potential sentence ending."""
+        try:
+            return self._re_sent_end_word
+        except AttributeError:
+            self._re_sent_end_word = re.compile(
+                self._sent_end_word_fmt %
+                {
+                    'SentEndChars': self._re_sent_end_chars,
+                },
+                re.UNICODE | re.VERBOSE)
+            return self._re_sent_end_word
+
 
 _re_non_punct = re.compile(r'[^\W\d]', re.UNICODE)
 """Matches token types that are not merely punctuation. (Types for
@@ -284,6 +313,97 @@ def _pair_iter(it):
         prev = el
     yield (prev, None)
 
+def _text_chunks(stream, size):
+    """
+    Yields the text of a file-like object, ``size`` characters at a
+    time; or the non-empty strings of any other iterable.
+    """
+    if hasattr(stream, 'read'):
+        while True:
+            chunk = stream.read(size)
+            if not chunk:
+                return
+            yield chunk
+    else:
+        for chunk in stream:
+            if chunk:
+                yield chunk
+
+def _block_end(text):
+    """
+    Returns the offset at which ``text`` is best divided into two
+    training texts: the last paragraph break, where the second text
+    starts with the blank line (so that its first token is still known
+    to start a paragraph); failing that, the start of the last line;
+    failing that, the end of the last whitespace.  Returns None if
+    there is no such offset.
+    """
+    last_line = text.rfind('\n')
+    pos = last_line
+    while pos > 0:
+        prev = text.rfind('\n', 0, pos)
+        if prev <= 0:
+            break
+        if not text[prev+1:pos].strip():
+            return prev
+        pos = prev
+    if last_line > 0:
+        return last_line + 1
+    last_space = max(text.rfind(' '), text.rfind('\t'))
+    if last_space > 0:
+        return last_space + 1
+    return None
+
+def paragraph_blocks(stream, block_size=1048576):
+    r"""
+    Divides a large text into blocks of about ``block_size``
+    characters, ending at paragraph breaks where possible, so that
+    ``PunktTrainer.train_documents()`` can train on it without reading
+    it all into memory.
+
+        >>> from StringIO import StringIO
+        >>> text = 'One line.\nAnother.\n\nA new paragraph.\n'
+        >>> list(paragraph_blocks(StringIO(text), block_size=20))
+        ['One line.\nAnother.', '\n\nA new paragraph.\n']
+
+    :param stream: A file-like object, or an iterable of strings (such
+        as the lines of a file).
+    :param block_size: The smallest size of each block (except the
+        last); blocks are larger if they have no convenient break.
+    :rtype: iter(str)
+    """
+    pending = []
+    pending_len = 0
+    for chunk in _text_chunks(stream, block_size):
+        pending.append(chunk)
+        pending_len += len(chunk)
+        if pending_len < block_size:
+            continue
+        text = ''.join(pending)
+        end = _block_end(text)
+        if end is None:
+            pending = [text]
+            continue
+        yield text[:end]
+        pending = [text[end:]]
+        pending_len = len(pending[0])
+    text = ''.join(pending)
+    if text:
+        yield text
+
+def _train_shard(args):
+    """
+    Trains a new trainer on the texts of a single shard.  This is run in
+    the worker processes of ``PunktTrainer.train_parallel()``, so it
+    must be defined at the top level of the module.
+    """
+    cls, func, shard = args
+    if func is not None:
+        shard = func(shard)
+    trainer = cls()
+    trainer.train_documents(shard, finalize=False)
+    return trainer
+
 ######################################################################
 #{ Punkt Parameters
 ######################################################################
@@ -329,26 +449,69 @@ class PunktParameters(object):
 ######################################################################
 #{ PunktToken
 ######################################################################
+# The following flags are used to pack the properties of a PunktToken
+# that are derived from the token's text into an integer.
+
+_TOK_PERIOD_FINAL = 1 << 0
+_TOK_FIRST_UPPER  = 1 << 1
+_TOK_FIRST_LOWER  = 1 << 2
+_TOK_ELLIPSIS     = 1 << 3
+_TOK_NUMBER       = 1 << 4
+_TOK_INITIAL      = 1 << 5
+_TOK_ALPHA        = 1 << 6
+_TOK_NON_PUNCT    = 1 << 7
+
+def _derived_property(flag, doc):
+    """Returns a property for a flag in a PunktToken's derived properties."""
+    return property(lambda self: bool(self._props & flag), doc=doc)
+
+_token_caches = defaultdict(dict)
+"""A dictionary mapping each PunktToken class and string class (str or
+unicode) to a dictionary that maps token texts to their ``(tok, type,
+props)`` tuples."""
 
 class PunktToken(object):
     """Stores a token of text with annotations produced during
-    sentence boundary detection."""
+    sentence boundary detection.
+
+    Many tokens are created in training and tokenization, so tokens are
+    kept small.  The properties derived from a token's text are
+    computed once for each distinct text, packed into an integer, and
+    cached along with its type; tokens with the same text share their
+    ``tok`` and ``type`` strings.  (To change how these properties are
+    derived, a subclass should override ``_get_type()`` or
+    ``_get_props()``.)"""
 
     _properties = [
         'parastart', 'linestart',
         'sentbreak', 'abbr', 'ellipsis'
     ]
-    __slots__ = ['tok', 'type', 'period_final'] + _properties
+    __slots__ = ['tok', 'type', 'period_final', '_props'] + _properties
 
-    def __init__(self, tok, **params):
-        self.tok = tok
-        self.type = self._get_type(tok)
-        self.period_final = tok.endswith('.')
+    CACHE_SIZE = 100000
+    """The maximum number of distinct token texts whose derived
+    properties are cached.  (When it is reached, the cache is
+    cleared.)"""
 
-        for p in self._properties:
-            setattr(self, p, None)
-        for k, v in params.iteritems():
-            setattr(self, k, v)
+    def __init__(self, tok, **params):
+        # (Byte string and unicode tokens are cached separately.)
+        cache = _token_caches[self.__class__, tok.__class__]
+        try:
+            self.tok, self.type, self._props = cache[tok]
+        except KeyError:
+            if len(cache) >= self.CACHE_SIZE:
+                cache.clear()
+            typ = self._get_type(tok)
+            entry = cache[tok] = (tok, typ, self._get_props(tok, typ))
+            self.tok, self.type, self._props = entry
+        # (This is tested for every token, so it is kept as an attribute.)
+        self.period_final = bool(self._props & _TOK_PERIOD_FINAL)
+
+        self.parastart = self.linestart = None
+        self.sentbreak = self.abbr = self.ellipsis = None
+        if params:
+            for k, v in params.iteritems():
+                setattr(self, k, v)
 
     #////////////////////////////////////////////////////////////
     #{ Regular expressions for properties
@@ -367,6 +530,30 @@ class PunktToken(object):
         """Returns a case-normalized representation of the token."""
         return self._RE_NUMERIC.sub('##number##', tok.lower())
 
+    def _get_props(self, tok, typ):
+        """
+        Returns the flags for the properties derived from the token's
+        text and type.
+        """
+        props = 0
+        if tok.endswith('.'):
+            props |= _TOK_PERIOD_FINAL
+        if tok[:1].isupper():
+            props |= _TOK_FIRST_UPPER
+        if tok[:1].islower():
+            props |= _TOK_FIRST_LOWER
+        if self._RE_ELLIPSIS.match(tok):
+            props |= _TOK_ELLIPSIS
+        if typ.startswith('##number##'):
+            props |= _TOK_NUMBER
+        if self._RE_INITIAL.match(tok):
+            props |= _TOK_INITIAL
+        if self._RE_ALPHA.match(tok):
+            props |= _TOK_ALPHA
+        if _re_non_punct.search(typ):
+            props |= _TOK_NON_PUNCT
+        return props
+
     @property
     def type_no_period(self):
         """
@@ -386,48 +573,34 @@ class PunktToken(object):
             return self.type_no_period
         return self.type
 
-    @property
-    def first_upper(self):
-        """True if the token's first character is uppercase."""
-        return self.tok[0].isupper()
+    first_upper = _derived_property(_TOK_FIRST_UPPER,
+        """True if the token's first character is uppercase.""")
 
-    @property
-    def first_lower(self):
-        """True if the token's first character is lowercase."""
-        return self.tok[0].islower()
+    first_lower = _derived_property(_TOK_FIRST_LOWER,
+        """True if the token's first character is lowercase.""")
 
     @property
     def first_case(self):
-        if self.first_lower:
+        if self._props & _TOK_FIRST_LOWER:
             return 'lower'
-        elif self.first_upper:
+        elif self._props & _TOK_FIRST_UPPER:
             return 'upper'
         return 'none'
 
-    @property
-    def is_ellipsis(self):
-        """True if the token text is that of an ellipsis."""
-        return self._RE_ELLIPSIS.match(self.tok)
+    is_ellipsis = _derived_property(_TOK_ELLIPSIS,
+        """True if the token text is that of an ellipsis.""")
 
-    @property
-    def is_number(self):
-        """True if the token text is that of a number."""
-        return self.type.startswith('##number##')
+    is_number = _derived_property(_TOK_NUMBER,
+        """True if the token text is that of a number.""")
 
-    @property
-    def is_initial(self):
-        """True if the token text is that of an initial."""
-        return self._RE_INITIAL.match(self.tok)
+    is_initial = _derived_property(_TOK_INITIAL,
+        """True if the token text is that of an initial.""")
 
-    @property
-    def is_alpha(self):
-        """True if the token text is all alphabetic."""
-        return self._RE_ALPHA.match(self.tok)
+    is_alpha = _derived_property(_TOK_ALPHA,
+        """True if the token text is all alphabetic.""")
 
-    @property
-    def is_non_punct(self):
-        """True if the token is either a number or is alphabetic."""
-        return _re_non_punct.search(self.type)
+    is_non_punct = _derived_property(_TOK_NON_PUNCT,
+        """True if the token is either a number or is alphabetic.""")
 
     #////////////////////////////////////////////////////////////
     #{ String representation
@@ -476,7 +649,9 @@ class PunktBaseClass(object):
     """
 
     def __init__(self, lang_vars=PunktLanguageVars(), token_cls=PunktToken,
-            params=PunktParameters()):
+            params=None):
+        if params is None:
+            params = PunktParameters()
         self._params = params
         self._lang_vars = lang_vars
         self._Token = token_cls
@@ -602,6 +777,9 @@ class PunktTrainer(PunktBaseClass):
         collocations and sentence starters, or whether finalize_training()
         still needs to be called."""
 
+        self._num_documents = 0
+        """The number of texts (or token lists) that have been trained on."""
+
         if train_text:
             self.train(train_text, verbose, finalize=True)
 
@@ -681,6 +859,7 @@ class PunktTrainer(PunktBaseClass):
 
     def _train_tokens(self, tokens, verbose):
         self._finalized = False
+        self._num_documents += 1
 
         # Ensure tokens are a list
         tokens = list(tokens)
@@ -694,20 +873,7 @@ class PunktTrainer(PunktBaseClass):
                 self._num_period_toks += 1
 
         # Look for new abbreviations, and for types that no longer are
-        unique_types = self._unique_types(tokens)
-        for abbr, score, is_add in self._reclassify_abbrev_types(unique_types):
-            if score >= self.ABBREV:
-                if is_add:
-                    self._params.abbrev_types.add(abbr)
-                    if verbose:
-                        print ('  Abbreviation: [%6.4f] %s' %
-                               (score, abbr))
-            else:
-                if not is_add:
-                    self._params.abbrev_types.remove(abbr)
-                    if verbose:
-                        print ('  Removed abbreviation: [%6.4f] %s' %
-                               (score, abbr))
+        self._update_abbrev_types(self._unique_types(tokens), verbose)
 
         # Make a preliminary pass through the document, marking likely
         # sentence breaks, abbreviations, and ellipsis tokens.
@@ -741,6 +907,26 @@ class PunktTrainer(PunktBaseClass):
                 self._collocation_fdist.inc(
                     (aug_tok1.type_no_period, aug_tok2.type_no_sentperiod))
 
+    def _update_abbrev_types(self, types, verbose):
+        """
+        Adds the given types that now score as abbreviations to
+        ``_params.abbrev_types``, and removes the known abbreviations
+        among them that no longer do.
+        """
+        for abbr, score, is_add in self._reclassify_abbrev_types(types):
+            if score >= self.ABBREV:
+                if is_add:
+                    self._params.abbrev_types.add(abbr)
+                    if verbose:
+                        print ('  Abbreviation: [%6.4f] %s' %
+                               (score, abbr))
+            else:
+                if not is_add:
+                    self._params.abbrev_types.remove(abbr)
+                    if verbose:
+                        print ('  Removed abbreviation: [%6.4f] %s' %
+                               (score, abbr))
+
     def _unique_types(self, tokens):
         return set(aug_tok.type for aug_tok in tokens)
 
@@ -764,6 +950,166 @@ class PunktTrainer(PunktBaseClass):
 
         self._finalized = True
 
+    #////////////////////////////////////////////////////////////
+    #{ Streaming, checkpointing and merging
+    #////////////////////////////////////////////////////////////
+
+    def train_documents(self, documents, verbose=False, finalize=True,
+                        checkpoint=None, checkpoint_every=1000):
+        """
+        Collects training data from each of the given texts in turn, so
+        that a training corpus need never be held in memory at once:
+        only the counts gathered so far, and the current text, are.
+        ``documents`` can be any iterable of texts, such as a generator,
+        a corpus view, or the blocks of a large file (see
+        ``paragraph_blocks()``).
+
+        If ``checkpoint`` is given, then the state of the trainer is
+        saved to that file (see ``save()``) after every
+        ``checkpoint_every`` texts, and at the end; so interrupted
+        training can be resumed by loading the checkpoint, and skipping
+        the texts that it has already been trained on::
+
+            trainer = PunktTrainer.load('train.ckpt')
+            texts = islice(texts, trainer.num_documents(), None)
+            trainer.train_documents(texts, checkpoint='train.ckpt')
+
+        :param documents: The texts to train on.
+        :type documents: iter(str)
+        :param finalize: Whether to determine the parameters for sentence
+            boundary detection after the last text.
+        :param checkpoint: The name of the file to save the trainer to.
+        :param checkpoint_every: The number of texts to train on between
+            checkpoints.
+        """
+        for i, text in enumerate(documents):
+            self._train_tokens(self._tokenize_words(text), verbose)
+            if checkpoint and (i + 1) % checkpoint_every == 0:
+                self.save(checkpoint)
+        if checkpoint:
+            self.save(checkpoint)
+        if finalize:
+            self.finalize_training(verbose)
+
+    def num_documents(self):
+        """
+        Returns the number of texts (or token lists) that this trainer
+        has been trained on.
+        """
+        return self._num_documents
+
+    def save(self, filename):
+        """
+        Saves the state of this trainer (the counts gathered so far, as
+        well as its parameters) to the given file, from which it can be
+        loaded with ``load()``.  The file is replaced atomically, so a
+        checkpoint is never left half-written.
+        """
+        tmp_path = '%s.%d.tmp' % (filename, os.getpid())
+        outfile = open(tmp_path, 'wb')
+        try:
+            pickle.dump(self, outfile, pickle.HIGHEST_PROTOCOL)
+        finally:
+            outfile.close()
+        if os.path.exists(filename) and sys.platform == 'win32':
+            os.remove(filename)
+        os.rename(tmp_path, filename)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Returns the trainer that was saved to the given file with
+        ``save()``.
+        """
+        infile = open(filename, 'rb')
+        try:
+            trainer = pickle.load(infile)
+        finally:
+            infile.close()
+        if not isinstance(trainer, cls):
+            raise ValueError('%s does not contain a %s' %
+                             (filename, cls.__name__))
+        return trainer
+
+    def merge(self, other, verbose=False):
+        """
+        Adds the training data gathered by another trainer (for example,
+        one that was trained on a different shard of the corpus, in
+        another process) to this trainer: the counts are summed, and the
+        other trainer's types are reclassified as abbreviations (or not)
+        using the combined counts.  Collocations and sentence starters
+        are found when training is finalized, as usual.
+
+        The result is usually, but not always, the same as if this
+        trainer had gone on to train on the other trainer's texts: the
+        orthographic context of a type is gathered by each trainer
+        using the abbreviations that it knew of at the time, so it can
+        differ where the shards disagree about an abbreviation.
+        """
+        self._finalized = False
+        self._type_fdist.update(other._type_fdist)
+        self._num_period_toks += other._num_period_toks
+        self._collocation_fdist.update(other._collocation_fdist)
+        self._sent_starter_fdist.update(other._sent_starter_fdist)
+        self._sentbreak_count += other._sentbreak_count
+        self._num_documents += other._num_documents
+        for typ, flags in other._params.ortho_context.iteritems():
+            self._params.add_ortho_context(typ, flags)
+        self._params.abbrev_types.update(other._params.abbrev_types)
+        # (The None type stands for the rare types that were removed by
+        # freq_threshold().)
+        self._update_abbrev_types(
+            [typ for typ in other._type_fdist if typ is not None], verbose)
+
+    @classmethod
+    def train_parallel(cls, shards, func=None, processes=None,
+                       verbose=False, finalize=True):
+        """
+        Returns a new trainer, trained on each of ``shards`` (iterables
+        of texts) by a separate trainer in a pool of worker processes,
+        and then merged with ``merge()``.  The trainers are merged in
+        the order of ``shards``, so the result does not depend on the
+        order in which the workers finish.
+
+        As with ``FreqDist.from_iterable_parallel()``, it is usually
+        best to pass a list of fileids as ``shards``, and a picklable
+        function that reads a fileid's texts as ``func``.  If the
+        ``multiprocessing`` module is not available, or only one
+        process is to be used, the shards are trained on in this
+        process.
+
+        :param shards: The shards to train on.  Each shard is an
+            iterable of texts, or (if ``func`` is given) an argument
+            for ``func``.
+        :param func: A function that is called (in a worker process)
+            with each shard, and returns the texts in that shard.
+        :param processes: The number of worker processes to use.
+            Defaults to the number of CPUs.
+        """
+        try:
+            from multiprocessing import Pool, cpu_count
+            if processes is None:
+                processes = cpu_count()
+        except (ImportError, NotImplementedError):
+            processes = 1
+
+        trainer = cls()
+        tasks = ((cls, func, shard) for shard in shards)
+        if processes == 1:
+            for task in tasks:
+                trainer.merge(_train_shard(task), verbose)
+        else:
+            pool = Pool(processes)
+            try:
+                for shard_trainer in pool.imap(_train_shard, tasks):
+                    trainer.merge(shard_trainer, verbose)
+            finally:
+                pool.terminate()
+                pool.join()
+        if finalize:
+            trainer.finalize_training(verbose)
+        return trainer
+
     #////////////////////////////////////////////////////////////
     #{ Overhead reduction
     #////////////////////////////////////////////////////////////
@@ -1197,20 +1543,256 @@ class PunktSentenceTokenizer(PunktBaseClass,TokenizerI):
             sents = self._realign_boundaries(sents)
         return sents
 
-    def _slices_from_text(self, text):
-        last_break = 0
-        for match in self._lang_vars.period_context_re().finditer(text):
-            context = match.group() + match.group('after_tok')
-            if self.text_contains_sentbreak(context):
-                yield slice(last_break, match.end())
+    def sentences_from_stream(self, stream, realign_boundaries=False,
+                              chunk_size=65536):
+        """
+        Given a file-like object, or an iterable of strings (such as the
+        lines of a file), generates the sentences of its text, as
+        ``sentences_from_text()`` would for the whole text.  The text is
+        read ``chunk_size`` characters at a time, and only the current
+        sentence and chunk are held in memory.
+        """
+        sents = (sent for (start, end, sent)
+                 in self._sentences_from_stream(stream, chunk_size, True))
+        if realign_boundaries:
+            sents = self._realign_boundaries(sents)
+        return sents
+
+    def span_tokenize_stream(self, stream, chunk_size=65536):
+        """
+        Given a file-like object, or an iterable of strings, generates
+        the (start, end) spans of the sentences of its text, as
+        ``span_tokenize()`` would for the whole text.  The text is read
+        ``chunk_size`` characters at a time, and only the current chunk
+        is held in memory.
+        """
+        for (start, end, sent) in self._sentences_from_stream(
+                stream, chunk_size, False):
+            yield (start, end)
+
+    def _sentences_from_stream(self, stream, chunk_size, keep_text):
+        """
+        Generates a (start, end, sentence) triple for each sentence of
+        the text read from the given stream; the sentence is None unless
+        ``keep_text`` is True.
+
+        Each chunk is added to the text that is still to be scanned for
+        sentence breaks, which is then scanned up to the start of its
+        second to last word.  The potential sentence endings before that
+        point, and the contexts that decide whether they are sentence
+        breaks, can not be changed by the text that follows, because
+        each context ends at the word after the potential ending.  (The
+        scan can continue from the start of a word, because the matches
+        of ``period_context_re`` never span whitespace.)
+        """
+        # The text from offset onwards has not been scanned yet; the
+        # current sentence starts at sent_start, and its scanned text
+        # is in pieces.
+        text = ''
+        offset = sent_start = 0
+        pieces = []
+        chunks = _text_chunks(stream, chunk_size)
+        while True:
+            try:
+                chunk = chunks.next()
+            except StopIteration:
+                chunk = None
+            if chunk is not None:
+                text += chunk
+                cut = self._stream_cut(text)
+                if not cut:
+                    continue
+            else:
+                cut = len(text)
+
+            for match in self._match_sentbreaks(text):
+                if match.start() >= cut:
+                    break
+                if keep_text:
+                    pieces.append(text[max(sent_start - offset, 0):
+                                       match.end()])
+                    yield (sent_start, offset + match.end(), ''.join(pieces))
+                    pieces = []
+                else:
+                    yield (sent_start, offset + match.end(), None)
                 if match.group('next_tok'):
-                    # next sentence starts after whitespace
-                    last_break = match.start('next_tok')
+                    sent_start = offset + match.start('next_tok')
+                else:
+                    sent_start = offset + match.end()
+
+            if keep_text:
+                pieces.append(text[max(sent_start - offset, 0):cut])
+            if chunk is None:
+                if keep_text:
+                    yield (sent_start, offset + len(text), ''.join(pieces))
                 else:
-                    # next sentence starts at following punctuation
-                    last_break = match.end()
+                    yield (sent_start, offset + len(text), None)
+                return
+            text = text[cut:]
+            offset += cut
+
+    def _stream_cut(self, text):
+        """
+        Returns the start of the second to last word (run of non-space
+        characters) in the given text, or 0 if it has fewer words.
+        """
+        space = self._re_space
+        pos = len(text)
+        for i in range(2):
+            while pos and space.match(text, pos - 1):
+                pos -= 1
+            while pos and not space.match(text, pos - 1):
+                pos -= 1
+        return pos
+
+    def _slices_from_text(self, text):
+        last_break = 0
+        for match in self._match_sentbreaks(text):
+            yield slice(last_break, match.end())
+            if match.group('next_tok'):
+                # next sentence starts after whitespace
+                last_break = match.start('next_tok')
+            else:
+                # next sentence starts at following punctuation
+                last_break = match.end()
         yield slice(last_break, len(text))
 
+    def _match_sentbreaks(self, text):
+        """
+        Generates the matches of ``period_context_re`` in the given text
+        whose contexts (the match and its ``after_tok``) contain a
+        sentence break.
+
+        This is equivalent to calling ``text_contains_sentbreak()`` on
+        each context, but the words of the text are found in a single
+        left-to-right scan, and each word is annotated at most once,
+        even when consecutive contexts overlap.  Words that are not part
+        of any context are skipped.  The few contexts that do not begin
+        and end on word boundaries of the text (where tokenizing the
+        context on its own could give different words) are tested with
+        ``text_contains_sentbreak()``.
+        """
+        words = self._lang_vars._word_tokenizer_re()
+
+        # The scanned words that the current context may use, as
+        # [start, end, aug_tok, sentbreak] lists.  aug_tok is created
+        # (and given its first pass annotation) when it is needed;
+        # sentbreak is set by the second pass annotation, which is
+        # performed in order, for the first `annotated` words.
+        window = []
+        annotated = 0
+        # The scan continues from pos, on the line from line_start to
+        # line_end.  (Each line is tokenized separately, as in
+        # _tokenize_words().)
+        pos = line_start = line_end = len(text)
+
+        for match in self._match_potential_end_contexts(text):
+            start, end = match.start(), match.end('after_tok')
+
+            # Restart the scan if the context begins after the scanned
+            # words, at the start of a word.
+            if ((not window or start >= window[-1][1]) and
+                self._is_word_start(text, start)):
+                window = []
+                annotated = 0
+                pos = start
+                if not line_start <= start <= line_end:
+                    line_start = text.rfind('\n', 0, start) + 1
+                    line_end = text.find('\n', start)
+                    if line_end < 0:
+                        line_end = len(text)
+
+            # Scan the words of the context, and discard earlier words.
+            while not window or window[-1][1] < end:
+                word = words.search(text, pos, line_end)
+                if word is not None:
+                    pos = word.end()
+                    window.append([word.start(), pos, None, None])
+                elif pos == line_start and text[pos:line_end].strip():
+                    # _tokenize_words() stops at a line that holds no
+                    # words, but is not blank (such as a line of
+                    # non-ASCII spaces in a byte string).
+                    break
+                elif line_end < len(text):
+                    pos = line_start = line_end + 1
+                    line_end = text.find('\n', pos)
+                    if line_end < 0:
+                        line_end = len(text)
+                else:
+                    break
+            first = 0
+            while first < len(window) and window[first][0] < start:
+                first += 1
+            if first:
+                del window[:first]
+                annotated = max(annotated - first, 0)
+
+            last = 0
+            while last < len(window) and window[last][1] < end:
+                last += 1
+            if (last == len(window) or window[0][0] != start or
+                window[last][1] != end):
+                if self.text_contains_sentbreak(text[start:end]):
+                    yield match
+                continue
+
+            # Annotate each word of the context, except the last, with
+            # the help of the word that follows it.
+            for i in range(last + 1):
+                if window[i][2] is None:
+                    aug_tok = self._Token(text[window[i][0]:window[i][1]])
+                    self._first_pass_annotation(aug_tok)
+                    window[i][2] = aug_tok
+            for i in range(annotated, last):
+                self._second_pass_annotation(window[i][2], window[i+1][2])
+                window[i][3] = window[i][2].sentbreak
+            annotated = max(annotated, last)
+
+            for i in range(last):
+                if window[i][3]:
+                    yield match
+                    break
+
+    def _match_potential_end_contexts(self, text):
+        """
+        Generates the same matches as ``period_context_re().finditer()``
+        on the given text.  Each match is tried only at the start of a
+        word that includes a potential sentence ending (or where the
+        previous match ended), rather than at every position of the
+        text: if there is no match at the start of a word, there is none
+        later in that word.
+        """
+        period_context = self._lang_vars.period_context_re()
+        sent_end_word = self._lang_vars._sent_end_word_re()
+        match = period_context.match(text)
+        pos = 0
+        while True:
+            if match is None:
+                word = sent_end_word.search(text, pos)
+                if word is None:
+                    return
+                pos = word.end()
+                match = period_context.match(text, word.start())
+                continue
+            yield match
+            pos = match.end()
+            # The match may be followed by another in the same word.
+            match = period_context.match(text, pos)
+
+    _re_space = re.compile(r'\s', re.UNICODE)
+
+    def _is_word_start(self, text, pos):
+        """
+        Returns True if word tokenization of the given text has a word
+        starting at the given position, which holds a non-space
+        character.  (Only positions that follow a space are considered;
+        a space may only be within a word in an ellipsis like '. . .')
+        """
+        if pos == 0:
+            return True
+        return (self._re_space.match(text, pos - 1) is not None and
+                not (text[pos] == '.' and text[pos-2:pos-1] == '.'))
+
     def _realign_boundaries(self, sents):
         """
         Attempts to realign punctuation that falls after the period but
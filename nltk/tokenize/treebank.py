@@ -3,7 +3,7 @@
 # Copyright (C) 2001-2012 NLTK Project
 # Author: Edward Loper <edloper@gradient.cis.upenn.edu>
 #         Michael Heilman <mheilman@cmu.edu> (re-port from http://www.cis.upenn.edu/~treebank/tokenizer.sed)
-#         
+#
 # URL: <http://nltk.sourceforge.net>
 # For license information, see LICENSE.TXT
 
@@ -17,8 +17,14 @@ and available at http://www.cis.upenn.edu/~treebank/tokenizer.sed.
 """
 
 import re
+from collections import defaultdict
+
 from nltk.tokenize.api import TokenizerI
 
+_word_caches = defaultdict(dict)
+"""The tokens of each word (in its context) that has been tokenized,
+   for each tokenizer class and string type.  (Str and unicode words are
+   cached separately, so that they are never compared with each other.)"""
 
 class TreebankWordTokenizer(TokenizerI):
     """
@@ -42,12 +48,54 @@ class TreebankWordTokenizer(TokenizerI):
         >>> TreebankWordTokenizer().tokenize(s)
         ['They', "'ll", 'save', 'and', 'invest', 'more', '.']
 
+    ``span_tokenize()`` gives the offsets of the tokens in the text.
+    (The tokens that double quotes are converted to have the offsets of
+    the double quotes.)
+
+        >>> s = 'He said, "Don\\'t."'
+        >>> TreebankWordTokenizer().tokenize(s)
+        ['He', 'said', ',', '``', 'Do', "n't", '.', "''"]
+        >>> TreebankWordTokenizer().span_tokenize(s)
+        [(0, 2), (3, 7), (7, 8), (9, 10), (10, 12), (12, 15), (15, 16), (16, 17)]
+
     NB. this tokenizer assumes that the text is presented as one sentence per line,
     where each line is delimited with a newline character.
     The only periods to be treated as separate tokens are those appearing
     at the end of a line.
+
+    The rules are regular expression substitutions, which are applied
+    in turn.  None of them changes a text across the whitespace between
+    two words, except to look at the whitespace itself; so each word is
+    tokenized on its own, together with the whitespace around it, and
+    its tokens are cached, so that a word that recurs (in the same
+    context) is only tokenized once.
     """
 
+    #starting quotes
+    STARTING_QUOTES = [(re.compile(r'^\"'), r'``'),
+                       (re.compile(r'(``)'), r' \1 '),
+                       (re.compile(r'([ (\[{<])"'), r'\1 `` ')]
+
+    #punctuation
+    PUNCTUATION = [(re.compile(r'([:,])([^\d])'), r' \1 \2'),
+                   (re.compile(r'\.\.\.'), r' ... '),
+                   (re.compile(r'[;@#$%&]'), r' \g<0> '),
+                   (re.compile(r'([^\.])(\.)([\]\)}>"\']*)\s*$'),
+                    r'\1 \2\3 '),
+                   (re.compile(r'[?!]'), r' \g<0> '),
+                   (re.compile(r"([^'])' "), r"\1 ' ")]
+
+    #parens, brackets, etc.
+    PARENS_BRACKETS = [(re.compile(r'[\]\[\(\)\{\}\<\>]'), r' \g<0> '),
+                       (re.compile(r'--'), r' -- ')]
+
+    #ending quotes
+    ENDING_QUOTES = [(re.compile(r'"'), " '' "),
+                     (re.compile(r'(\S)(\'\')'), r'\1 \2 '),
+                     (re.compile(r"([^' ])('[sS]|'[mM]|'[dD]|') "), r"\1 \2 "),
+                     (re.compile(r"([^' ])('ll|'re|'ve|n't|) "), r"\1 \2 "),
+                     (re.compile(r"([^' ])('LL|'RE|'VE|N'T|) "), r"\1 \2 ")]
+
     # List of contractions adapted from Robert MacIntyre's tokenizer.
     CONTRACTIONS2 = [re.compile(r"(?i)\b(can)(not)\b"),
                      re.compile(r"(?i)\b(d)('ye)\b"),
@@ -62,35 +110,128 @@ class TreebankWordTokenizer(TokenizerI):
     CONTRACTIONS4 = [re.compile(r"(?i)\b(whad)(dd)(ya)\b"),
                      re.compile(r"(?i)\b(wha)(t)(cha)\b")]
 
+    CACHE_SIZE = 100000
+    """The number of words whose tokens are cached.  (When the cache is
+    full, it is cleared.)"""
+
+    # Divides a text into words and the whitespace between them.
+    _split_re = re.compile(r'(\s+)')
+
     def tokenize(self, text):
-        #starting quotes
-        text = re.sub(r'^\"', r'``', text)
-        text = re.sub(r'(``)', r' \1 ', text)
-        text = re.sub(r'([ (\[{<])"', r'\1 `` ', text)
+        return [token for (tokens, spans) in self._tokenize_words(text)[1]
+                for token in tokens]
+
+    def span_tokenize(self, text):
+        parts, words = self._tokenize_words(text)
+        words = iter(words)
+        result = []
+        offset = 0
+        for i, part in enumerate(parts):
+            if part and i % 2 == 0:
+                tokens, spans = words.next()
+                result.extend((offset + start, offset + end)
+                              for (start, end) in spans)
+            offset += len(part)
+        return result
+
+    def _tokenize_words(self, text):
+        """
+        Divides the given text into words, and tokenizes each of them.
+
+        :return: A list of the words of the text and the whitespace
+            between them (as returned by ``_split_re.split()``), and a
+            list of ``(tokens, spans)`` pairs, one for each word, where
+            the ``spans`` are relative to the word.
+        """
+        cache = _word_caches[self.__class__, text.__class__]
+        # The words of the text are at the even indices of parts (with
+        # an empty string at either end if the text starts or ends with
+        # whitespace), and the whitespace between them is at the odd
+        # indices.
+        parts = self._split_re.split(text)
+        words = parts[0::2]
+        spaces = parts[1::2]
+        befores = [None] + spaces
+        afters = spaces + ['']
+        # The last word's key also says that it ends the text.
+        keys = zip(befores, words, afters)
+        if not words[-1]:
+            del keys[-1]
+        if not keys:
+            return parts, []
+        keys[-1] += (True,)
+        if not words[0]:
+            del keys[0]
 
-        #punctuation
-        text = re.sub(r'([:,])([^\d])', r' \1 \2', text)
-        text = re.sub(r'\.\.\.', r' ... ', text)
-        text = re.sub(r'[;@#$%&]', r' \g<0> ', text)
-        text = re.sub(r'([^\.])(\.)([\]\)}>"\']*)\s*$', r'\1 \2\3 ', text)
-        text = re.sub(r'[?!]', r' \g<0> ', text)
+        result = map(cache.get, keys)
+        for i, tokens_and_spans in enumerate(result):
+            if tokens_and_spans is None:
+                # (The word may have occurred earlier in the text.)
+                tokens_and_spans = cache.get(keys[i])
+                if tokens_and_spans is None:
+                    if len(cache) >= self.CACHE_SIZE:
+                        cache.clear()
+                    tokens_and_spans = self._tokenize_word(*keys[i])
+                    cache[keys[i]] = tokens_and_spans
+                result[i] = tokens_and_spans
+        return parts, result
 
-        text = re.sub(r"([^'])' ", r"\1 ' ", text)
+    def _tokenize_word(self, before, word, after, is_last=False):
+        """
+        Returns the tokens of a word, and their spans in the word, given
+        the whitespace ``before`` it (or None, at the start of the text)
+        and ``after`` it, and whether it is the last word of the text
+        (``is_last``).  The word is tokenized within a text that has
+        the same whitespace around it, and a placeholder word ``x`` on
+        either side (except at the start and the end of the text).
+        """
+        text = word + after
+        if before is not None:
+            text = 'x' + before + text
+        if not is_last:
+            text += 'x'
+        tokens = self._apply_rules(text).split()
+        if before is not None:
+            del tokens[0]
+        if not is_last:
+            del tokens[-1]
+        tokens = tuple(tokens)
 
-        #parens, brackets, etc.
-        text = re.sub(r'[\]\[\(\)\{\}\<\>]', r' \g<0> ', text)
-        text = re.sub(r'--', r' -- ', text)
+        # Find the span of each token in the word.
+        spans = []
+        pos = 0
+        for token in tokens:
+            while True:
+                if token in ('``', "''") and word[pos] == '"':
+                    end = pos + 1
+                    break
+                if word.startswith(token, pos):
+                    end = pos + len(token)
+                    break
+                pos += 1
+            spans.append((pos, end))
+            pos = end
+        return tokens, tuple(spans)
+
+    def _apply_rules(self, text):
+        """
+        Applies the tokenizer's rules to the given text, returning it
+        with its tokens separated by spaces.
+        """
+        for regexp, substitution in self.STARTING_QUOTES:
+            text = regexp.sub(substitution, text)
+
+        for regexp, substitution in self.PUNCTUATION:
+            text = regexp.sub(substitution, text)
+
+        for regexp, substitution in self.PARENS_BRACKETS:
+            text = regexp.sub(substitution, text)
 
         #add extra space to make things easier
         text = " " + text + " "
 
-        #ending quotes
-        text = re.sub(r'"', " '' ", text)
-        text = re.sub(r'(\S)(\'\')', r'\1 \2 ', text)
-
-        text = re.sub(r"([^' ])('[sS]|'[mM]|'[dD]|') ", r"\1 \2 ", text)
-        text = re.sub(r"([^' ])('ll|'re|'ve|n't|) ", r"\1 \2 ", text)
-        text = re.sub(r"([^' ])('LL|'RE|'VE|N'T|) ", r"\1 \2 ", text)
+        for regexp, substitution in self.ENDING_QUOTES:
+            text = regexp.sub(substitution, text)
 
         for regexp in self.CONTRACTIONS2:
             text = regexp.sub(r' \1 \2 ', text)
@@ -109,7 +250,7 @@ class TreebankWordTokenizer(TokenizerI):
         if text != "":
             text += " "
 
-        return text.split()
+        return text
 
 if __name__ == "__main__":
     import doctest
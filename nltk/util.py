@@ -615,6 +615,144 @@ class OrderedDict(dict):
     def values(self):
         return map(self.get, self._keys)
 
+##########################################################################
+# Least Recently Used Cache
+##########################################################################
+
+class LRUCache(object):
+    """
+    A mapping that holds at most ``maxsize`` items; when a new item is
+    added to a full cache, the least recently used item is discarded.
+    The number of lookups that found (``hits``) or did not find
+    (``misses``) their key is recorded.
+
+    If a ``sizeof`` function is given, then ``maxsize`` bounds the total
+    ``sizeof(value)`` of the cached items, rather than their number.
+
+        >>> from nltk.util import LRUCache
+        >>> cache = LRUCache(2)
+        >>> cache['a'] = 1; cache['b'] = 2
+        >>> cache.get('a')
+        1
+        >>> cache['c'] = 3
+        >>> sorted(cache.keys())
+        ['a', 'c']
+        >>> cache.get('b') is None
+        True
+        >>> cache.hits, cache.misses
+        (1, 1)
+    """
+    # Indices into the nodes of the circular linked list that records
+    # the order in which keys were used.
+    _PREV, _NEXT, _KEY, _VALUE = 0, 1, 2, 3
+
+    def __init__(self, maxsize=100, sizeof=None):
+        """
+        :param maxsize: The maximum number (or total size) of items
+            to hold, or None for no limit.
+        :type maxsize: int
+        :param sizeof: A function returning the size of a value.  By
+            default, each value has size 1.
+        """
+        self.maxsize = maxsize
+        self.hits = self.misses = 0
+        self._sizeof = sizeof
+        self.currsize = 0
+        """The total size of the cached items."""
+        self._map = {}
+        # The root of the linked list: root[_NEXT] is the least
+        # recently used node, and root[_PREV] the most recently used.
+        self._root = root = []
+        root[:] = [root, root, None, None]
+
+    def _unlink(self, node):
+        node[self._PREV][self._NEXT] = node[self._NEXT]
+        node[self._NEXT][self._PREV] = node[self._PREV]
+
+    def _append(self, node):
+        root = self._root
+        last = root[self._PREV]
+        node[self._PREV], node[self._NEXT] = last, root
+        last[self._NEXT] = root[self._PREV] = node
+
+    def get(self, key, default=None):
+        """
+        Return the value for ``key`` (marking it as the most recently
+        used item), or ``default`` if it is not in the cache.
+        """
+        node = self._map.get(key)
+        if node is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._unlink(node)
+        self._append(node)
+        return node[self._VALUE]
+
+    def __getitem__(self, key):
+        node = self._map.get(key)
+        if node is None:
+            self.misses += 1
+            raise KeyError(key)
+        return self.get(key)
+
+    def _size(self, value):
+        if self._sizeof is None:
+            return 1
+        return self._sizeof(value)
+
+    def __setitem__(self, key, value):
+        node = self._map.get(key)
+        if node is not None:
+            self._unlink(node)
+            self.currsize -= self._size(node[self._VALUE])
+            node[self._VALUE] = value
+        else:
+            node = self._map[key] = [None, None, key, value]
+        self.currsize += self._size(value)
+        self._append(node)
+        if self.maxsize is not None:
+            while self.currsize > self.maxsize:
+                del self[self._root[self._NEXT][self._KEY]]
+
+    def __delitem__(self, key):
+        node = self._map.pop(key)
+        self._unlink(node)
+        self.currsize -= self._size(node[self._VALUE])
+
+    def __contains__(self, key):
+        return key in self._map
+
+    def __len__(self):
+        return len(self._map)
+
+    def keys(self):
+        """
+        Return the keys in the cache, from least to most recently used.
+        """
+        keys = []
+        node = self._root[self._NEXT]
+        while node is not self._root:
+            keys.append(node[self._KEY])
+            node = node[self._NEXT]
+        return keys
+
+    def clear(self):
+        """
+        Remove all items from the cache.  (The hit and miss counts
+        are not reset.)
+        """
+        self._map.clear()
+        self.currsize = 0
+        root = self._root
+        root[:] = [root, root, None, None]
+
+    def __repr__(self):
+        if self._sizeof is None:
+            return '<LRUCache with %d of %s items>' % (len(self), self.maxsize)
+        return '<LRUCache with %d items, size %d of %s>' % (
+            len(self), self.currsize, self.maxsize)
+
 ######################################################################
 # Lazy Sequences
 ######################################################################
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+#
+## Natural Language Toolkit: Import Time Benchmark
+#
+# Copyright (C) 2001-2012 NLTK Project
+# URL: <http://www.nltk.org/>
+# For license information, see LICENSE.TXT
+
+"""
+This command-line tool measures how long ``import nltk`` takes, in a
+fresh interpreter, and how many NLTK modules it loads.  Each
+measurement is repeated, and the fastest time is reported.  If
+``--max-time`` is given, then the tool fails (with exit status 1) if
+the import takes longer, so that it can guard against changes that
+make ``import nltk`` slow again.
+
+Usage: import_time.py [--repeat N] [--max-time SECONDS] [STATEMENT]
+
+If a statement is given, then it is timed too, after ``import nltk``.
+The measurements are made by ``nltk.bench.startup``.
+"""
+
+import os, sys
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from nltk.bench.startup import measure_startup
+
+def time_statement(statement=None, repeat=5):
+    """
+    :return: The fastest time (in seconds) taken by ``import nltk``
+        and ``statement`` in ``repeat`` fresh interpreters, and the
+        number of nltk modules loaded by them.
+    """
+    result = measure_startup('', statement, repeat, calls=1)
+    if 'skipped' in result:
+        raise LookupError(result['skipped'])
+    elapsed = result['import_time'] + result.get('first_call', 0)
+    return elapsed / 1000, result['nltk_modules']
+
+def main():
+    parser = OptionParser(usage='%prog [options] [statement]')
+    parser.add_option('--repeat', type='int', default=5,
+                      help='number of fresh interpreters to time')
+    parser.add_option('--max-time', type='float', default=None,
+                      help='fail if the statement takes longer (seconds)')
+    options, args = parser.parse_args()
+    statement = ' '.join(args) or None
+
+    elapsed, num_modules = time_statement(statement, options.repeat)
+    print '%s: %.3fs, %d nltk modules loaded' % (statement or 'import nltk',
+                                                 elapsed, num_modules)
+    if options.max_time is not None and elapsed > options.max_time:
+        print 'FAILED: took longer than %.3fs' % options.max_time
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()